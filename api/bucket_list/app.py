@@ -1,56 +1,126 @@
-from flask import Flask, jsonify, render_template, request
-import boto3
+from flask import Flask, Response, jsonify, render_template, request
 import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask_cors import CORS
+from botocore.exceptions import ClientError
+
+from aws_clients import get_client
+from video_catalog import CLIP_STEM_PATTERN, INDEXED_THUMBNAIL_PATTERN, build_store, get_video, list_videos, sanitize_basename
 
 app = Flask(__name__)
 CORS(app, origins=["https://www.videofinding.com"])
 
+OUTPUT_BUCKET_NAME = 'video-output-pipeline-20250724'   # 변환 MP4(converted/) / 전사(transcribe/)
 
-def load_output_json(bucket_name):
-    s3 = boto3.client('s3')
+# ===== 목록 페이지 설정 =====
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000        # list_objects_v2 MaxKeys 상한 → 페이지 하나 = S3 호출 1번
+STREAM_BATCH_SIZE = 200     # 스트리밍 응답에서 한 번에 내보내는 항목 수
+
+# ===== 영상 카탈로그 (S3 이벤트로 갱신되는 인덱스, sam/modules/lambdas/catalog_lambda) =====
+# dynamodb:<테이블> | sqlite:<경로> (로컬: python video_catalog.py backfill sqlite:<경로> 로 채움). 비우면 사용 안 함
+CATALOG_STORE = os.getenv('CATALOG_STORE', '')
+catalog_store = build_store(CATALOG_STORE, get_client('dynamodb') if CATALOG_STORE.startswith('dynamodb:') else None)
+
+
+def object_item(obj):
+    return {
+        "key": obj["Key"],
+        "size": obj.get("Size"),
+        "lastModified": obj["LastModified"].isoformat() if obj.get("LastModified") else None,
+        "etag": (obj.get("ETag") or "").strip('"') or None
+    }
+
+
+def list_page(bucket_name, prefix='', limit=DEFAULT_PAGE_SIZE, cursor=None, delimiter=None):
+    """
+    prefix 아래 한 페이지 (S3 list_objects_v2 1번, MaxKeys=limit).
+    cursor는 이전 페이지의 nextCursor (S3 continuation token), delimiter='/'면 하위 폴더는 prefixes로만 반환
+    """
+    params = {"Bucket": bucket_name, "Prefix": prefix, "MaxKeys": limit}
+    if cursor:
+        params["ContinuationToken"] = cursor
+    if delimiter:
+        params["Delimiter"] = delimiter
+    response = get_client('s3').list_objects_v2(**params)
+    return {
+        "prefix": prefix,
+        "prefixes": [p["Prefix"] for p in response.get("CommonPrefixes", [])],
+        "nextCursor": response.get("NextContinuationToken") if response.get("IsTruncated") else None,
+        "items": [object_item(obj) for obj in response.get("Contents", [])]
+    }
+
+
+def iter_key_pages(bucket_name, prefix=''):
+    """prefix 아래 전체 키를 S3 페이지(최대 1000개) 단위로 (continuation token으로 끝까지)"""
+    paginator = get_client('s3').get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, PaginationConfig={"PageSize": MAX_PAGE_SIZE}):
+        yield [obj["Key"] for obj in page.get("Contents", [])]
+
+
+def stream_json_array(batches):
+    """항목 묶음들을 JSON 배열 하나로 이어서 내보냄 (전체를 메모리에 모으지 않음)"""
+    yield '['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        body = ','.join(json.dumps(item, ensure_ascii=False) for item in batch)
+        yield body if first else ',' + body
+        first = False
+    yield ']'
+
+
+def stream_page(page):
+    """페이지 메타데이터를 먼저, items는 STREAM_BATCH_SIZE개씩"""
+    items = page["items"]
+    head = {k: v for k, v in page.items() if k != "items"}
+    yield json.dumps(head, ensure_ascii=False)[:-1] + ',"items":'
+    yield from stream_json_array(items[i:i + STREAM_BATCH_SIZE] for i in range(0, len(items), STREAM_BATCH_SIZE))
+    yield '}'
 
+
+def load_output_json(bucket_name):
+    """
+    (기존 형식) 버킷 전체 키 목록. 첫 페이지를 먼저 읽어 S3 오류는 응답 전에 드러내고,
+    나머지 페이지는 응답을 보내면서 이어서 읽는다. 1000개에서 잘리지 않음
+    """
     try:
         print(f"🔍 S3 버킷 조회 시작: {bucket_name}")
-        
-        # 모든 폴더 조회 (original/, output/, thumbnails/)
-        response = s3.list_objects_v2(Bucket=bucket_name)
-        bucket_json = response.get("Contents", [])
-        
-        print(f"📁 총 파일 개수: {len(bucket_json)}")
-        
-        # 단순 리스트 형식으로 반환
-        key_objects = [obj["Key"] for obj in bucket_json]
-        
-        # 디버깅을 위한 폴더별 파일 개수 출력
-        original_files = [key for key in key_objects if key.startswith('original/')]
-        output_files = [key for key in key_objects if key.startswith('output/')]
-        thumbnail_files = [key for key in key_objects if key.startswith('thumbnails/')]
-        
-        print(f"📂 original/ 폴더: {len(original_files)}개 파일")
-        print(f"📂 output/ 폴더: {len(output_files)}개 파일")
-        print(f"📂 thumbnails/ 폴더: {len(thumbnail_files)}개 파일")
-        
-        if output_files:
-            print(f"🔍 output/ 파일들: {output_files}")
-        else:
-            print("⚠️ output/ 폴더에 파일이 없습니다!")
-            
-        # 모든 파일 출력 (디버깅용)
-        print("📋 전체 파일 목록:")
-        for i, file in enumerate(key_objects):
-            print(f"  {i+1}. {file}")
-            
-        return key_objects  # 리스트 형식으로 반환
-
+        pages = iter_key_pages(bucket_name)
+        first_page = next(pages, [])
     except Exception as e:
         print(f"S3 접근 중 오류: {e}")
         return None
 
+    def all_pages():
+        total = len(first_page)
+        yield first_page
+        for page in pages:
+            total += len(page)
+            yield page
+        print(f"📁 총 파일 개수: {total}")
+
+    return stream_json_array(all_pages())
+
+
+def parse_page_args(args):
+    """?prefix=&limit=&cursor=&delimiter= → list_page 인자 (잘못된 limit은 ValueError)"""
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit은 1~{MAX_PAGE_SIZE} 사이여야 합니다")
+    return {
+        "prefix": args.get('prefix', ''),
+        "limit": limit,
+        "cursor": args.get('cursor') or None,
+        "delimiter": args.get('delimiter') or None
+    }
+
 
 def delete_s3_file(bucket_name, file_key):
-    s3 = boto3.client('s3')
+    s3 = get_client('s3')
     
     try:
         print(f"🗑️ S3 파일 삭제 시작: {bucket_name}/{file_key}")
@@ -66,97 +136,258 @@ def delete_s3_file(bucket_name, file_key):
         return False
 
 
+# ===== 연쇄 삭제 =====
+DELETE_BATCH_SIZE = 1000    # delete_objects 1회 최대 키 수
+# manifests/<원본 이름>_<YYYYmmdd_HHMMSS>.json (cut_transcribe)
+# manifests/<원본 이름>_<시작>s-<끝>s_short_<YYYYmmdd_HHMMSS>.json (cut_shorts)
+MANIFEST_STEM_PATTERN = re.compile(r'^(?P<base>.+?)(?:_\d+s-\d+s_short)?_\d{8}_\d{6}$')
+
+
+def list_keys(bucket_name, prefix):
+    keys = []
+    for page in iter_key_pages(bucket_name, prefix):
+        keys.extend(page)
+    return keys
+
+
+def derived_clip_keys(bucket_name, video_id):
+    """
+    원본에서 나온 클립/클립 썸네일 (입력 버킷). 접두사 목록 조회 후 정확한 영상 ID만 남김
+    (soccer 삭제 시 soccer_final_0s-8s.mp4 같은 다른 영상의 클립은 제외)
+    클립 썸네일은 <클립>.jpg 또는 프레임 캡처 이름 <클립>.0000000.jpg
+    """
+    keys = []
+    for prefix in ('output/', 'thumbnails/'):
+        for key in list_keys(bucket_name, f"{prefix}{video_id}_"):
+            m = CLIP_STEM_PATTERN.match(INDEXED_THUMBNAIL_PATTERN.sub('', os.path.splitext(os.path.basename(key))[0]))
+            if m and m.group('base') == video_id:
+                keys.append(key)
+    return keys
+
+
+def manifest_keys(bucket_name, video_id, raw_base):
+    """
+    원본에서 나온 클립 매니페스트 (자르기 Lambda 두 종류 모두, MANIFEST_STEM_PATTERN).
+    이름에는 정리 전 원본 이름이 들어가므로 원본 이름/영상 ID 두 접두사로 조회하고, 영상 ID로 비교
+    """
+    keys = []
+    for name in dict.fromkeys((raw_base, video_id)):
+        for key in list_keys(bucket_name, f"manifests/{name}_"):
+            m = MANIFEST_STEM_PATTERN.match(os.path.splitext(os.path.basename(key))[0])
+            if m and sanitize_basename(m.group('base')) == video_id and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def resolve_related_files(bucket_name, video_path):
+    """
+    삭제할 파일 → {버킷: [키, ...]} (첫 항목은 비디오 자체).
+      - 원본: 원본 썸네일, 변환 MP4/키프레임 인덱스, 전사 JSON, 파생 클립/클립 썸네일/매니페스트
+              (카탈로그가 있으면 레코드에서, 없으면 경로 규칙 + 접두사 목록 조회로 실제 있는 것만)
+      - 클립: 클립 썸네일
+    """
+    filename = video_path.split('/')[-1]
+    base_name = re.sub(r'\.[^/.]+$', '', filename)  # 확장자 제거
+    related = {bucket_name: [video_path]}
+
+    def add(bucket, key):
+        keys = related.setdefault(bucket, [])
+        if key and key not in keys:
+            keys.append(key)
+
+    if video_path.startswith('original/'):
+        video_id = sanitize_basename(base_name)
+        record = get_video(catalog_store, video_id) if catalog_store is not None else None
+        if record is not None and (record.get('original') or {}).get('key') in (None, video_path):
+            print(f"📚 카탈로그에서 관련 파일 조회: {video_id}")
+            for name in ('thumbnail', 'converted', 'keyframeIndex', 'transcript'):
+                if record.get(name):
+                    add(record[name]['bucket'], record[name]['key'])
+            for clip in record.get('clips') or []:
+                add(clip['bucket'], clip['key'])
+                if clip.get('thumbnail'):
+                    add(clip['thumbnail']['bucket'], clip['thumbnail']['key'])
+        else:
+            # 썸네일 <base>.jpg (+ 리네임 전 프레임 캡처 <base>.0000000.jpg)
+            thumb_prefix = f"original/thumbnails/{base_name}."
+            for key in list_keys(bucket_name, thumb_prefix):
+                if re.fullmatch(r'(\d+\.)?jpg', key[len(thumb_prefix):]):
+                    add(bucket_name, key)
+            for key in list_keys(OUTPUT_BUCKET_NAME, f"converted/{base_name}."):
+                if key in (f"converted/{base_name}.mp4", f"converted/{base_name}.kfi"):
+                    add(OUTPUT_BUCKET_NAME, key)
+            for key in list_keys(OUTPUT_BUCKET_NAME, f"transcribe/{base_name}."):
+                if key == f"transcribe/{base_name}.json":
+                    add(OUTPUT_BUCKET_NAME, key)
+            for key in derived_clip_keys(bucket_name, video_id):
+                add(bucket_name, key)
+        for key in manifest_keys(bucket_name, video_id, base_name):
+            add(bucket_name, key)
+    elif video_path.startswith('output/'):
+        # Cut 비디오의 경우 (썸네일은 <클립>.jpg 또는 프레임 캡처 <클립>.0000000.jpg)
+        add(bucket_name, f"thumbnails/{base_name}.jpg")
+        add(bucket_name, f"thumbnails/{base_name}.0000000.jpg")
+    else:
+        # 기타 경로의 경우 모든 가능한 경로
+        add(bucket_name, f"thumbnails/{base_name}.jpg")
+        add(bucket_name, f"original/thumbnails/{base_name}.jpg")
+    return related
+
+
+def delete_keys_batched(bucket_name, keys):
+    """delete_objects (1000개씩) → 키별 결과 [{"bucket", "key", "status": "deleted"|"failed", "error"}]"""
+    s3 = get_client('s3')
+    results = []
+    for i in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[i:i + DELETE_BATCH_SIZE]
+        try:
+            response = s3.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": False}
+            )
+        except Exception as e:
+            print(f"❌ 일괄 삭제 실패: {bucket_name} ({len(batch)}개) - {e}")
+            results.extend({"bucket": bucket_name, "key": key, "status": "failed", "error": str(e)} for key in batch)
+            continue
+        errors = {err["Key"]: f"{err.get('Code')}: {err.get('Message')}" for err in response.get("Errors", [])}
+        for key in batch:
+            if key in errors:
+                results.append({"bucket": bucket_name, "key": key, "status": "failed", "error": errors[key]})
+            else:
+                results.append({"bucket": bucket_name, "key": key, "status": "deleted"})
+        print(f"🗑️ 일괄 삭제: {bucket_name} {len(batch) - len(errors)}개 삭제, {len(errors)}개 실패")
+    return results
+
+
 def delete_video_and_related_files(bucket_name, video_path):
     """
     비디오 파일과 관련된 모든 파일들을 삭제합니다.
     - 비디오 파일 자체
-    - 관련 썸네일 파일 (실제 존재하는 것만)
+    - 원본이면 파생 파일 전체 (썸네일, 변환 MP4, 키프레임 인덱스, 전사 JSON, 클립과 클립 썸네일, 매니페스트)
+    - 클립이면 클립 썸네일
+    관련 파일은 버킷별 delete_objects(최대 1000개씩)로 한 번에 지우고 키별 결과를 돌려줍니다.
     """
-    s3 = boto3.client('s3')
-    deleted_files = []
-    failed_files = []
-    
     try:
         print(f"🗑️ 비디오 및 관련 파일 삭제 시작: {video_path}")
-        
-        # 1. 비디오 파일 자체 삭제
-        try:
-            s3.delete_object(Bucket=bucket_name, Key=video_path)
-            deleted_files.append(video_path)
-            print(f"✅ 비디오 파일 삭제 완료: {video_path}")
-        except Exception as e:
-            failed_files.append(video_path)
-            print(f"❌ 비디오 파일 삭제 실패: {video_path} - {e}")
-            return {
-                "success": False,
-                "deleted_files": deleted_files,
-                "failed_files": failed_files,
-                "error": f"비디오 파일 삭제 실패: {str(e)}"
-            }
-        
-        # 2. 관련 썸네일 파일 찾기 및 삭제
-        video_filename = video_path.split('/')[-1]  # 파일명만 추출
-        import re
-        base_name = re.sub(r'\.[^/.]+$', '', video_filename)  # 확장자 제거
-        
-        # 비디오 타입에 따른 썸네일 경로 결정 (.jpg만)
-        if video_path.startswith('original/'):
-            # Original 비디오의 경우
-            thumbnail_paths = [
-                f"original/thumbnails/{base_name}.jpg"
-            ]
-        elif video_path.startswith('output/'):
-            # Cut 비디오의 경우
-            thumbnail_paths = [
-                f"thumbnails/{base_name}.jpg"
-            ]
-        else:
-            # 기타 경로의 경우 모든 가능한 경로 확인
-            thumbnail_paths = [
-                f"thumbnails/{base_name}.jpg",
-                f"original/thumbnails/{base_name}.jpg"
-            ]
-        
-        print(f"🔍 찾을 썸네일 파일들: {thumbnail_paths}")
-        
-        for thumbnail_path in thumbnail_paths:
-            try:
-                # 파일이 존재하는지 확인
-                s3.head_object(Bucket=bucket_name, Key=thumbnail_path)
-                
-                # 썸네일 파일 삭제
-                s3.delete_object(Bucket=bucket_name, Key=thumbnail_path)
-                deleted_files.append(thumbnail_path)
-                print(f"✅ 썸네일 파일 삭제 완료: {thumbnail_path}")
-                
-            except s3.exceptions.NoSuchKey:
-                # 파일이 존재하지 않으면 무시 (에러로 처리하지 않음)
-                print(f"ℹ️ 썸네일 파일이 존재하지 않음: {thumbnail_path}")
-                continue
-            except Exception as e:
-                # 실제 삭제 중 에러가 발생한 경우만 실패로 처리
-                failed_files.append(thumbnail_path)
-                print(f"❌ 썸네일 파일 삭제 실패: {thumbnail_path} - {e}")
-        
-        # 비디오 파일이 성공적으로 삭제되었으면 성공으로 처리
-        # 썸네일 삭제 실패는 경고로 처리하되, 전체 작업은 성공으로 간주
-        success = any(file.endswith('.mp4') for file in deleted_files)
-        return {
-            "success": success,
-            "deleted_files": deleted_files,
-            "failed_files": failed_files,
-            "message": "비디오 파일 삭제 완료" if success else "비디오 파일 삭제 실패"
-        }
-        
+        related = resolve_related_files(bucket_name, video_path)
+        print(f"🔍 삭제 대상: { {bucket: len(keys) for bucket, keys in related.items()} }")
+
+        results = []
+        for target_bucket, keys in related.items():
+            results.extend(delete_keys_batched(target_bucket, keys))
     except Exception as e:
         print(f"❌ 전체 삭제 프로세스 실패: {e}")
         return {
             "success": False,
-            "deleted_files": deleted_files,
-            "failed_files": failed_files + [video_path],
+            "deleted_files": [],
+            "failed_files": [video_path],
+            "results": [],
             "error": str(e)
         }
 
+    deleted_files = [r["key"] for r in results if r["status"] == "deleted"]
+    failed_files = [r["key"] for r in results if r["status"] == "failed"]
+    # 비디오 파일이 삭제되었으면 성공 (관련 파일 삭제 실패는 failed_files로만 알림)
+    success = any(r["bucket"] == bucket_name and r["key"] == video_path and r["status"] == "deleted" for r in results)
+    return {
+        "success": success,
+        "deleted_files": deleted_files,
+        "failed_files": failed_files,
+        "results": results,
+        "message": "비디오 파일 삭제 완료" if success else "비디오 파일 삭제 실패"
+    }
+
+
+# ===== 일괄 삭제 =====
+BULK_DELETE_WORKERS = int(os.getenv('BULK_DELETE_WORKERS', '8'))   # 동시에 실행할 조회/delete_objects 수
+BULK_DELETE_MAX_FILES = 1000        # file_keys 최대 개수 (연쇄 삭제면 키마다 관련 파일 조회)
+# prefix 삭제 허용 범위: 이 폴더들로 시작하는 prefix만 (빈 prefix 불가, 폴더 하나 전체는 confirm 필요)
+BULK_DELETE_PREFIXES = ('original/', 'output/', 'thumbnails/', 'manifests/')
+
+
+def is_original_video(key):
+    """original/ 바로 아래 파일 (original/thumbnails/ 등 하위 폴더 제외) → 연쇄 삭제 대상"""
+    return key.startswith('original/') and '/' not in key[len('original/'):]
+
+
+def validate_bulk_prefix(prefix, confirm=None):
+    """오류 메시지 또는 None. 최상위 폴더 자체(예: "original/")는 confirm에 같은 prefix를 적어야 허용"""
+    if not isinstance(prefix, str) or not prefix.startswith(BULK_DELETE_PREFIXES):
+        return f"prefix는 {', '.join(BULK_DELETE_PREFIXES)} 중 하나로 시작해야 합니다"
+    if prefix in BULK_DELETE_PREFIXES and confirm != prefix:
+        return f"폴더 전체({prefix})를 지우려면 confirm에 같은 prefix를 적어야 합니다"
+    return None
+
+
+def stream_bulk_delete(bucket_name, file_keys=None, prefix=None, cascade=True):
+    """
+    여러 파일 삭제 → NDJSON 진행 상황 (한 줄에 JSON 하나).
+      {"type": "resolved", "buckets": {버킷: 키 수}, "total"}   삭제 대상 확정
+      {"type": "batch", "bucket", "deleted": [...], "failed": [{"key", "error"}], "done", "total"}  delete_objects 1회 끝날 때마다
+      {"type": "error", "key", "error"}                         관련 파일 조회 실패 (그 키만 건너뜀)
+      {"type": "summary", "deleted", "failed", "total"}
+    cascade면 원본 영상마다 관련 파일까지 (resolve_related_files, 스레드 풀에서 동시에) — file_keys든 prefix 목록이든 같음.
+    prefix는 그 아래 키를 목록 페이지(1000개)마다 바로 삭제 배치로 넘김. 버킷별 배치는 스레드 풀에서 동시에 실행
+    """
+    def line(payload):
+        return json.dumps(payload, ensure_ascii=False) + "\n"
+
+    pool = ThreadPoolExecutor(max_workers=BULK_DELETE_WORKERS, thread_name_prefix="bulk-delete")
+    futures = []
+    counts = {}
+    submitted = {}
+
+    def submit(target_bucket, keys):
+        # 같은 키를 두 번 지우지 않게 (prefix 목록과 연쇄 삭제 대상이 겹치는 경우)
+        seen = submitted.setdefault(target_bucket, set())
+        keys = [key for key in dict.fromkeys(keys) if key not in seen]
+        seen.update(keys)
+        if keys:
+            counts[target_bucket] = counts.get(target_bucket, 0) + len(keys)
+        for i in range(0, len(keys), DELETE_BATCH_SIZE):
+            futures.append(pool.submit(delete_keys_batched, target_bucket, keys[i:i + DELETE_BATCH_SIZE]))
+
+    try:
+        resolving = {}
+        if prefix:
+            for page in iter_key_pages(bucket_name, prefix):
+                originals = {key for key in page if is_original_video(key)} if cascade else set()
+                submit(bucket_name, [key for key in page if key not in originals])
+                resolving.update({pool.submit(resolve_related_files, bucket_name, key): key for key in originals})
+        elif cascade:
+            resolving = {pool.submit(resolve_related_files, bucket_name, key): key for key in file_keys}
+        else:
+            submit(bucket_name, file_keys)
+        for future in as_completed(resolving):
+            try:
+                related = future.result()
+            except Exception as e:
+                print(f"❌ 관련 파일 조회 실패: {resolving[future]} - {e}")
+                yield line({"type": "error", "key": resolving[future], "error": str(e)})
+                continue
+            for target_bucket, keys in related.items():
+                submit(target_bucket, keys)
+
+        total = sum(counts.values())
+        yield line({"type": "resolved", "buckets": counts, "total": total})
+        done = deleted = failed = 0
+        for future in as_completed(futures):
+            results = future.result()   # delete_keys_batched는 실패도 결과로 돌려줌
+            batch_deleted = [r["key"] for r in results if r["status"] == "deleted"]
+            batch_failed = [{"key": r["key"], "error": r["error"]} for r in results if r["status"] == "failed"]
+            done += len(results)
+            deleted += len(batch_deleted)
+            failed += len(batch_failed)
+            yield line({"type": "batch", "bucket": results[0]["bucket"] if results else None,
+                        "deleted": batch_deleted, "failed": batch_failed, "done": done, "total": total})
+        print(f"🗑️ 일괄 삭제 완료: {deleted}개 삭제, {failed}개 실패")
+        yield line({"type": "summary", "deleted": deleted, "failed": failed, "total": total})
+    except Exception as e:
+        print(f"❌ 일괄 삭제 실패: {e}")
+        yield line({"type": "error", "key": None, "error": str(e)})
+    finally:
+        pool.shutdown(wait=False)
+
 
 # @app.route('/')
 # def index():
@@ -165,13 +396,63 @@ def delete_video_and_related_files(bucket_name, video_path):
 @app.route('/api/bucket/bucketdata', methods=['GET'])
 def get_s3_list():
     BUCKET_NAME = 'video-input-pipeline-20250724'
+
+    # prefix/limit/cursor/delimiter 중 하나라도 있으면 페이지 응답
+    # {"prefix", "prefixes", "nextCursor", "items": [{"key", "size", "lastModified", "etag"}]}
+    if any(name in request.args for name in ('prefix', 'limit', 'cursor', 'delimiter')):
+        try:
+            page = list_page(BUCKET_NAME, **parse_page_args(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except ClientError as e:
+            print(f"❌ S3 목록 조회 실패: {e}")
+            code = e.response.get("Error", {}).get("Code")
+            if code == "InvalidArgument":   # 다른 prefix의 cursor 등
+                return jsonify({"error": "잘못된 cursor입니다"}), 400
+            return jsonify({"error": "S3 접근 오류"}), 500
+        return Response(stream_page(page), mimetype='application/json')
+
+    # 파라미터가 없으면 기존처럼 전체 키 리스트 (스트리밍)
     result = load_output_json(BUCKET_NAME)
     if result is not None:
-        return jsonify(result)  # 리스트 형식으로 JSON 응답
+        return Response(result, mimetype='application/json')
     else:
         return jsonify({"error": "S3 접근 오류"}), 500
 
 
+@app.route('/api/bucket/catalog', methods=['GET'])
+def get_catalog_page():
+    """영상 목록 (업로드 최신순). ?limit=&cursor= → {"videos": [...], "nextCursor"}"""
+    if catalog_store is None:
+        return jsonify({"error": "카탈로그가 설정되지 않았습니다 (CATALOG_STORE)"}), 503
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit은 1~{MAX_PAGE_SIZE} 사이여야 합니다")
+        videos, next_cursor = list_videos(catalog_store, limit, request.args.get('cursor') or None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ 카탈로그 조회 실패: {e}")
+        return jsonify({"error": "카탈로그 조회 오류"}), 500
+    return jsonify({"videos": videos, "nextCursor": next_cursor})
+
+
+@app.route('/api/bucket/catalog/<video_id>', methods=['GET'])
+def get_catalog_video(video_id):
+    """영상 1건 (원본/변환 MP4/전사/썸네일/클립, 크기/구간/상태)"""
+    if catalog_store is None:
+        return jsonify({"error": "카탈로그가 설정되지 않았습니다 (CATALOG_STORE)"}), 503
+    try:
+        record = get_video(catalog_store, video_id)
+    except Exception as e:
+        print(f"❌ 카탈로그 조회 실패: {e}")
+        return jsonify({"error": "카탈로그 조회 오류"}), 500
+    if record is None:
+        return jsonify({"error": "영상을 찾을 수 없습니다", "videoId": video_id}), 404
+    return jsonify(record)
+
+
 @app.route('/api/bucket/deletefile', methods=['DELETE'])
 def delete_file():
     BUCKET_NAME = 'video-input-pipeline-20250724'
@@ -193,13 +474,15 @@ def delete_file():
                 "message": result.get("message", "비디오와 관련 파일들이 성공적으로 삭제되었습니다"),
                 "deleted_files": result["deleted_files"],
                 "total_deleted": len(result["deleted_files"]),
-                "failed_files": result["failed_files"] if result["failed_files"] else []
+                "failed_files": result["failed_files"] if result["failed_files"] else [],
+                "results": result["results"]
             })
         else:
             return jsonify({
                 "error": result.get("message", "비디오 파일 삭제에 실패했습니다"),
                 "deleted_files": result["deleted_files"],
-                "failed_files": result["failed_files"]
+                "failed_files": result["failed_files"],
+                "results": result["results"]
             }), 500
             
     except Exception as e:
@@ -207,6 +490,37 @@ def delete_file():
         return jsonify({"error": f"서버 오류: {str(e)}"}), 500
 
 
+@app.route('/api/bucket/deletefiles', methods=['POST', 'DELETE'])
+def delete_files():
+    """
+    일괄 삭제. {"file_keys": [...], "cascade": true} 또는 {"prefix": "output/...", "cascade": true}
+    (최상위 폴더 전체는 {"prefix": "output/", "confirm": "output/"})
+    → application/x-ndjson 으로 진행 상황 스트리밍 (stream_bulk_delete)
+    """
+    BUCKET_NAME = 'video-input-pipeline-20250724'
+
+    data = request.get_json(silent=True) or {}
+    file_keys = data.get('file_keys')
+    prefix = data.get('prefix')
+    cascade = data.get('cascade', True) is not False
+
+    if bool(file_keys) == bool(prefix):
+        return jsonify({"error": "file_keys 또는 prefix 중 하나가 필요합니다"}), 400
+    if file_keys is not None:
+        if not isinstance(file_keys, list) or not all(isinstance(key, str) and key for key in file_keys):
+            return jsonify({"error": "file_keys는 문자열 배열이어야 합니다"}), 400
+        if len(file_keys) > BULK_DELETE_MAX_FILES:
+            return jsonify({"error": f"file_keys는 최대 {BULK_DELETE_MAX_FILES}개입니다"}), 400
+        file_keys = list(dict.fromkeys(file_keys))
+    if prefix is not None:
+        invalid = validate_bulk_prefix(prefix, data.get('confirm'))
+        if invalid:
+            return jsonify({"error": invalid}), 400
+
+    print(f"🗑️ 일괄 삭제 요청: {len(file_keys) if file_keys else 0}개 키, prefix={prefix}, cascade={cascade}")
+    return Response(stream_bulk_delete(BUCKET_NAME, file_keys, prefix, cascade), mimetype='application/x-ndjson')
+
+
 # 헬스체크 API
 @app.route('/api/bucket/health', methods=['GET'])
 def health_check():
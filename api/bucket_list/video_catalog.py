@@ -0,0 +1,534 @@
+"""
+영상 카탈로그.
+
+원본 업로드/변환/전사/썸네일/클립 생성·삭제 S3 이벤트를 영상 단위 레코드로 모아 둔다.
+목록/조회가 버킷 전체 list_objects_v2 + 파일명 짝 맞추기 대신 인덱스 조회(페이지 크기만큼)가 된다.
+
+같은 파일을 두 곳에서 사용:
+  - sam/modules/lambdas/catalog_lambda : S3 이벤트(EventBridge) → 레코드 갱신
+  - api/bucket_list                    : 목록/조회 API, 초기 적재(backfill)
+
+저장소 (CATALOG_STORE)
+  - dynamodb:<테이블>  : PK video_id, SK item ("video" = 영상 요약, "clip#<키>" = 클립)
+                         희소 GSI by_upload(list_pk, listed_at)로 업로드 최신순 목록
+  - sqlite:<파일 경로> : 같은 구조의 로컬 대체 (개발/docker-compose용, backfill로 채움)
+
+아티팩트 경로 규칙 (키 → 영상 ID는 자르기 Action Group의 sanitize_basename과 같은 정규화)
+  입력 버킷  original/<base>.<확장자>            원본
+             original/thumbnails/<base>.jpg     원본 썸네일
+             output/<base>_<s>s-<e>s[_short].mp4 클립,  thumbnails/<클립>.jpg 클립 썸네일
+             manifests/<...>.json               클립 매니페스트 (클립 구간/길이)
+  출력 버킷  converted/<base>.mp4               변환 MP4,  converted/<base>.kfi 키프레임 인덱스
+             transcribe/<base>.json             전사 결과
+
+이벤트 순서: EventBridge는 같은 키의 이벤트를 순서대로 보내지 않을 수 있다 (Deleted가 더 새 Created 뒤에 도착 등).
+아티팩트마다 마지막으로 반영한 이벤트 순서값(<artifact>_order = 이벤트 시각 + S3 sequencer)을 같이 저장하고,
+그보다 오래된 이벤트는 조건부 갱신으로 버린다. 삭제도 필드만 지우고 순서값은 남긴다 (늦게 온 옛 Created 방지)
+"""
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# ---------- Config ----------
+INPUT_BUCKET = os.getenv('CATALOG_INPUT_BUCKET', 'video-input-pipeline-20250724')
+OUTPUT_BUCKET = os.getenv('CATALOG_OUTPUT_BUCKET', 'video-output-pipeline-20250724')
+LIST_INDEX_NAME = 'by_upload'
+LIST_PARTITION = 'video'
+SUMMARY_ITEM = 'video'
+CLIP_ITEM_PREFIX = 'clip#'
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm', '.m4v')
+# 영상 요약 레코드에 들어가는 아티팩트 (필드 접두사)
+SUMMARY_ARTIFACTS = ('original', 'thumbnail', 'converted', 'keyframe_index', 'transcript')
+
+CLIP_STEM_PATTERN = re.compile(r'^(?P<base>.+)_\d+s-\d+s(?:_short)?$')
+INDEXED_THUMBNAIL_PATTERN = re.compile(r'\.\d+$')   # MediaConvert 프레임 캡처 출력 (<base>.0000000.jpg)
+
+
+def sanitize_basename(name: str) -> str:
+    name = name.replace(" ", "_")
+    return re.sub(r"[^A-Za-z0-9._-]", "", name) or "video"
+
+
+def _stem(key: str) -> str:
+    return os.path.splitext(os.path.basename(key))[0]
+
+
+def _ext(key: str) -> str:
+    return os.path.splitext(key)[1].lower()
+
+
+def classify(bucket: str, key: str) -> Optional[Dict[str, str]]:
+    """
+    S3 객체 → {"video_id", "artifact", "bucket", "key"} (클립/클립 썸네일은 "clip_key" 포함).
+    카탈로그 대상이 아니면 None
+    """
+    ref = {"bucket": bucket, "key": key}
+    if bucket == INPUT_BUCKET:
+        if key.startswith('original/thumbnails/'):
+            stem = _stem(key)
+            if _ext(key) != '.jpg' or INDEXED_THUMBNAIL_PATTERN.search(stem):
+                return None
+            return {**ref, "video_id": sanitize_basename(stem), "artifact": "thumbnail"}
+        if key.startswith('original/') and '/' not in key[len('original/'):] and _ext(key) in VIDEO_EXTENSIONS:
+            return {**ref, "video_id": sanitize_basename(_stem(key)), "artifact": "original"}
+        if key.startswith('output/') and _ext(key) == '.mp4':
+            m = CLIP_STEM_PATTERN.match(_stem(key))
+            if m:
+                return {**ref, "video_id": m.group('base'), "artifact": "clip", "clip_key": key}
+        if key.startswith('thumbnails/') and _ext(key) == '.jpg':
+            # ffmpeg이 없는 자르기 Lambda는 프레임 캡처 이름(<클립>.0000000.jpg)을 그대로 클립 썸네일로 씀
+            stem = INDEXED_THUMBNAIL_PATTERN.sub('', _stem(key))
+            m = CLIP_STEM_PATTERN.match(stem)
+            if m:
+                return {**ref, "video_id": m.group('base'), "artifact": "clip_thumbnail",
+                        "clip_key": f"output/{stem}.mp4"}
+        if key.startswith('manifests/') and _ext(key) == '.json':
+            return {**ref, "video_id": None, "artifact": "manifest"}
+    elif bucket == OUTPUT_BUCKET:
+        if key.startswith('converted/'):
+            artifact = {'.mp4': 'converted', '.kfi': 'keyframe_index'}.get(_ext(key))
+            if artifact:
+                return {**ref, "video_id": sanitize_basename(_stem(key)), "artifact": artifact}
+        if key.startswith('transcribe/') and _ext(key) == '.json':
+            return {**ref, "video_id": sanitize_basename(_stem(key)), "artifact": "transcript"}
+    return None
+
+
+def _epoch(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _encode_cursor(value) -> Optional[str]:
+    if value is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(value, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError("잘못된 cursor입니다")
+
+
+# ---------- 저장소 ----------
+# 두 저장소 모두 같은 연산만 제공: upsert(set/remove 필드) / delete / query_video / query_listed
+
+class DynamoCatalogStore:
+    """DynamoDB (low-level client). 값은 문자열/숫자/불리언만 사용"""
+
+    def __init__(self, table_name: str, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('dynamodb')
+        self.table_name = table_name
+        self.client = client
+
+    @staticmethod
+    def _to_attr(value):
+        if isinstance(value, bool):
+            return {'BOOL': value}
+        if isinstance(value, (int, float)):
+            return {'N': repr(value) if isinstance(value, float) else str(value)}
+        return {'S': str(value)}
+
+    @staticmethod
+    def _from_attr(attr):
+        if 'N' in attr:
+            number = float(attr['N'])
+            return int(number) if number.is_integer() and '.' not in attr['N'] else number
+        if 'BOOL' in attr:
+            return attr['BOOL']
+        return attr.get('S')
+
+    def _item(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: self._from_attr(attr) for name, attr in raw.items()}
+
+    def upsert(self, video_id: str, item: str, set_fields: Dict[str, Any], remove_fields: List[str] = (),
+               newer_than: Optional[Tuple[str, str]] = None) -> bool:
+        """newer_than=(필드, 값): 저장된 필드 값이 없거나 더 작을 때만 반영 (필드도 값으로 갱신). 반영 여부 반환"""
+        if newer_than:
+            set_fields = {**set_fields, newer_than[0]: newer_than[1]}
+        names, values, sets, removes = {}, {}, [], []
+        for i, (field, value) in enumerate(set_fields.items()):
+            names[f'#s{i}'] = field
+            values[f':s{i}'] = self._to_attr(value)
+            sets.append(f'#s{i} = :s{i}')
+        for i, field in enumerate(remove_fields):
+            names[f'#r{i}'] = field
+            removes.append(f'#r{i}')
+        expression = ''
+        if sets:
+            expression += 'SET ' + ', '.join(sets)
+        if removes:
+            expression += ' REMOVE ' + ', '.join(removes)
+        params = {
+            'TableName': self.table_name,
+            'Key': {'video_id': {'S': video_id}, 'item': {'S': item}},
+            'UpdateExpression': expression.strip(),
+            'ExpressionAttributeNames': names
+        }
+        if newer_than:
+            # SET에 같은 필드가 있으므로 값은 그 자리표시자를 그대로 사용
+            i = list(set_fields).index(newer_than[0])
+            params['ConditionExpression'] = f'attribute_not_exists(#s{i}) OR #s{i} < :s{i}'
+        if values:
+            params['ExpressionAttributeValues'] = values
+        try:
+            self.client.update_item(**params)
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def delete(self, video_id: str, item: str):
+        self.client.delete_item(TableName=self.table_name, Key={'video_id': {'S': video_id}, 'item': {'S': item}})
+
+    def query_video(self, video_id: str) -> List[Dict[str, Any]]:
+        items, start_key = [], None
+        while True:
+            params = {
+                'TableName': self.table_name,
+                'KeyConditionExpression': 'video_id = :v',
+                'ExpressionAttributeValues': {':v': {'S': video_id}}
+            }
+            if start_key:
+                params['ExclusiveStartKey'] = start_key
+            response = self.client.query(**params)
+            items.extend(self._item(raw) for raw in response.get('Items', []))
+            start_key = response.get('LastEvaluatedKey')
+            if not start_key:
+                return items
+
+    def query_listed(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        params = {
+            'TableName': self.table_name,
+            'IndexName': LIST_INDEX_NAME,
+            'KeyConditionExpression': 'list_pk = :p',
+            'ExpressionAttributeValues': {':p': {'S': LIST_PARTITION}},
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        start_key = _decode_cursor(cursor)
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        response = self.client.query(**params)
+        return [self._item(raw) for raw in response.get('Items', [])], _encode_cursor(response.get('LastEvaluatedKey'))
+
+
+class SqliteCatalogStore:
+    """로컬 대체 저장소 (같은 item 구조를 JSON 컬럼으로)"""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS catalog_items (
+                video_id  TEXT NOT NULL,
+                item      TEXT NOT NULL,
+                data      TEXT NOT NULL,
+                list_pk   TEXT,
+                listed_at REAL,
+                PRIMARY KEY (video_id, item)
+            );
+            CREATE INDEX IF NOT EXISTS catalog_by_upload ON catalog_items (list_pk, listed_at DESC, video_id DESC);
+        """)
+
+    def upsert(self, video_id: str, item: str, set_fields: Dict[str, Any], remove_fields: List[str] = (),
+               newer_than: Optional[Tuple[str, str]] = None) -> bool:
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT data FROM catalog_items WHERE video_id = ? AND item = ?',
+                                     (video_id, item)).fetchone()
+            data = json.loads(row[0]) if row else {}
+            if newer_than:
+                field, value = newer_than
+                if data.get(field) is not None and data[field] >= value:
+                    return False
+                data[field] = value
+            data.update(set_fields)
+            for field in remove_fields:
+                data.pop(field, None)
+            data.update({'video_id': video_id, 'item': item})
+            self._conn.execute(
+                'INSERT OR REPLACE INTO catalog_items (video_id, item, data, list_pk, listed_at) VALUES (?, ?, ?, ?, ?)',
+                (video_id, item, json.dumps(data, ensure_ascii=False), data.get('list_pk'), data.get('listed_at'))
+            )
+        return True
+
+    def delete(self, video_id: str, item: str):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM catalog_items WHERE video_id = ? AND item = ?', (video_id, item))
+
+    def query_video(self, video_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM catalog_items WHERE video_id = ? ORDER BY item',
+                                      (video_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def query_listed(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        after = _decode_cursor(cursor)
+        sql = 'SELECT data, listed_at, video_id FROM catalog_items WHERE list_pk = ?'
+        params: List[Any] = [LIST_PARTITION]
+        if after:
+            sql += ' AND (listed_at < ? OR (listed_at = ? AND video_id < ?))'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY listed_at DESC, video_id DESC LIMIT ?'
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = _encode_cursor([rows[limit - 1][1], rows[limit - 1][2]]) if len(rows) > limit else None
+        return [json.loads(row[0]) for row in rows[:limit]], next_cursor
+
+
+def build_store(spec: Optional[str], dynamodb_client=None):
+    """"dynamodb:<테이블>" | "sqlite:<경로>" → 저장소 (비어 있으면 None)"""
+    spec = (spec or '').strip()
+    if spec.startswith('dynamodb:'):
+        return DynamoCatalogStore(spec[len('dynamodb:'):], dynamodb_client)
+    if spec.startswith('sqlite:'):
+        return SqliteCatalogStore(spec[len('sqlite:'):])
+    if spec:
+        raise ValueError(f"알 수 없는 CATALOG_STORE: {spec}")
+    return None
+
+
+# ---------- 갱신 ----------
+
+OBJECT_FIELDS = ('bucket', 'key', 'size', 'etag', 'modified')
+SEQUENCER_WIDTH = 32    # S3 sequencer(16진수)는 길이가 다를 수 있어 오른쪽을 0으로 채워 비교
+
+
+def event_order(event: Dict[str, Any]) -> Optional[str]:
+    """
+    S3 이벤트 → 순서값 "<이벤트 시각(초, 12자리)>:<sequencer>" (문자열 비교 = 시간 순서). 알 수 없으면 None.
+    sequencer는 같은 키 안에서만 비교 가능하므로 시각을 앞에 둠 (같은 아티팩트 자리에 다른 키가 올 수 있음)
+    """
+    sequencer = ((event.get('detail') or {}).get('object') or {}).get('sequencer')
+    occurred = _epoch(event.get('time'))
+    if not sequencer and occurred is None:
+        return None
+    return f"{int(occurred or 0):012d}:{str(sequencer or '').upper().ljust(SEQUENCER_WIDTH, '0')}"
+
+
+def _order_field(artifact: str) -> str:
+    if artifact == 'clip_thumbnail':
+        return 'thumbnail_order'
+    return f'{artifact}_order'
+
+
+def record_object(store, ref: Dict[str, str], size=None, etag=None, modified=None, order: Optional[str] = None) -> bool:
+    """객체 생성(또는 덮어쓰기) 반영. order(event_order)가 이미 반영된 것보다 오래됐으면 무시하고 False"""
+    fields = {'bucket': ref['bucket'], 'key': ref['key'], 'size': size,
+              'etag': (etag or '').strip('"') or None, 'modified': _epoch(modified)}
+    now = time.time()
+    artifact = ref['artifact']
+    newer_than = (_order_field(artifact), order) if order else None
+    if artifact in SUMMARY_ARTIFACTS:
+        set_fields = {f'{artifact}_{name}': value for name, value in fields.items() if value is not None}
+        set_fields['updated_at'] = now
+        if artifact == 'original':
+            # 원본이 있는 영상만 목록 인덱스(희소 GSI)에 올림
+            set_fields.update({'list_pk': LIST_PARTITION, 'listed_at': fields['modified'] or now})
+        return store.upsert(ref['video_id'], SUMMARY_ITEM, set_fields, newer_than=newer_than)
+    if artifact == 'clip':
+        set_fields = {f'clip_{name}': value for name, value in fields.items() if value is not None}
+        return store.upsert(ref['video_id'], CLIP_ITEM_PREFIX + ref['clip_key'], {**set_fields, 'updated_at': now},
+                            newer_than=newer_than)
+    if artifact == 'clip_thumbnail':
+        return store.upsert(ref['video_id'], CLIP_ITEM_PREFIX + ref['clip_key'],
+                            {'thumbnail_bucket': ref['bucket'], 'thumbnail_key': ref['key'], 'updated_at': now},
+                            newer_than=newer_than)
+    return True
+
+
+def remove_object(store, ref: Dict[str, str], order: Optional[str] = None) -> bool:
+    """
+    객체 삭제 반영. order가 있으면 필드만 지우고 순서값은 남김 (클립 레코드도 clip_key 없는 상태로 유지 → 목록에서 빠짐).
+    order가 이미 반영된 것보다 오래됐으면 무시하고 False
+    """
+    artifact = ref['artifact']
+    newer_than = (_order_field(artifact), order) if order else None
+    if artifact in SUMMARY_ARTIFACTS:
+        remove = [f'{artifact}_{name}' for name in OBJECT_FIELDS]
+        if artifact == 'original':
+            remove += ['list_pk', 'listed_at']
+        return store.upsert(ref['video_id'], SUMMARY_ITEM, {'updated_at': time.time()}, remove, newer_than=newer_than)
+    if artifact == 'clip':
+        if newer_than is None:
+            store.delete(ref['video_id'], CLIP_ITEM_PREFIX + ref['clip_key'])
+            return True
+        return store.upsert(ref['video_id'], CLIP_ITEM_PREFIX + ref['clip_key'], {'updated_at': time.time()},
+                            [f'clip_{name}' for name in OBJECT_FIELDS], newer_than=newer_than)
+    if artifact == 'clip_thumbnail':
+        return store.upsert(ref['video_id'], CLIP_ITEM_PREFIX + ref['clip_key'], {'updated_at': time.time()},
+                            ['thumbnail_bucket', 'thumbnail_key'], newer_than=newer_than)
+    return True
+
+
+def record_manifest(store, manifest: Dict[str, Any]):
+    """클립 매니페스트의 구간/길이를 클립 레코드에 반영 (클립 객체 이벤트와 순서 무관)"""
+    for clip in manifest.get('clips') or []:
+        ref = classify(clip.get('bucket') or INPUT_BUCKET, clip.get('key') or '')
+        if not ref or ref['artifact'] != 'clip':
+            continue
+        fields = {name: clip.get(name) for name in ('start', 'end', 'duration') if clip.get(name) is not None}
+        source = manifest.get('source') or {}
+        if source.get('key'):
+            fields['source_key'] = source['key']
+        if fields:
+            store.upsert(ref['video_id'], CLIP_ITEM_PREFIX + ref['clip_key'], fields)
+
+
+def apply_s3_event(store, event: Dict[str, Any], s3_client=None) -> Optional[Dict[str, str]]:
+    """
+    EventBridge S3 이벤트 (Object Created / Object Deleted) 1건 반영 → 분류 결과 (대상이 아니면 None).
+    이미 반영한 이벤트보다 오래된 이벤트면 반영하지 않고 결과에 "stale": True.
+    매니페스트는 s3_client로 읽어 클립 구간을 채움
+    """
+    detail = event.get('detail') or {}
+    bucket = (detail.get('bucket') or {}).get('name')
+    obj = detail.get('object') or {}
+    if not bucket or not obj.get('key'):
+        raise ValueError("S3 이벤트 형식이 아닙니다")
+    ref = classify(bucket, urllib.parse.unquote_plus(obj['key']))
+    if ref is None:
+        return None
+
+    order = event_order(event)
+    if event.get('detail-type') == 'Object Deleted':
+        if ref['artifact'] != 'manifest' and not remove_object(store, ref, order):
+            return {**ref, 'stale': True}
+        return ref
+
+    if ref['artifact'] == 'manifest':
+        if s3_client is not None:
+            body = s3_client.get_object(Bucket=bucket, Key=ref['key'])['Body'].read()
+            record_manifest(store, json.loads(body))
+        return ref
+    if not record_object(store, ref, size=obj.get('size'), etag=obj.get('etag'), modified=event.get('time'), order=order):
+        return {**ref, 'stale': True}
+    return ref
+
+
+# ---------- 조회 ----------
+
+def _artifact(item: Dict[str, Any], prefix: str) -> Optional[Dict[str, Any]]:
+    if not item.get(f'{prefix}_key'):
+        return None
+    return {
+        'bucket': item.get(f'{prefix}_bucket'),
+        'key': item[f'{prefix}_key'],
+        'size': item.get(f'{prefix}_size'),
+        'lastModified': item.get(f'{prefix}_modified')
+    }
+
+
+def video_status(summary: Dict[str, Any]) -> str:
+    if not summary.get('original_key'):
+        return 'DELETED'
+    if all(summary.get(f'{name}_key') for name in ('converted', 'transcript', 'thumbnail')):
+        return 'READY'
+    return 'PROCESSING'
+
+
+def _summary_record(video_id: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+    record = {'videoId': video_id}
+    for artifact, name in (('original', 'original'), ('thumbnail', 'thumbnail'), ('converted', 'converted'),
+                           ('keyframe_index', 'keyframeIndex'), ('transcript', 'transcript')):
+        record[name] = _artifact(summary, artifact)
+    record.update({'status': video_status(summary), 'updatedAt': summary.get('updated_at')})
+    return record
+
+
+def _clip_record(item: Dict[str, Any]) -> Dict[str, Any]:
+    clip = _artifact(item, 'clip')
+    clip.update({
+        'start': item.get('start'),
+        'end': item.get('end'),
+        'duration': item.get('duration'),
+        'thumbnail': {'bucket': item['thumbnail_bucket'], 'key': item['thumbnail_key']} if item.get('thumbnail_key') else None
+    })
+    return clip
+
+
+def get_video(store, video_id: str) -> Optional[Dict[str, Any]]:
+    """영상 레코드 1건 + 클립 목록 (파티션 하나 조회)"""
+    items = store.query_video(video_id)
+    if not items:
+        return None
+    summary = next((item for item in items if item.get('item') == SUMMARY_ITEM), {})
+    record = _summary_record(video_id, summary)
+    clips = [_clip_record(item) for item in items
+             if str(item.get('item', '')).startswith(CLIP_ITEM_PREFIX) and item.get('clip_key')]
+    record['clips'] = sorted(clips, key=lambda clip: (clip['start'] is None, clip['start'] or 0, clip['key']))
+    return record
+
+
+def list_videos(store, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """원본이 있는 영상 요약 (업로드 최신순, 인덱스에서 limit개). 클립은 get_video로"""
+    items, next_cursor = store.query_listed(limit, cursor)
+    return [_summary_record(item['video_id'], item) for item in items], next_cursor
+
+
+def backfill(store, s3_client, buckets=(INPUT_BUCKET, OUTPUT_BUCKET)) -> Dict[str, int]:
+    """버킷을 한 번 훑어 카탈로그를 채움 (초기 적재 / 로컬 SQLite 준비). 매니페스트는 마지막에"""
+    counts: Dict[str, int] = {}
+    manifests = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for bucket in buckets:
+        for page in paginator.paginate(Bucket=bucket):
+            for obj in page.get('Contents', []):
+                ref = classify(bucket, obj['Key'])
+                if ref is None:
+                    continue
+                counts[ref['artifact']] = counts.get(ref['artifact'], 0) + 1
+                if ref['artifact'] == 'manifest':
+                    manifests.append(ref)
+                else:
+                    record_object(store, ref, size=obj.get('Size'), etag=obj.get('ETag'), modified=obj.get('LastModified'))
+    for ref in manifests:
+        try:
+            body = s3_client.get_object(Bucket=ref['bucket'], Key=ref['key'])['Body'].read()
+            record_manifest(store, json.loads(body))
+        except Exception as e:
+            print(f"⚠️ 매니페스트 반영 실패 (무시): {ref['key']} - {e}")
+    return counts
+
+
+if __name__ == "__main__":
+    # 초기 적재: python video_catalog.py backfill [CATALOG_STORE]
+    import sys
+
+    import boto3
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'backfill':
+        print("usage: python video_catalog.py backfill [dynamodb:<테이블> | sqlite:<경로>]")
+        sys.exit(1)
+    target = build_store(sys.argv[2] if len(sys.argv) > 2 else os.getenv('CATALOG_STORE'))
+    if target is None:
+        print("❌ CATALOG_STORE가 필요합니다")
+        sys.exit(1)
+    started = time.time()
+    result = backfill(target, boto3.client('s3'))
+    print(f"✅ 카탈로그 적재 완료 ({time.time() - started:.1f}s): {result}")
@@ -1,12 +1,71 @@
 from flask import Flask, jsonify, request, make_response
-import boto3, logging
+import logging
+import math
 from botocore.exceptions import ClientError
-from botocore.config import Config
+
+from aws_clients import get_client
 
 app = Flask(__name__)
 
 ALLOWED_ORIGINS = {"https://www.videofinding.com"}  # 로드 밸런서 도메인
 
+BUCKET_NAME = "video-input-pipeline-20250724"
+REGION = "ap-northeast-2"
+
+# 멀티파트 업로드 (S3 제한: 파트 5MiB~5GiB, 최대 10,000개, 객체 최대 5TiB)
+MiB = 1024 * 1024
+DEFAULT_PART_SIZE = 16 * MiB        # 파트 크기 (파일이 크면 10,000개 안에 들어가도록 키움)
+MAX_PART_SIZE = 5 * 1024 * MiB
+MAX_PARTS = 10000
+MAX_OBJECT_SIZE = 5 * 1024 * 1024 * MiB
+PRESIGN_BATCH_LIMIT = 100           # presign 한 번에 발급할 파트 URL 수
+PART_URL_EXPIRES = 3600             # 파트 URL 유효 시간(초)
+
+
+def s3_client():
+    return get_client('s3', REGION, signature_version='s3v4')
+
+
+def part_size_for(size):
+    """파일 크기 → 파트 크기 (MiB 단위 올림, 파트 수 MAX_PARTS 이하)"""
+    if not size:
+        return DEFAULT_PART_SIZE
+    needed = math.ceil(math.ceil(size / MAX_PARTS) / MiB) * MiB
+    return min(MAX_PART_SIZE, max(DEFAULT_PART_SIZE, needed))
+
+
+def multipart_args(data):
+    """요청 JSON/쿼리 → (key, uploadId). 없으면 None"""
+    key = data.get('key')
+    upload_id = data.get('uploadId')
+    if not key or not upload_id:
+        return None
+    return key, upload_id
+
+
+def list_uploaded_parts(s3, key, upload_id):
+    """list_parts 전체 페이지 → [{"partNumber", "etag", "size"}]"""
+    parts = []
+    params = {"Bucket": BUCKET_NAME, "Key": key, "UploadId": upload_id, "MaxParts": 1000}
+    while True:
+        response = s3.list_parts(**params)
+        for part in response.get('Parts', []):
+            parts.append({"partNumber": part['PartNumber'], "etag": part['ETag'], "size": part['Size']})
+        if not response.get('IsTruncated'):
+            return parts
+        params['PartNumberMarker'] = response['NextPartNumberMarker']
+
+
+def multipart_error(e, action):
+    """ClientError → 응답. 이미 완료/중단된 uploadId면 404"""
+    code = e.response.get('Error', {}).get('Code')
+    if code == 'NoSuchUpload':
+        return jsonify({"error": "Upload not found (completed or aborted)"}), 404
+    if code in ('InvalidPart', 'InvalidPartOrder', 'EntityTooSmall'):
+        return jsonify({"error": f"Could not {action}: {code}"}), 400
+    logging.exception("Couldn't %s", action)
+    return jsonify({"error": f"Could not {action}"}), 500
+
 def add_cors_headers(resp):
     origin = request.headers.get("Origin")
     # 요청 Origin이 허용 목록에 있으면 그대로 에코, 아니면 지정값/와일드카드
@@ -41,12 +100,8 @@ def apply_cors(resp):
 @app.route('/api/storage/s3_input', methods=['POST'])
 def s3_upload():
     # 여기까지 왔다는 건 프리플라이트가 2xx로 통과했다는 뜻
-    s3 = boto3.client(
-        's3',
-        region_name='ap-northeast-2',
-        config=Config(signature_version='s3v4')
-    )
-    bucket = "video-input-pipeline-20250724"
+    s3 = s3_client()
+    bucket = BUCKET_NAME
     data = request.get_json(silent=True) or {}
     filename = data.get('filename')
     content_type = data.get('contentType')
@@ -65,6 +120,166 @@ def s3_upload():
         logging.exception("Couldn't generate presigned URL")
         return jsonify({"error": "Could not generate URL"}), 500
 
+# ===== 멀티파트 업로드 =====
+# initiate → presign(파트 URL 묶음) → 브라우저가 파트를 병렬 PUT → complete
+# 중간에 끊기면 parts로 이미 올라간 파트를 확인하고 나머지만 presign 받아 이어서 업로드, 포기하면 abort
+# complete는 initiate에 보낸 size(+ 받은 partCount)와 실제 올라간 파트를 맞춰 본 뒤에만 완성 (잘린 영상이 파이프라인에 들어가지 않게)
+# abort 없이 버려진 업로드의 파트는 계속 과금되므로 입력 버킷에 수명 주기 규칙 필요 (버킷은 이 저장소 밖에서 관리):
+#   aws s3api put-bucket-lifecycle-configuration --bucket video-input-pipeline-20250724 --lifecycle-configuration \
+#     '{"Rules": [{"ID": "abort-incomplete-multipart", "Status": "Enabled", "Filter": {},
+#                  "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 1}}]}'
+#   (기존 규칙이 있으면 get-bucket-lifecycle-configuration 결과에 이 규칙을 더해서 넣기 — put은 전체를 덮어씀)
+@app.route('/api/storage/multipart/initiate', methods=['POST'])
+def multipart_initiate():
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename')
+    content_type = data.get('contentType')
+    size = data.get('size')
+
+    if not filename or not content_type:
+        return jsonify({"error": "filename and contentType are required"}), 400
+    if size is not None and (not isinstance(size, int) or size < 0 or size > MAX_OBJECT_SIZE):
+        return jsonify({"error": f"size must be an integer between 0 and {MAX_OBJECT_SIZE}"}), 400
+
+    try:
+        response = s3_client().create_multipart_upload(Bucket=BUCKET_NAME, Key=filename, ContentType=content_type)
+    except ClientError as e:
+        return multipart_error(e, "initiate multipart upload")
+
+    part_size = part_size_for(size)
+    result = {"key": filename, "uploadId": response['UploadId'], "partSize": part_size}
+    if size is not None:
+        result["partCount"] = max(1, math.ceil(size / part_size))
+    return jsonify(result), 200
+
+
+@app.route('/api/storage/multipart/presign', methods=['POST'])
+def multipart_presign():
+    """{"key", "uploadId", "partNumbers": [1, 2, ...]} → 파트별 upload_part URL (서명만 하므로 S3 호출 없음)"""
+    data = request.get_json(silent=True) or {}
+    args = multipart_args(data)
+    part_numbers = data.get('partNumbers')
+
+    if args is None:
+        return jsonify({"error": "key and uploadId are required"}), 400
+    if (not isinstance(part_numbers, list) or not part_numbers
+            or not all(isinstance(n, int) and 1 <= n <= MAX_PARTS for n in part_numbers)):
+        return jsonify({"error": f"partNumbers must be a non-empty list of integers 1..{MAX_PARTS}"}), 400
+    if len(part_numbers) > PRESIGN_BATCH_LIMIT:
+        return jsonify({"error": f"at most {PRESIGN_BATCH_LIMIT} partNumbers per request"}), 400
+
+    key, upload_id = args
+    s3 = s3_client()
+    try:
+        urls = [{
+            "partNumber": n,
+            "url": s3.generate_presigned_url(
+                ClientMethod="upload_part",
+                Params={"Bucket": BUCKET_NAME, "Key": key, "UploadId": upload_id, "PartNumber": n},
+                ExpiresIn=PART_URL_EXPIRES
+            )
+        } for n in sorted(set(part_numbers))]
+    except ClientError as e:
+        return multipart_error(e, "generate part URLs")
+    return jsonify({"parts": urls, "expiresIn": PART_URL_EXPIRES}), 200
+
+
+@app.route('/api/storage/multipart/parts', methods=['GET'])
+def multipart_parts():
+    """?key=&uploadId= → 이미 올라간 파트 (이어 올리기용)"""
+    args = multipart_args(request.args)
+    if args is None:
+        return jsonify({"error": "key and uploadId are required"}), 400
+
+    key, upload_id = args
+    try:
+        parts = list_uploaded_parts(s3_client(), key, upload_id)
+    except ClientError as e:
+        return multipart_error(e, "list parts")
+    return jsonify({"key": key, "uploadId": upload_id, "parts": parts}), 200
+
+
+def verify_parts(uploaded, size, part_count=None, parts=None):
+    """
+    올라간 파트(list_parts) → 완성할 [{"PartNumber", "ETag"}]. 맞지 않으면 ValueError.
+    파트 번호가 1..N으로 빠짐없이, 크기 합이 size와 같아야 함 (part_count가 있으면 N도 같아야 함).
+    parts(브라우저가 받은 ETag)를 보냈으면 올라간 파트와 번호/ETag가 모두 같아야 함
+    """
+    by_number = {p['partNumber']: p for p in uploaded}
+    numbers = sorted(by_number)
+    if numbers != list(range(1, len(numbers) + 1)):
+        missing = sorted(set(range(1, (numbers[-1] if numbers else 0) + 1)) - set(numbers))
+        raise ValueError(f"missing parts: {missing[:20]}")
+    if part_count is not None and len(numbers) != part_count:
+        raise ValueError(f"expected {part_count} parts, found {len(numbers)}")
+    total = sum(p['size'] for p in uploaded)
+    if total != size:
+        raise ValueError(f"expected {size} bytes, found {total}")
+    if parts:
+        # 같은 번호를 다시 올렸으면 마지막 값
+        sent = {p['partNumber']: p['etag'] for p in parts}
+        if sorted(sent) != numbers or any(sent[n].strip('"') != by_number[n]['etag'].strip('"') for n in numbers):
+            raise ValueError("parts do not match the uploaded parts")
+    return [{"PartNumber": n, "ETag": by_number[n]['etag']} for n in numbers]
+
+
+@app.route('/api/storage/multipart/complete', methods=['POST'])
+def multipart_complete():
+    """
+    {"key", "uploadId", "size", "partCount"?, "parts"?: [{"partNumber", "etag"}]} → 객체 완성.
+    size(initiate에 보낸 파일 크기)는 필수: list_parts로 올라간 파트를 확인해 빠진 파트가 있거나 크기가 다르면 409
+    (이어 올리는 중이거나 중간에 끊긴 업로드를 잘린 영상으로 완성하지 않음).
+    parts를 생략하면 list_parts 결과로 완성 (브라우저가 ETag 헤더를 못 읽는 CORS 설정이어도 동작)
+    """
+    data = request.get_json(silent=True) or {}
+    args = multipart_args(data)
+    parts = data.get('parts')
+    size = data.get('size')
+    part_count = data.get('partCount')
+
+    if args is None:
+        return jsonify({"error": "key and uploadId are required"}), 400
+    if not isinstance(size, int) or isinstance(size, bool) or size < 0 or size > MAX_OBJECT_SIZE:
+        return jsonify({"error": f"size (bytes, as sent to initiate) must be an integer between 0 and {MAX_OBJECT_SIZE}"}), 400
+    if part_count is not None and (not isinstance(part_count, int) or not 1 <= part_count <= MAX_PARTS):
+        return jsonify({"error": f"partCount must be an integer 1..{MAX_PARTS}"}), 400
+    if parts is not None and (not isinstance(parts, list) or not all(
+            isinstance(p, dict) and isinstance(p.get('partNumber'), int) and p.get('etag') for p in parts)):
+        return jsonify({"error": "parts must be a list of {partNumber, etag}"}), 400
+
+    key, upload_id = args
+    s3 = s3_client()
+    try:
+        uploaded = list_uploaded_parts(s3, key, upload_id)
+        if not uploaded:
+            return jsonify({"error": "no uploaded parts"}), 400
+        try:
+            complete_parts = verify_parts(uploaded, size, part_count, parts)
+        except ValueError as e:
+            return jsonify({"error": f"upload is incomplete: {e}", "parts": uploaded}), 409
+        s3.complete_multipart_upload(
+            Bucket=BUCKET_NAME, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": complete_parts}
+        )
+    except ClientError as e:
+        return multipart_error(e, "complete multipart upload")
+    return jsonify({"key": key, "parts": len(complete_parts), "size": size}), 200
+
+
+@app.route('/api/storage/multipart/abort', methods=['POST', 'DELETE'])
+def multipart_abort():
+    data = request.get_json(silent=True) or {}
+    args = multipart_args(data)
+    if args is None:
+        return jsonify({"error": "key and uploadId are required"}), 400
+
+    key, upload_id = args
+    try:
+        s3_client().abort_multipart_upload(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id)
+    except ClientError as e:
+        return multipart_error(e, "abort multipart upload")
+    return jsonify({"key": key, "aborted": True}), 200
+
 # 헬스체크 API
 @app.route('/api/storage/health', methods=['GET'])
 def health_check():
@@ -0,0 +1,267 @@
+"""
+Flow 호출 admission control.
+
+요청이 몰려도 invoke_flow 동시 호출 수와 시작 속도를 Bedrock이 감당하는 수준으로 묶는다.
+  - 동시 실행 슬롯 max_concurrent개 (semaphore)
+  - 시작 속도: 초당 rate_per_second개, 최대 burst개까지 몰아서 (token bucket, 0이면 제한 없음)
+  - 슬롯/토큰이 없으면 대기열(max_queue)에서 최대 max_wait_seconds 대기. 대기열은 사용자별로 나눠
+    라운드로빈으로 꺼내므로 한 사용자가 한꺼번에 보낸 요청이 다른 사용자를 밀어내지 않음
+  - 사용자당 실행+대기 요청은 per_user_limit개까지
+받아줄 수 없으면 AdmissionRejected(reason, retry_after) → 호출 측에서 429 + Retry-After.
+throttled()가 불리면(스트림의 throttlingException 등) 남은 토큰을 비워 다음 시작을 늦춘다.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional
+
+REJECT_QUEUE_FULL = "QUEUE_FULL"
+REJECT_USER_LIMIT = "USER_LIMIT"
+REJECT_TIMEOUT = "QUEUE_TIMEOUT"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Flow 호출 거절 ({reason}), {retry_after}초 뒤 재시도")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("user", "granted")
+
+    def __init__(self, user: str):
+        self.user = user
+        self.granted = False
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, rate_per_second: float = 0, burst: int = 1, max_queue: int = 100,
+                 max_wait_seconds: float = 30, per_user_limit: int = 0, retry_after_seconds: int = 10,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_concurrent = max_concurrent
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.per_user_limit = per_user_limit          # 0이면 제한 없음
+        self.retry_after_seconds = retry_after_seconds
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._refilled_at = clock()
+        self._active = 0
+        self._active_by_user: Dict[str, int] = {}
+        self._waiting: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()   # 사용자 → 대기 티켓 (라운드로빈 순서)
+        self._waiting_count = 0
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "throttled": 0}
+
+    # ----- 토큰 버킷 -----
+    def _refill_locked(self):
+        now = self._clock()
+        if self.rate_per_second > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_second)
+        self._refilled_at = now
+
+    def _has_token_locked(self) -> bool:
+        return self.rate_per_second <= 0 or self._tokens >= 1
+
+    def _token_eta_locked(self, needed: float = 1) -> float:
+        """토큰 needed개가 찰 때까지 남은 시간 (초)"""
+        if self.rate_per_second <= 0:
+            return 0.0
+        return max(0.0, (needed - self._tokens) / self.rate_per_second)
+
+    def _take_locked(self, user: str):
+        if self.rate_per_second > 0:
+            self._tokens -= 1
+        self._active += 1
+        self._active_by_user[user] = self._active_by_user.get(user, 0) + 1
+        self._stats["admitted"] += 1
+
+    def _can_start_locked(self) -> bool:
+        return self._active < self.max_concurrent and self._has_token_locked()
+
+    def _dispatch_locked(self):
+        """빈 슬롯/토큰만큼 사용자 라운드로빈으로 대기 티켓을 허가"""
+        self._refill_locked()
+        granted = False
+        while self._waiting and self._can_start_locked():
+            user, tickets = next(iter(self._waiting.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                self._waiting.move_to_end(user)
+            else:
+                del self._waiting[user]
+            self._waiting_count -= 1
+            ticket.granted = True
+            self._take_locked(user)
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _user_load_locked(self, user: str) -> int:
+        return self._active_by_user.get(user, 0) + len(self._waiting.get(user, ()))
+
+    def _retry_after_locked(self, reason: str) -> int:
+        # 토큰이 모자라면 대기열이 빠질 시간, 슬롯이 모자라거나 사용자 한도면 설정값 (Flow 한 번이 수 분이라 추정이 어려움)
+        wait = self._token_eta_locked(self._waiting_count + 1)
+        if self._active >= self.max_concurrent or reason == REJECT_USER_LIMIT:
+            wait = max(wait, self.retry_after_seconds)
+        return max(1, int(math.ceil(wait)))
+
+    def _reject_locked(self, reason: str) -> AdmissionRejected:
+        self._stats["rejected"] += 1
+        return AdmissionRejected(reason, self._retry_after_locked(reason))
+
+    # ----- 공개 API -----
+    def acquire(self, user: str = "anonymous", timeout: Optional[float] = None):
+        """슬롯 하나 확보 (대기 포함). 실패하면 AdmissionRejected. 확보했으면 반드시 release(user)"""
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        with self._cond:
+            if self.per_user_limit and self._user_load_locked(user) >= self.per_user_limit:
+                raise self._reject_locked(REJECT_USER_LIMIT)
+            self._refill_locked()
+            if not self._waiting and self._can_start_locked():
+                self._take_locked(user)
+                return
+            if self._waiting_count >= self.max_queue:
+                raise self._reject_locked(REJECT_QUEUE_FULL)
+
+            ticket = _Ticket(user)
+            self._waiting.setdefault(user, deque()).append(ticket)
+            self._waiting_count += 1
+            self._stats["queued"] += 1
+            deadline = self._clock() + timeout
+            while not ticket.granted:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._waiting[user].remove(ticket)
+                    if not self._waiting[user]:
+                        del self._waiting[user]
+                    self._waiting_count -= 1
+                    raise self._reject_locked(REJECT_TIMEOUT)
+                # 슬롯이 비면 release()가 깨우고, 토큰만 모자라면 토큰이 찰 시점에 스스로 깨어나 dispatch
+                eta = self._token_eta_locked() if self._active < self.max_concurrent else remaining
+                self._cond.wait(min(remaining, max(eta, 0.01)))
+                if not ticket.granted:
+                    self._dispatch_locked()
+
+    def release(self, user: str = "anonymous"):
+        with self._cond:
+            self._active -= 1
+            left = self._active_by_user.get(user, 1) - 1
+            if left > 0:
+                self._active_by_user[user] = left
+            else:
+                self._active_by_user.pop(user, None)
+            self._dispatch_locked()
+
+    @contextmanager
+    def admit(self, user: str = "anonymous"):
+        self.acquire(user)
+        try:
+            yield
+        finally:
+            self.release(user)
+
+    def throttled(self):
+        """Bedrock이 throttle을 돌려줬을 때: 남은 토큰을 비워 다음 시작을 rate 간격으로 늦춤"""
+        with self._cond:
+            self._refill_locked()
+            self._tokens = min(self._tokens, 0.0)
+            self._stats["throttled"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {**self._stats, "active": self._active, "waiting": self._waiting_count,
+                    "users": len(set(self._active_by_user) | set(self._waiting))}
+
+
+if __name__ == "__main__":
+    # 테스트 하네스: 가짜 Flow 클라이언트로 몰린 요청을 admission 없이/있이 돌려 비교
+    #   python admission.py [사용자 수] [사용자당 요청 수]
+    import random
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    random.seed(7)
+
+    class FakeFlowClient:
+        """동시 호출이 capacity를 넘으면 throttlingException 이벤트를 돌려주는 invoke_flow"""
+
+        def __init__(self, capacity: int, duration: float):
+            self.capacity = capacity
+            self.duration = duration
+            self.lock = threading.Lock()
+            self.inflight = 0
+            self.peak = 0
+            self.throttles = 0
+
+        def invoke_flow(self, **kwargs):
+            with self.lock:
+                self.inflight += 1
+                self.peak = max(self.peak, self.inflight)
+                throttled = self.inflight > self.capacity
+                self.throttles += throttled
+            try:
+                if throttled:
+                    time.sleep(0.01)
+                    return {"responseStream": [{"throttlingException": {"message": "Rate exceeded"}}]}
+                time.sleep(self.duration * random.uniform(0.8, 1.2))
+                return {"responseStream": [{"flowCompletionEvent": {"completionReason": "SUCCESS"}}]}
+            finally:
+                with self.lock:
+                    self.inflight -= 1
+
+    def run(label: str, controller: Optional[AdmissionController], max_attempts: int):
+        client = FakeFlowClient(capacity=4, duration=0.2)
+        outcome = {"ok": 0, "throttled": 0, "429": 0}
+        finished: Dict[str, list] = {}
+        lock = threading.Lock()
+        started = time.monotonic()
+
+        def call(user: str):
+            # admission 없음 = 기존처럼 클라이언트 재시도(max_attempts)로 throttle을 버팀
+            try:
+                if controller:
+                    controller.acquire(user)
+            except AdmissionRejected:
+                with lock:
+                    outcome["429"] += 1
+                return
+            try:
+                for _ in range(max_attempts):
+                    events = client.invoke_flow(flowIdentifier="fake")["responseStream"]
+                    if "throttlingException" not in events[0]:
+                        with lock:
+                            outcome["ok"] += 1
+                            finished.setdefault(user, []).append(time.monotonic() - started)
+                        return
+                    if controller:
+                        controller.throttled()
+                with lock:
+                    outcome["throttled"] += 1
+            finally:
+                if controller:
+                    controller.release(user)
+
+        # user-0이 한꺼번에 많이 보내고 나머지는 조금씩
+        calls = [f"user-{u}" for u in range(users) for _ in range(per_user if u else per_user * 3)]
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            list(pool.map(call, calls))
+        elapsed = time.monotonic() - started
+        first_done = {user: round(min(times), 2) for user, times in sorted(finished.items())}
+        print(f"{label:10s} {elapsed:5.2f}s 성공 {outcome['ok']:3d} / throttle 실패 {outcome['throttled']:3d} / 429 "
+              f"{outcome['429']:3d} | Bedrock 호출 중 throttle {client.throttles:3d}, 최대 동시 {client.peak}")
+        print(f"{'':10s} 사용자별 첫 완료(초): {first_done}")
+        if controller:
+            print(f"{'':10s} {controller.stats()}")
+
+    run("baseline", None, max_attempts=5)
+    run("admission", AdmissionController(max_concurrent=4, rate_per_second=20, burst=4, max_queue=200,
+                                         max_wait_seconds=30, per_user_limit=16), max_attempts=1)
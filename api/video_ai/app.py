@@ -1,12 +1,24 @@
 import os
 import json
 import logging
-from typing import Any, Dict
-from flask import Flask, jsonify, request
+import queue
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-import boto3
-from botocore.config import Config
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+
+from admission import AdmissionController, AdmissionRejected
+from aws_clients import MAX_POOL_CONNECTIONS, get_client
+from flow_trace import TraceRecorder, build_trace_sink, should_trace
+from jobs import JobManager
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from output_parser import clips_from_manifests, find_manifest_uris, find_manifests, is_clip_manifest, parse_flow_output
+from result_cache import ResultCache, build_second_tier, make_cache_key
+from serialization import dumps_str, json_response
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
 logger = logging.getLogger("video-ai-backend")
@@ -18,24 +30,92 @@ FLOW_IDENTIFIER = os.getenv("FLOW_IDENTIFIER", "8FT99SKAF6")
 FLOW_ALIAS_IDENTIFIER = os.getenv("FLOW_ALIAS_IDENTIFIER", "P37AGF904J")
 FLOW_INPUT_NODE_NAME = os.getenv("FLOW_INPUT_NODE_NAME", "FlowInputNode")
 
+# 비동기 작업 (async 모드): Flow 호출을 백그라운드 스레드 풀에서 실행하고 job id만 즉시 반환
+FLOW_JOB_WORKERS = int(os.getenv("FLOW_JOB_WORKERS", "64"))
+FLOW_JOB_TTL_SECONDS = int(os.getenv("FLOW_JOB_TTL_SECONDS", "3600"))   # 끝난 작업 결과 보관 시간
+FLOW_JOB_MAX_RECORDS = int(os.getenv("FLOW_JOB_MAX_RECORDS", "1000"))
+
+# Flow 호출 admission control: 동시 실행/시작 속도를 Bedrock이 감당하는 수준으로 제한.
+# 넘치면 대기열에서 기다리고(사용자별 라운드로빈), 대기열이 차거나 오래 기다리면 429 + Retry-After
+FLOW_MAX_CONCURRENT = int(os.getenv("FLOW_MAX_CONCURRENT", "8"))
+FLOW_RATE_PER_SECOND = float(os.getenv("FLOW_RATE_PER_SECOND", "1"))        # 초당 시작 수, 0이면 제한 없음
+FLOW_RATE_BURST = int(os.getenv("FLOW_RATE_BURST", "4"))
+FLOW_QUEUE_MAX = int(os.getenv("FLOW_QUEUE_MAX", "32"))
+FLOW_QUEUE_WAIT_SECONDS = float(os.getenv("FLOW_QUEUE_WAIT_SECONDS", "30"))
+FLOW_MAX_PER_USER = int(os.getenv("FLOW_MAX_PER_USER", "3"))                 # 사용자당 실행+대기, 0이면 제한 없음
+FLOW_RETRY_AFTER_SECONDS = int(os.getenv("FLOW_RETRY_AFTER_SECONDS", "30"))
+# throttle은 admission이 흡수하므로 SDK 재시도는 짧게 (재시도가 throttle을 키우지 않게)
+FLOW_CLIENT_MAX_ATTEMPTS = int(os.getenv("FLOW_CLIENT_MAX_ATTEMPTS", "2"))
+
+# SSE 스트리밍: Flow 이벤트가 없는 동안(MediaConvert 대기 등) 이 간격으로 keep-alive 전송
+SSE_HEARTBEAT_SECONDS = 15
+
+# Flow trace: 요청에서 켜거나(?trace=true) 샘플링에 걸린 요청만 수집, 응답이 아닌 sink로 기록
+FLOW_TRACE_SAMPLE_RATE = float(os.getenv("FLOW_TRACE_SAMPLE_RATE", "0"))       # 0~1, 지정 없는 요청의 수집 비율
+FLOW_TRACE_MAX_BYTES = int(os.getenv("FLOW_TRACE_MAX_BYTES", str(256 * 1024)))  # 요청당 보관 상한 (넘으면 버림)
+FLOW_TRACE_SINK = os.getenv("FLOW_TRACE_SINK", "log")                         # log | file:<디렉터리> | none
+
+# 결과 캐시: 같은 질의 + 같은 원본(ETag)이면 Flow를 다시 돌리지 않고 저장된 결과 반환
+FLOW_CACHE_ENABLED = os.getenv("FLOW_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+# 결과의 videoUrl/videoUrls/output은 자르기 Lambda가 만든 프리사인 URL(PRESIGNED_EXPIRE_SEC=3600) →
+# 저장 기간은 만료까지 FLOW_CACHE_URL_MARGIN_SECONDS 이상 남는 범위로 제한
+CLIP_URL_EXPIRES_SECONDS = int(os.getenv("CLIP_URL_EXPIRES_SECONDS", "3600"))
+FLOW_CACHE_URL_MARGIN_SECONDS = int(os.getenv("FLOW_CACHE_URL_MARGIN_SECONDS", "900"))
+FLOW_CACHE_TTL_SECONDS = max(0, min(int(os.getenv("FLOW_CACHE_TTL_SECONDS", "2700")),
+                                    CLIP_URL_EXPIRES_SECONDS - FLOW_CACHE_URL_MARGIN_SECONDS))
+FLOW_CACHE_MAX_ENTRIES = int(os.getenv("FLOW_CACHE_MAX_ENTRIES", "500"))
+FLOW_CACHE_DIR = os.getenv("FLOW_CACHE_DIR")              # 2차 캐시: 로컬 디스크 (선택)
+FLOW_CACHE_REDIS_URL = os.getenv("FLOW_CACHE_REDIS_URL")  # 2차 캐시: Redis 호환 서버 (선택, redis 패키지 필요)
+
+# selectedVideo가 가리키는 원본 위치 (Pegasus Lambda와 같은 규칙)
+VIDEO_SOURCE_BUCKET = os.getenv("VIDEO_SOURCE_BUCKET", "video-input-pipeline-20250724")
+VIDEO_SOURCE_PREFIX = os.getenv("VIDEO_SOURCE_PREFIX", "original/")
+
 ALLOWED_ORIGINS = ["https://www.videofinding.com"]
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": ALLOWED_ORIGINS, "methods": ["GET", "POST", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization"]}})
 
+# 지표 (GET /api/video/metrics, Prometheus 텍스트 형식)
+metrics_registry = Registry()
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "video_ai_http_request_seconds", "HTTP 요청 처리 시간 (스트리밍은 응답 시작까지)", ("route", "method", "status"))
+FLOW_STAGE_SECONDS = metrics_registry.histogram(
+    "video_ai_flow_stage_seconds", "Flow 단계별 시간 (parse|setup|first_event|drain|extract)", ("stage",))
+FLOW_NODE_SECONDS = metrics_registry.histogram(
+    "video_ai_flow_node_seconds", "Flow 노드별 실행 시간 (trace를 수집한 요청만)", ("node",))
+FLOW_EVENTS = metrics_registry.counter(
+    "video_ai_flow_events_total", "Flow responseStream 이벤트 수 (종류별)", ("kind",))
+FLOW_ERRORS = metrics_registry.counter(
+    "video_ai_flow_errors_total", "Flow 오류 수 (스트림 오류 이벤트/AWS 오류 코드/예외 종류별)", ("type",))
+
+class FlowStreamError(RuntimeError):
+    """responseStream 안의 오류 이벤트 (event_type: throttlingException 등)"""
+    def __init__(self, event_type: str, message: str):
+        super().__init__(message)
+        self.event_type = event_type
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # 매칭된 라우트 규칙으로만 기록 (job id 등 경로 값으로 라벨이 늘어나지 않게)
+    started = g.get("request_started")
+    if started is not None and request.url_rule is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=request.url_rule.rule,
+                                     method=request.method, status=response.status_code)
+    return response
+
 def get_runtime():
-    return boto3.client("bedrock-agent-runtime", region_name=AWS_REGION, config=Config(read_timeout=600, connect_timeout=60, retries={"max_attempts": 5}))
+    # 프로세스 공용 클라이언트 (비동기 작업 스레드 수만큼 커넥션 풀 확보)
+    return get_client("bedrock-agent-runtime", AWS_REGION, read_timeout=600, connect_timeout=60, retries={"max_attempts": FLOW_CLIENT_MAX_ATTEMPTS},
+                      max_pool_connections=max(MAX_POOL_CONNECTIONS, FLOW_JOB_WORKERS))
 
 def get_buildtime():
     # Flows의 조회(존재/별칭 매핑 확인)는 build-time API(서비스명: bedrock-agent)를 사용
-    return boto3.client("bedrock-agent", region_name=AWS_REGION, config=Config(read_timeout=300, connect_timeout=30, retries={"max_attempts": 5}))
-
-def to_jsonable(obj: Any) -> Any:
-    try:
-        json.dumps(obj)
-        return obj
-    except TypeError:
-        return json.loads(json.dumps(obj, default=str))
+    return get_client("bedrock-agent", AWS_REGION, read_timeout=300, connect_timeout=30, retries={"max_attempts": 5})
 
 def parse_request(req) -> Dict[str, Any]:
     if req.method == "POST":
@@ -53,7 +133,102 @@ def parse_request(req) -> Dict[str, Any]:
         "prompt": req.args.get("prompt")
     }
 
-def invoke_flow(flow_identifier: str, flow_alias_identifier: str, flow_input_node_name: str, ai_prompt: Dict[str, Any]) -> Dict[str, Any]:
+def client_identity(req) -> str:
+    """admission 공정성 기준: Authorization 토큰(해시) → ALB X-Forwarded-For 첫 주소 → 접속 주소"""
+    token = req.headers.get("Authorization")
+    if token:
+        return "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+    forwarded = req.headers.get("X-Forwarded-For", "").split(",")[0].strip()
+    return "ip:" + (forwarded or req.remote_addr or "unknown")
+
+def wants_async(req) -> bool:
+    """?async=true, JSON {"async": true}, 또는 Prefer: respond-async 헤더"""
+    flag = req.args.get("async")
+    if flag is None and req.method == "POST":
+        flag = (req.get_json(silent=True) or {}).get("async")
+    if flag is None:
+        return "respond-async" in req.headers.get("Prefer", "")
+    return str(flag).lower() in ("true", "1", "yes")
+
+def wants_stream(req) -> bool:
+    """Accept: text/event-stream 또는 ?stream=true"""
+    if str(req.args.get("stream", "")).lower() in ("true", "1", "yes"):
+        return True
+    return "text/event-stream" in req.headers.get("Accept", "")
+
+def wants_trace(req) -> Optional[bool]:
+    """?trace=true|false, JSON {"trace": ...}, 또는 X-Flow-Trace 헤더. 지정이 없으면 None (샘플링)"""
+    flag = req.args.get("trace")
+    if flag is None and req.method == "POST":
+        flag = (req.get_json(silent=True) or {}).get("trace")
+    if flag is None:
+        flag = req.headers.get("X-Flow-Trace")
+    if flag is None:
+        return None
+    return str(flag).lower() in ("true", "1", "yes")
+
+def new_trace_recorder(requested: Optional[bool]) -> Optional[TraceRecorder]:
+    if not should_trace(requested, FLOW_TRACE_SAMPLE_RATE):
+        return None
+    return TraceRecorder(trace_sink, FLOW_TRACE_MAX_BYTES, node_seconds=FLOW_NODE_SECONDS)
+
+def wants_refresh(req) -> bool:
+    """?refresh=true 또는 Cache-Control: no-cache → 캐시 무시하고 다시 실행"""
+    if str(req.args.get("refresh", "")).lower() in ("true", "1", "yes"):
+        return True
+    return "no-cache" in req.headers.get("Cache-Control", "")
+
+def validate_prompt(ai_prompt: Dict[str, Any]):
+    """필수 값이 없으면 (응답, 400), 있으면 None"""
+    if not ai_prompt.get("prompt"):
+        return jsonify({"ok": False, "error": "MISSING_PROMPT"}), 400
+    if not ai_prompt.get("selectedVideo"):
+        return jsonify({"ok": False, "error": "MISSING_SELECTED_VIDEO"}), 400
+    return None
+
+def is_throttle(e: Exception) -> bool:
+    if isinstance(e, FlowStreamError):
+        return e.event_type == "throttlingException"
+    return isinstance(e, ClientError) and getattr(e, "response", {}).get("Error", {}).get("Code") == "ThrottlingException"
+
+def error_type(e: Exception) -> str:
+    if isinstance(e, AdmissionRejected):
+        return e.reason
+    if isinstance(e, FlowStreamError):
+        return e.event_type
+    if isinstance(e, ClientError):
+        return getattr(e, "response", {}).get("Error", {}).get("Code") or "ClientError"
+    return type(e).__name__
+
+def flow_error_response(e: Exception):
+    """Flow 호출 예외 → (응답 payload, HTTP status). 오류 지표와 throttle 피드백도 여기서 한 번 기록"""
+    FLOW_ERRORS.inc(type=error_type(e))
+    if isinstance(e, AdmissionRejected):
+        return {"ok": False, "error": "TOO_MANY_REQUESTS", "reason": e.reason, "retryAfter": e.retry_after, "detail": str(e)}, 429
+    if is_throttle(e):
+        flow_admission.throttled()
+        return {"ok": False, "error": "THROTTLED", "retryAfter": FLOW_RETRY_AFTER_SECONDS, "detail": str(e)}, 429
+    if isinstance(e, ClientError):
+        code = getattr(e, "response", {}).get("Error", {}).get("Code")
+        msg = str(e)
+        if code and "ResourceNotFoundException" in code:
+            return {"ok": False, "error": "RESOURCE_NOT_FOUND", "detail": msg}, 404
+        return {"ok": False, "error": "CLIENT_ERROR", "detail": msg}, 500
+    return {"ok": False, "error": "UNEXPECTED_ERROR", "detail": str(e)}, 500
+
+def flow_error_json(e: Exception) -> Response:
+    """flow_error_response → JSON 응답 (429면 Retry-After 헤더)"""
+    payload, status = flow_error_response(e)
+    headers = {"Retry-After": str(payload["retryAfter"])} if status == 429 else None
+    return json_response(payload, status, headers)
+
+def iter_flow_events(flow_identifier: str, flow_alias_identifier: str, flow_input_node_name: str, ai_prompt: Dict[str, Any],
+                     enable_trace: bool = False):
+    """
+    Flow를 호출하고 responseStream 이벤트를 도착하는 대로 (종류, 내용)으로 넘김.
+    종류: start({"executionId"}) | trace(enable_trace일 때만, 변환 없이 원본) | output | completion | input_required.
+    오류 이벤트는 예외
+    """
     client = get_runtime()
     logger.info("[InvokeFlow] flow=%s alias=%s node=%s", flow_identifier, flow_alias_identifier, flow_input_node_name)
 
@@ -61,10 +236,11 @@ def invoke_flow(flow_identifier: str, flow_alias_identifier: str, flow_input_nod
     ai_prompt_string = json.dumps(ai_prompt, ensure_ascii=False)
     logger.info("[InvokeFlow] input data: %s", ai_prompt_string)
 
+    started = time.perf_counter()
     resp = client.invoke_flow(
         flowIdentifier=flow_identifier,
         flowAliasIdentifier=flow_alias_identifier,
-        enableTrace=True,
+        enableTrace=enable_trace,
         inputs=[{
             "content": {"document": ai_prompt_string},  # OBJECT → STRING으로 변경
             "nodeName": flow_input_node_name,
@@ -72,188 +248,116 @@ def invoke_flow(flow_identifier: str, flow_alias_identifier: str, flow_input_nod
         }]
         # modelPerformanceConfiguration 제거 - ap-northeast-2에서 지원하지 않음
     )
+    FLOW_STAGE_SECONDS.observe(time.perf_counter() - started, stage="setup")
 
-    result = {"ok": True, "executionId": resp.get("executionId"), "outputs": [], "completionReason": None, "trace": []}
     stream = resp.get("responseStream")
     if stream is None:
         raise RuntimeError("responseStream 없음 — Flow 호출 실패")
+    yield "start", {"executionId": resp.get("executionId")}
 
+    first_event_at = None
     for event in stream:
+        if first_event_at is None:
+            first_event_at = time.perf_counter()
+            FLOW_STAGE_SECONDS.observe(first_event_at - started, stage="first_event")
+        FLOW_EVENTS.inc(kind=next(iter(event), "unknown"))
         if "flowOutputEvent" in event:
             doc = event["flowOutputEvent"]["content"].get("document")
-            result["outputs"].append(to_jsonable(doc))
+            yield "output", doc
         elif "flowCompletionEvent" in event:
-            result["completionReason"] = event["flowCompletionEvent"].get("completionReason")
+            yield "completion", event["flowCompletionEvent"].get("completionReason")
         elif "flowMultiTurnInputRequestEvent" in event:
             req_doc = event["flowMultiTurnInputRequestEvent"]["content"].get("document")
-            return {"ok": False, "error": "INPUT_REQUIRED", "requestedInput": to_jsonable(req_doc), "executionId": result["executionId"]}
+            yield "input_required", req_doc
+            return
         elif "flowTraceEvent" in event:
-            result["trace"].append(to_jsonable(event["flowTraceEvent"]["trace"]))
+            yield "trace", event["flowTraceEvent"]["trace"]
         elif "validationException" in event:
-            raise RuntimeError(f"ValidationException: {event['validationException'].get('message')}")
+            raise FlowStreamError("validationException", f"ValidationException: {event['validationException'].get('message')}")
         elif "resourceNotFoundException" in event:
-            raise RuntimeError(f"ResourceNotFound: {event['resourceNotFoundException']}")
+            raise FlowStreamError("resourceNotFoundException", f"ResourceNotFound: {event['resourceNotFoundException']}")
         elif "throttlingException" in event:
-            raise RuntimeError(f"Throttling: {event['throttlingException']}")
+            raise FlowStreamError("throttlingException", f"Throttling: {event['throttlingException']}")
         elif "accessDeniedException" in event:
-            raise RuntimeError(f"AccessDenied: {event['accessDeniedException']}")
+            raise FlowStreamError("accessDeniedException", f"AccessDenied: {event['accessDeniedException']}")
         elif "badGatewayException" in event:
-            raise RuntimeError(f"BadGateway: {event['badGatewayException']}")
+            raise FlowStreamError("badGatewayException", f"BadGateway: {event['badGatewayException']}")
         elif "internalServerException" in event:
-            raise RuntimeError(f"InternalServer: {event['internalServerException']}")
+            raise FlowStreamError("internalServerException", f"InternalServer: {event['internalServerException']}")
+    FLOW_STAGE_SECONDS.observe(time.perf_counter() - (first_event_at or started), stage="drain")
+
+def invoke_flow(flow_identifier: str, flow_alias_identifier: str, flow_input_node_name: str, ai_prompt: Dict[str, Any],
+                trace_recorder: Optional[TraceRecorder] = None) -> Dict[str, Any]:
+    """trace_recorder가 있을 때만 trace를 받아 기록 (응답 payload에는 넣지 않음)"""
+    result = {"ok": True, "executionId": None, "outputs": [], "completionReason": None}
+    events = iter_flow_events(flow_identifier, flow_alias_identifier, flow_input_node_name, ai_prompt,
+                              enable_trace=trace_recorder is not None)
+    try:
+        for kind, content in events:
+            if kind == "start":
+                result["executionId"] = content["executionId"]
+                if trace_recorder:
+                    trace_recorder.execution_id = content["executionId"]
+            elif kind == "output":
+                result["outputs"].append(content)
+            elif kind == "completion":
+                result["completionReason"] = content
+            elif kind == "trace" and trace_recorder:
+                trace_recorder.add(content)
+            elif kind == "input_required":
+                return {"ok": False, "error": "INPUT_REQUIRED", "requestedInput": content, "executionId": result["executionId"]}
+    finally:
+        if trace_recorder:
+            trace_recorder.flush()
+    return build_flow_result(result["executionId"], result["outputs"], result["completionReason"])
+
+def load_clip_manifest(uri: str) -> Optional[Dict[str, Any]]:
+    """S3의 클립 매니페스트 (없거나 형식이 다르면 None)"""
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    try:
+        body = get_client("s3").get_object(Bucket=bucket, Key=key)["Body"].read()
+        manifest = json.loads(body)
+    except (ClientError, ValueError) as e:
+        logger.warning("clip manifest 읽기 실패 %s: %s", uri, e)
+        return None
+    return manifest if is_clip_manifest(manifest) else None
 
+def extract_clips(output: Any):
+    """클립 매니페스트 블록 → (블록 없이 URI만 있으면) S3 매니페스트 → 출력 문장에서 추출 순"""
+    manifests = find_manifests(output)
+    if not manifests:
+        manifests = [m for m in (load_clip_manifest(uri) for uri in find_manifest_uris(output)) if m]
+    if manifests:
+        return clips_from_manifests(manifests)
+    logger.warning("clip manifest 없음 → 출력 문장에서 URL/파일명 추출")
+    return parse_flow_output(output)
+
+def build_flow_result(execution_id, outputs, completion_reason) -> Dict[str, Any]:
+    """Flow 출력(마지막 output)에서 영상/썸네일 URL을 뽑아 응답 payload 생성"""
+    result = {"executionId": execution_id, "outputs": outputs, "completionReason": completion_reason}
     if not result["outputs"]:
         raise RuntimeError("FlowOutput 비어 있음 — Output 노드 연결/표현식/노드 이름 점검")
 
-    # Flow 출력에서 S3 URL 추출
+    # Flow 출력에서 클립(영상/CloudFront/썸네일 URL) 추출 — 등장 순서 유지, 파일명 기준 중복 제거
     last_output = result["outputs"][-1]
-    video_url = None
-    video_filename = None
-    cloudfront_url = None
-    thumbnail_url = None
-    
-    # JSON 객체인 경우 처리
-    if isinstance(last_output, dict):
-        logger.info(f"Processing JSON output: {last_output}")
-        
-        # cut_video 객체에서 정보 추출
-        if "cut_video" in last_output:
-            cut_video = last_output["cut_video"]
-            video_url = cut_video.get("video_url")
-            video_filename = cut_video.get("filename")
-            
-            if video_filename:
-                # CloudFront URL 생성
-                cloudfront_url = f"https://d1nmrhn4eusal2.cloudfront.net/{video_filename}"
-                
-                # 썸네일 파일명 생성 (.mp4 → .jpg)
-                thumbnail_filename = video_filename.replace('.mp4', '.jpg')
-                thumbnail_url = f"https://d3il8axvt9p9ix.cloudfront.net/{thumbnail_filename}"
-                
-                logger.info(f"Extracted from JSON - filename: {video_filename}")
-                logger.info(f"Generated CloudFront URL: {cloudfront_url}")
-                logger.info(f"Generated thumbnail URL: {thumbnail_url}")
-    
-    # 문자열인 경우 기존 로직 사용
-    elif isinstance(last_output, str):
-        logger.info(f"Processing string output: {last_output}")
-        
-        # URL 패턴 찾기 - S3 URL과 프리사인 URL 모두 지원
-        import re
-        # S3 URL 패턴 (쿼리 파라미터 없음)
-        s3_url_pattern = r'https://[^\s\)]+\.s3\.amazonaws\.com/[^\s\)]+\.mp4'
-        # 프리사인 URL 패턴 (쿼리 파라미터 있음) - 더 정확한 패턴
-        presigned_url_pattern = r'https://[^\s\)]+\.mp4\?[^\)\s]+'
-        # 마크다운 링크 패턴 [텍스트](URL)
-        markdown_link_pattern = r'\[[^\]]+\]\(([^)]+)\)'
-        
-        # 여러 비디오 URL 추출
-        video_urls = []
-        video_filenames = []
-        cloudfront_urls = []
-        thumbnail_urls = []
-        
-        # 마크다운 링크에서 URL 추출
-        markdown_links = re.findall(markdown_link_pattern, last_output)
-        logger.info(f"Found markdown links: {markdown_links}")
-        
-        # 마크다운 링크에서 프리사인 URL 찾기
-        for link in markdown_links:
-            if '.mp4?' in link and 's3.amazonaws.com' in link:
-                video_urls.append(link)
-                logger.info(f"Found presigned URL from markdown: {link}")
-        
-        # S3 URL 찾기
-        s3_urls = re.findall(s3_url_pattern, last_output)
-        presigned_urls = re.findall(presigned_url_pattern, last_output)
-        
-        logger.info(f"Found S3 URLs: {s3_urls}")
-        logger.info(f"Found presigned URLs: {presigned_urls}")
-        
-        # 중복 제거하면서 모든 URL 수집
-        all_urls = list(set(video_urls + s3_urls + presigned_urls))
-        logger.info(f"Total unique URLs found: {len(all_urls)}")
-        
-        # 각 URL에서 파일명 추출하고 CloudFront URL 생성
-        for video_url in all_urls:
-            # URL에서 파일명 추출 (확장자 포함)
-            url_parts = video_url.split('/')
-            video_filename = None
-            for part in reversed(url_parts):
-                if part.endswith('.mp4'):
-                    video_filename = part
-                    break
-            
-            if not video_filename:
-                # 기존 정규식 방법 시도
-                filename_pattern = r'/([^/]+\.mp4)(?:\?|$)'
-                filename_match = re.search(filename_pattern, video_url)
-                if filename_match:
-                    video_filename = filename_match.group(1)
-            
-            if video_filename:
-                # CloudFront URL 생성
-                cloudfront_url = f"https://d1nmrhn4eusal2.cloudfront.net/{video_filename}"
-                
-                # 썸네일 파일명 생성 (.mp4 → .jpg)
-                thumbnail_filename = video_filename.replace('.mp4', '.jpg')
-                thumbnail_url = f"https://d3il8axvt9p9ix.cloudfront.net/{thumbnail_filename}"
-                
-                video_filenames.append(video_filename)
-                cloudfront_urls.append(cloudfront_url)
-                thumbnail_urls.append(thumbnail_url)
-                
-                logger.info(f"Generated CloudFront URL: {cloudfront_url}")
-                logger.info(f"Generated thumbnail URL: {thumbnail_url}")
-            else:
-                logger.warning(f"Could not extract filename from URL: {video_url}")
-        
-        # URL이 없는 경우 텍스트에서 파일명 추출 시도
-        if len(all_urls) == 0:
-            logger.info("No URLs found, attempting to extract filenames from text")
-            
-            # 파일명 패턴 찾기 (예: soccer_0s-34s.mp4, soccer_40s-72s.mp4 등)
-            # 여러 패턴을 시도
-            filename_patterns = [
-                r'(\w+_\d+s-\d+s_short\.mp4)',  # soccer_15s-410s_short.mp4
-                r'(\w+_\d+s-\d+s\.mp4)',  # soccer_0s-34s.mp4
-                r'(\w+_\d+-\d+\.mp4)',    # soccer_0-34.mp4
-                r'(\w+_\d+s-\d+\.mp4)',   # soccer_0s-34.mp4
-                r'(\w+_\d+-\d+s\.mp4)',   # soccer_0-34s.mp4
-            ]
-            
-            found_filenames = []
-            for pattern in filename_patterns:
-                matches = re.findall(pattern, last_output)
-                found_filenames.extend(matches)
-                if matches:
-                    logger.info(f"Found filenames with pattern {pattern}: {matches}")
-            
-            # 중복 제거
-            found_filenames = list(set(found_filenames))
-            logger.info(f"Total unique filenames found: {found_filenames}")
-            
-            for filename in found_filenames:
-                # CloudFront URL 생성
-                cloudfront_url = f"https://d1nmrhn4eusal2.cloudfront.net/{filename}"
-                
-                # 썸네일 파일명 생성 (.mp4 → .jpg)
-                thumbnail_filename = filename.replace('.mp4', '.jpg')
-                thumbnail_url = f"https://d3il8axvt9p9ix.cloudfront.net/{thumbnail_filename}"
-                
-                video_filenames.append(filename)
-                cloudfront_urls.append(cloudfront_url)
-                thumbnail_urls.append(thumbnail_url)
-                
-                logger.info(f"Generated CloudFront URL from filename: {cloudfront_url}")
-                logger.info(f"Generated thumbnail URL from filename: {thumbnail_url}")
-        
-        # 첫 번째 비디오 정보 (하위 호환성)
-        video_url = all_urls[0] if all_urls else None
-        video_filename = video_filenames[0] if video_filenames else None
-        cloudfront_url = cloudfront_urls[0] if cloudfront_urls else None
-        thumbnail_url = thumbnail_urls[0] if thumbnail_urls else None
-    
+    with FLOW_STAGE_SECONDS.time(stage="extract"):
+        clips = extract_clips(last_output)
+    logger.info("Extracted %d clip(s) from %s output", len(clips), type(last_output).__name__)
+
+    video_urls = [clip["sourceUrl"] for clip in clips if clip["sourceUrl"]]
+    # 파일명/CloudFront/썸네일 배열은 같은 인덱스 = 같은 클립 (썸네일이 없는 클립은 None)
+    named_clips = [clip for clip in clips if clip["filename"]]
+    video_filenames = [clip["filename"] for clip in named_clips]
+    cloudfront_urls = [clip["cloudfrontUrl"] for clip in named_clips]
+    thumbnail_urls = [clip["thumbnailUrl"] for clip in named_clips]
+
+    # 첫 번째 비디오 정보 (하위 호환성)
+    first_clip = clips[0] if clips else {}
+    video_url = first_clip.get("sourceUrl")
+    video_filename = first_clip.get("filename")
+    cloudfront_url = first_clip.get("cloudfrontUrl")
+    thumbnail_url = first_clip.get("thumbnailUrl")
+
     # URL 유효성 검증을 위한 로깅 추가
     logger.info(f"Final videoUrl: {video_url}")
     logger.info(f"Final cloudfrontUrl: {cloudfront_url}")
@@ -281,51 +385,352 @@ def invoke_flow(flow_identifier: str, flow_alias_identifier: str, flow_input_nod
         "cloudfrontUrl": cloudfront_url,  # 첫 번째 CloudFront URL (하위 호환성)
         "finalVideoUrl": final_video_url,  # 첫 번째 최종 비디오 URL (하위 호환성)
         "thumbnailUrl": thumbnail_url,  # 첫 번째 썸네일 URL (하위 호환성)
-        "videoUrls": all_urls,  # 모든 비디오 URL 배열
+        "videoUrls": video_urls,  # 모든 비디오 URL 배열
         "videoFilenames": video_filenames,  # 모든 비디오 파일명 배열
         "cloudfrontUrls": cloudfront_urls,  # 모든 CloudFront URL 배열
         "thumbnailUrls": thumbnail_urls,  # 모든 썸네일 URL 배열
+        "clips": clips,  # 클립별 {filename, sourceUrl, cloudfrontUrl, thumbnailUrl} (등장 순서)
         "allOutputs": result["outputs"],
         "completionReason": result.get("completionReason") or "UNKNOWN",
     }
 
-@app.route("/api/video/video_ai", methods=["GET", "POST", "OPTIONS"])
-def video_ai():
+def resolve_source_object(selected_video: str) -> Tuple[str, str]:
+    """selectedVideo(s3 URI / URL / 파일명) → (bucket, key)"""
+    value = str(selected_video).strip()
+    if value.startswith("s3://"):
+        bucket, _, key = value[len("s3://"):].partition("/")
+        return bucket, key
+    if value.startswith(("http://", "https://")):
+        value = urlparse(value).path.lstrip("/")
+    if VIDEO_SOURCE_PREFIX and not value.startswith(VIDEO_SOURCE_PREFIX):
+        value = f"{VIDEO_SOURCE_PREFIX}{value}"
+    return VIDEO_SOURCE_BUCKET, value
+
+def source_etag(selected_video: str) -> Optional[str]:
+    """원본 영상 ETag (HEAD 1회). 확인 못 하면 None → 캐시 사용 안 함"""
+    bucket, key = resolve_source_object(selected_video)
     try:
-        if request.method == "OPTIONS":
-            return jsonify({"ok": True})
-        ai_prompt = parse_request(request)
-        logger.info("=== /api/video/video_ai === %s", ai_prompt)
+        return get_client("s3").head_object(Bucket=bucket, Key=key)["ETag"]
+    except (ClientError, BotoCoreError) as e:
+        logger.info("[Cache] 원본 ETag 확인 실패 → 캐시 건너뜀 s3://%s/%s: %s", bucket, key, e)
+        return None
 
-        if not ai_prompt.get("prompt"):
-            return jsonify({"ok": False, "error": "MISSING_PROMPT"}), 400
-        if not ai_prompt.get("selectedVideo"):
-            return jsonify({"ok": False, "error": "MISSING_SELECTED_VIDEO"}), 400
+def clip_object(clip: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """클립의 S3 위치: 매니페스트의 bucket/key, 없으면 S3 (프리사인) URL에서. 알 수 없으면 None"""
+    if clip.get("bucket") and clip.get("key"):
+        return clip["bucket"], clip["key"]
+    url = urlparse(clip.get("sourceUrl") or "")
+    host = url.hostname or ""
+    if ".s3." not in host or not host.endswith(".amazonaws.com"):
+        return None
+    return host.split(".s3.", 1)[0], unquote(url.path.lstrip("/"))
 
+def cached_clips_exist(payload: Dict[str, Any]) -> bool:
+    """캐시된 결과의 클립이 아직 S3에 있는지 (삭제 API로 지운 클립을 가리키는 결과는 쓰지 않음)"""
+    s3 = get_client("s3")
+    for clip in payload.get("clips") or []:
+        location = clip_object(clip)
+        if location is None:
+            continue
+        bucket, key = location
+        try:
+            s3.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                logger.info("[Cache] 클립 없음 s3://%s/%s → 결과 무효", bucket, key)
+                return False
+            logger.warning("[Cache] 클립 확인 실패 s3://%s/%s: %s", bucket, key, e)
+    return True
+
+def flow_cache_key(ai_prompt: Dict[str, Any]) -> Optional[str]:
+    """정규화된 (영상, 유형, 개수, 프롬프트) + Flow/Alias + 원본 ETag. 캐시를 쓸 수 없으면 None"""
+    if flow_cache is None:
+        return None
+    etag = source_etag(ai_prompt["selectedVideo"])
+    if etag is None:
+        return None
+    count = str(ai_prompt.get("selectedCount") or "").strip()
+    try:
+        count = str(int(float(count)))
+    except ValueError:
+        pass
+    return make_cache_key(
+        FLOW_IDENTIFIER,
+        FLOW_ALIAS_IDENTIFIER,
+        str(ai_prompt.get("selectedVideo") or "").strip(),
+        str(ai_prompt.get("selectedType") or "").strip(),
+        count,
+        " ".join(str(ai_prompt.get("prompt") or "").split()),
+        etag
+    )
+
+def run_flow(ai_prompt: Dict[str, Any], refresh: bool = False, trace: Optional[bool] = None,
+             user: str = "anonymous") -> Dict[str, Any]:
+    """
+    캐시 적중이면 저장된 결과, 아니면 Flow 실행 (같은 질의가 진행 중이면 그 결과를 기다려 공유).
+    trace를 명시적으로 요청하면 캐시를 건너뛰고 실행. 응답에는 trace 요약만 붙음.
+    실제 Flow 호출만 admission을 거침 (캐시 적중/같은 질의 합류는 슬롯을 쓰지 않음)
+    """
+    recorder = new_trace_recorder(trace)
+    refresh = refresh or bool(trace)
+    key = flow_cache_key(ai_prompt)
+    if key is None:
+        payload, hit, joined = invoke_configured_flow(ai_prompt, recorder, user), False, False
+    else:
+        payload, hit, joined = flow_cache.get_or_compute(
+            key, lambda: invoke_configured_flow(ai_prompt, recorder, user), refresh=refresh
+        )
+        if hit:
+            logger.info("[Cache] hit %s", key[:12])
+        elif joined:
+            logger.info("[Cache] 진행 중인 같은 질의에 합류 %s", key[:12])
+    result = {**payload, "cached": hit, "joined": joined}
+    if recorder and not hit and not joined:
+        result["trace"] = recorder.summary()
+    return result
+
+def invoke_configured_flow(ai_prompt: Dict[str, Any], trace_recorder: Optional[TraceRecorder] = None,
+                           user: str = "anonymous") -> Dict[str, Any]:
+    with flow_admission.admit(user):
         payload = invoke_flow(
             flow_identifier=FLOW_IDENTIFIER,
             flow_alias_identifier=FLOW_ALIAS_IDENTIFIER,
             flow_input_node_name=FLOW_INPUT_NODE_NAME,
-            ai_prompt=ai_prompt
+            ai_prompt=ai_prompt,
+            trace_recorder=trace_recorder
         )
-        return jsonify(to_jsonable(payload)), 200
+    return payload
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {dumps_str(data)}\n\n"
+
+def stream_flow_events(ai_prompt: Dict[str, Any], refresh: bool = False, trace: Optional[bool] = None,
+                       user: str = "anonymous"):
+    """
+    Flow 이벤트를 도착하는 대로 SSE로 전달: start → output/completion ... → result(URL 추출) 또는 error.
+    Flow 호출은 별도 스레드에서 돌리고 큐로 받아, 이벤트가 없는 동안에도 heartbeat로 연결을 유지한다.
+    캐시 적중이면 Flow 없이 result 하나만 보낸다. 같은 질의가 이미 실행 중이면(동기/비동기/스트림 어느 쪽이든)
+    그 실행에 합류해 heartbeat만 보내다가 result 하나를 받고, 직접 실행한 결과는 캐시에 저장한다.
+    trace 이벤트는 trace를 명시적으로 요청한 경우에만 보낸다 (샘플링된 trace는 sink에만 기록, 이 경우엔 합류하지 않음).
+    admission 대기 중에도 heartbeat는 나가고, 거절되면 error 이벤트(status 429, retryAfter)
+    """
+    recorder = new_trace_recorder(trace)
+    send_trace = bool(trace)
+    try:
+        cache_key = flow_cache_key(ai_prompt)
+    except Exception:
+        logger.exception("[Stream] 캐시 키 생성 실패")
+        cache_key = None
+    flight = None
+    if cache_key and not send_trace:
+        if not refresh:
+            cached = flow_cache.get(cache_key)
+            if cached is not None:
+                yield sse_event("result", {**cached, "cached": True, "joined": False})
+                return
+        flight, leader = flow_cache.join(cache_key)
+        if not leader:
+            logger.info("[Stream] 진행 중인 같은 질의에 합류 %s", cache_key[:12])
+            while not flight.done.wait(SSE_HEARTBEAT_SECONDS):
+                yield ": keep-alive\n\n"
+            if flight.error is not None:
+                payload, status = flow_error_response(flight.error)
+                yield sse_event("error", {**payload, "status": status})
+            elif flight.value.get("ok"):
+                yield sse_event("result", {**flight.value, "cached": False, "joined": True})
+            else:
+                yield sse_event("input_required", flight.value)
+            return
+
+    events = queue.Queue()
+
+    def pump():
+        # 결과 조립과 flight 마무리까지 이 스레드에서 → 스트림 연결이 끊겨도 합류한 요청은 결과를 받음
+        execution_id, outputs, completion_reason = None, [], None
+        outcome, error = None, None
+        try:
+            with flow_admission.admit(user):
+                for kind, content in iter_flow_events(FLOW_IDENTIFIER, FLOW_ALIAS_IDENTIFIER, FLOW_INPUT_NODE_NAME, ai_prompt,
+                                                      enable_trace=recorder is not None):
+                    if kind == "start":
+                        execution_id = content["executionId"]
+                    elif kind == "output":
+                        outputs.append(content)
+                    elif kind == "completion":
+                        completion_reason = content
+                    elif kind == "input_required":
+                        outcome = {"ok": False, "error": "INPUT_REQUIRED", "requestedInput": content, "executionId": execution_id}
+                    events.put((kind, content))
+            if outcome is None:
+                outcome = build_flow_result(execution_id, outputs, completion_reason)
+        except AdmissionRejected as e:
+            logger.warning("[Stream] %s", e)
+            error = e
+        except Exception as e:
+            logger.exception("[Stream] Flow 오류")
+            error = e
+        finally:
+            if error is None and outcome is None:
+                error = RuntimeError("Flow 스트림 중단")
+            if flight is not None:
+                flow_cache.finish(cache_key, flight, outcome, error)
+            elif cache_key and error is None:
+                flow_cache.set(cache_key, outcome)
+            events.put(("error", error) if error is not None else ("outcome", outcome))
+            events.put(None)
+
+    threading.Thread(target=pump, name="flow-stream", daemon=True).start()
+
+    try:
+        while True:
+            try:
+                item = events.get(timeout=SSE_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            kind, content = item
+            if kind == "error":
+                payload, status = flow_error_response(content)
+                yield sse_event("error", {**payload, "status": status})
+                return
+            if kind == "input_required":
+                # 응답은 pump가 만든 outcome으로 보냄
+                continue
+            if kind == "outcome":
+                if not content.get("ok"):
+                    yield sse_event("input_required", content)
+                    return
+                result = {**content, "cached": False, "joined": False}
+                if recorder:
+                    result["trace"] = recorder.summary()
+                yield sse_event("result", result)
+                return
+            if kind == "trace":
+                # 직렬화는 recorder에서 한 번만, 상한을 넘은 trace는 보내지 않음
+                line = recorder.add(content) if recorder else None
+                if send_trace and line:
+                    yield f"event: trace\ndata: {line}\n\n"
+                continue
+            if kind == "start" and recorder:
+                recorder.execution_id = content["executionId"]
+            yield sse_event(kind, content)
+    finally:
+        if recorder:
+            recorder.flush()
+
+def stream_response(ai_prompt: Dict[str, Any], refresh: bool = False, trace: Optional[bool] = None,
+                    user: str = "anonymous") -> Response:
+    return Response(
+        stream_flow_events(ai_prompt, refresh, trace, user),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # 프록시 버퍼링 끄기
+    )
 
+trace_sink = build_trace_sink(FLOW_TRACE_SINK)
+
+flow_cache = ResultCache(
+    ttl_seconds=FLOW_CACHE_TTL_SECONDS,
+    max_entries=FLOW_CACHE_MAX_ENTRIES,
+    second_tier=build_second_tier(FLOW_CACHE_DIR, FLOW_CACHE_REDIS_URL),
+    should_store=lambda payload: isinstance(payload, dict) and payload.get("ok") is True,
+    is_valid=cached_clips_exist
+) if FLOW_CACHE_ENABLED and FLOW_CACHE_TTL_SECONDS > 0 else None
+
+flow_admission = AdmissionController(
+    max_concurrent=FLOW_MAX_CONCURRENT,
+    rate_per_second=FLOW_RATE_PER_SECOND,
+    burst=FLOW_RATE_BURST,
+    max_queue=FLOW_QUEUE_MAX,
+    max_wait_seconds=FLOW_QUEUE_WAIT_SECONDS,
+    per_user_limit=FLOW_MAX_PER_USER,
+    retry_after_seconds=FLOW_RETRY_AFTER_SECONDS
+)
+
+job_manager = JobManager(
+    max_workers=FLOW_JOB_WORKERS,
+    ttl_seconds=FLOW_JOB_TTL_SECONDS,
+    max_jobs=FLOW_JOB_MAX_RECORDS,
+    error_handler=flow_error_response
+)
+
+# 이미 다른 곳에 있는 현황 값은 수집 시점에 읽어 gauge로 내보냄
+metrics_registry.gauge_callback(
+    "video_ai_flow_cache", "결과 캐시 현황 (hits/misses/coalesced는 누적)", ("stat",),
+    lambda: [((name,), value) for name, value in flow_cache.stats().items()] if flow_cache else [])
+metrics_registry.gauge_callback(
+    "video_ai_jobs", "비동기 작업 수 (상태별)", ("status",),
+    lambda: [((status,), count) for status, count in job_manager.stats().items()])
+metrics_registry.gauge_callback(
+    "video_ai_flow_admission", "Flow admission 현황 (admitted/queued/rejected/throttled는 누적)", ("stat",),
+    lambda: [((name,), value) for name, value in flow_admission.stats().items()])
+
+@app.route("/api/video/video_ai", methods=["GET", "POST", "OPTIONS"])
+def video_ai():
+    try:
+        if request.method == "OPTIONS":
+            return jsonify({"ok": True})
+        with FLOW_STAGE_SECONDS.time(stage="parse"):
+            ai_prompt = parse_request(request)
+            invalid = validate_prompt(ai_prompt)
+        logger.info("=== /api/video/video_ai === %s", ai_prompt)
+        if invalid:
+            return invalid
+
+        # 스트리밍: 중간 출력(요청 시 trace 포함)을 도착하는 대로 SSE로 전달
+        refresh = wants_refresh(request)
+        trace = wants_trace(request)
+        user = client_identity(request)
+        if wants_stream(request):
+            return stream_response(ai_prompt, refresh, trace, user)
+
+        # async 모드: 워커를 붙잡지 않고 job id만 반환 → GET /api/video/jobs/<id> 로 폴링
+        if wants_async(request):
+            job_id = job_manager.submit(run_flow, ai_prompt, refresh, trace, user)
+            status_url = f"/api/video/jobs/{job_id}"
+            return json_response({"ok": True, "jobId": job_id, "status": "QUEUED", "statusUrl": status_url}, 202, {"Location": status_url})
+
+        # 응답은 한 번만 인코딩 (serialization.json_response)
+        return json_response(run_flow(ai_prompt, refresh, trace, user))
+
+    except AdmissionRejected as ar:
+        logger.warning("Admission rejected: %s", ar)
+        return flow_error_json(ar)
     except ClientError as ce:
-        code = getattr(ce, "response", {}).get("Error", {}).get("Code")
-        msg = str(ce)
-        logger.exception("ClientError: %s", msg)
-        if code and "ResourceNotFoundException" in code:
-            return jsonify({"ok": False, "error": "RESOURCE_NOT_FOUND", "detail": msg}), 404
-        return jsonify({"ok": False, "error": "CLIENT_ERROR", "detail": msg}), 500
+        logger.exception("ClientError: %s", ce)
+        return flow_error_json(ce)
     except Exception as e:
         logger.exception("UnexpectedError")
-        return jsonify({"ok": False, "error": "UNEXPECTED_ERROR", "detail": str(e)}), 500
+        return flow_error_json(e)
+
+# SSE 스트리밍 전용 엔드포인트 (/api/video/video_ai 에 Accept: text/event-stream 과 동일)
+@app.route("/api/video/video_ai/stream", methods=["GET", "POST", "OPTIONS"])
+def video_ai_stream():
+    if request.method == "OPTIONS":
+        return jsonify({"ok": True})
+    with FLOW_STAGE_SECONDS.time(stage="parse"):
+        ai_prompt = parse_request(request)
+        invalid = validate_prompt(ai_prompt)
+    logger.info("=== /api/video/video_ai/stream === %s", ai_prompt)
+    if invalid:
+        return invalid
+    return stream_response(ai_prompt, wants_refresh(request), wants_trace(request), client_identity(request))
+
+# 비동기 작업 상태/결과 조회
+@app.route("/api/video/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "JOB_NOT_FOUND", "jobId": job_id}), 404
+    return json_response({"ok": True, **job})
 
 # ▶️ 디버그: Flow/Alias 존재 및 매핑 확인
 @app.route("/api/video/_debug/verify_flow", methods=["GET"])
 def verify_flow():
     try:
-        sts = boto3.client("sts").get_caller_identity()
+        sts = get_client("sts").get_caller_identity()
         acct = sts.get("Account")
         runtime_region = AWS_REGION
 
@@ -351,6 +756,11 @@ def verify_flow():
         logger.exception("Verify Unexpected")
         return jsonify({"ok": False, "error": "VERIFY_UNEXPECTED", "detail": str(e)}), 500
 
+# 지표 (Prometheus scrape 대상)
+@app.route("/api/video/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 # 헬스체크 API
 @app.route("/api/video/health", methods=["GET"])
 def health_check():
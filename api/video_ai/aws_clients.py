@@ -0,0 +1,60 @@
+"""
+프로세스 공용 boto3 클라이언트.
+
+요청마다 boto3.client()를 만들면 생성 비용(수십 ms)이 들고 HTTP 커넥션 풀도 매번 버려진다.
+(서비스, 리전, 설정)별로 한 번만 만들어 재사용하고, 풀 크기를 동시 요청 수에 맞추고 keep-alive를 켠다.
+boto3 클라이언트 호출은 스레드 안전하지만 생성(기본 Session)은 아니므로 생성만 잠금으로 보호한다.
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-2")
+MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))   # botocore 기본 10
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name, region_name=None, **config_options):
+    """
+    캐시된 클라이언트. config_options는 botocore Config 인자 (예: read_timeout=600, signature_version="s3v4")
+    """
+    region = region_name or AWS_REGION
+    key = (service_name, region, repr(sorted(config_options.items())))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    global _session
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if _session is None:
+                _session = boto3.session.Session()
+            options = {"max_pool_connections": MAX_POOL_CONNECTIONS, "tcp_keepalive": True}
+            options.update(config_options)
+            client = _session.client(service_name, region_name=region, config=Config(**options))
+            _clients[key] = client
+    return client
+
+
+if __name__ == "__main__":
+    # 클라이언트 생성 비용 비교: python aws_clients.py [반복 횟수]
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    t0 = time.perf_counter()
+    for _ in range(n):
+        boto3.client("s3", region_name=AWS_REGION)
+    fresh = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        get_client("s3")
+    cached = (time.perf_counter() - t0) / n
+    print(f"boto3.client() 매번 생성: {fresh * 1000:.2f} ms/회")
+    print(f"get_client() 캐시:       {cached * 1000:.4f} ms/회")
@@ -0,0 +1,131 @@
+"""
+Flow trace 수집 (선택).
+
+trace는 요청마다 켤 때(?trace=true) 또는 샘플링에 걸렸을 때만 enableTrace로 받는다.
+받은 trace는 이벤트마다 한 번만 JSON으로 직렬화해 요청당 max_bytes까지 모으고, 응답 payload가 아닌
+별도 sink(로그 스트림 / 로컬 JSONL 파일)로 끝날 때 한 번에 내보낸다. 응답에는 요약(개수/크기/버린 수)만 붙는다.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from serialization import dumps_str
+
+logger = logging.getLogger("video-ai-backend")
+trace_logger = logging.getLogger("video-ai-trace")
+
+
+class LogTraceSink:
+    """로그 스트림 (컨테이너 stdout → CloudWatch Logs 등). 이벤트당 한 줄"""
+    name = "log"
+
+    def write(self, execution_id: Optional[str], lines: List[str]):
+        for seq, line in enumerate(lines):
+            trace_logger.info('{"executionId":%s,"seq":%d,"trace":%s}', json.dumps(execution_id), seq, line)
+
+
+class FileTraceSink:
+    """로컬 디렉터리의 날짜별 JSONL 파일"""
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, execution_id: Optional[str], lines: List[str]):
+        path = os.path.join(self.directory, f"flow-trace-{datetime.now(timezone.utc):%Y%m%d}.jsonl")
+        prefix = f'{{"executionId":{json.dumps(execution_id)},"seq":'
+        body = "".join(f'{prefix}{seq},"trace":{line}}}\n' for seq, line in enumerate(lines))
+        with self._lock, open(path, "a", encoding="utf-8") as f:
+            f.write(body)
+
+
+def build_trace_sink(spec: str):
+    """"log" | "file:<디렉터리>" | "none" → sink (none/알 수 없으면 None)"""
+    spec = (spec or "").strip()
+    try:
+        if spec == "log":
+            return LogTraceSink()
+        if spec.startswith("file:"):
+            return FileTraceSink(spec[len("file:"):])
+    except OSError as e:
+        logger.warning("[Trace] sink 사용 불가 (%s): %s", spec, e)
+        return None
+    if spec and spec != "none":
+        logger.warning("[Trace] 알 수 없는 sink: %s", spec)
+    return None
+
+
+def should_trace(requested: Optional[bool], sample_rate: float) -> bool:
+    """요청에서 켜고/끈 값이 우선, 지정이 없으면 sample_rate 확률"""
+    if requested is not None:
+        return requested
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+class TraceRecorder:
+    """
+    요청 하나의 trace. add()는 직렬화한 JSON 문자열(버렸으면 None)을 돌려줘 SSE 전송에 재사용.
+    node_seconds(히스토그램)를 주면 노드 입력→출력 trace 시각 차이로 노드별 실행 시간을 기록 (상한과 무관)
+    """
+
+    def __init__(self, sink, max_bytes: int, node_seconds=None):
+        self.sink = sink
+        self.max_bytes = max_bytes
+        self.node_seconds = node_seconds
+        self._node_started: Dict[str, float] = {}
+        self.execution_id = None
+        self.lines: List[str] = []
+        self.events = 0
+        self.bytes = 0
+        self.dropped = 0
+
+    def add(self, trace: Any) -> Optional[str]:
+        if self.node_seconds is not None and isinstance(trace, dict):
+            self._time_node(trace)
+        line = dumps_str(trace)
+        # 크기는 문자 수로 근사 (다시 인코딩하지 않음)
+        if self.bytes + len(line) > self.max_bytes:
+            self.dropped += 1
+            return None
+        self.lines.append(line)
+        self.events += 1
+        self.bytes += len(line)
+        return line
+
+    def _time_node(self, trace: Dict[str, Any]):
+        for kind in ("nodeInputTrace", "nodeOutputTrace"):
+            node_trace = trace.get(kind)
+            if not isinstance(node_trace, dict) or not node_trace.get("nodeName"):
+                continue
+            node = node_trace["nodeName"]
+            timestamp = node_trace.get("timestamp")
+            at = timestamp.timestamp() if hasattr(timestamp, "timestamp") else time.time()
+            if kind == "nodeInputTrace":
+                self._node_started.setdefault(node, at)
+            elif node in self._node_started:
+                self.node_seconds.observe(max(0.0, at - self._node_started.pop(node)), node=node)
+
+    def flush(self):
+        if self.sink is None or not self.lines:
+            return
+        try:
+            self.sink.write(self.execution_id, self.lines)
+        except Exception as e:
+            logger.warning("[Trace] sink 기록 실패: %s", e)
+        self.lines = []
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "executionId": self.execution_id,
+            "events": self.events,
+            "bytes": self.bytes,
+            "dropped": self.dropped,
+            "sink": getattr(self.sink, "name", None)
+        }
@@ -0,0 +1,109 @@
+"""
+비동기 Flow 작업 관리.
+
+/api/video/video_ai 를 async 모드로 호출하면 요청 스레드는 job id만 돌려주고
+Flow 호출(수 분, MediaConvert 대기 포함)은 백그라운드 스레드 풀에서 실행한다.
+상태/결과는 GET /api/video/jobs/<id> 로 조회.
+
+작업 기록은 프로세스 메모리에 보관하므로 여러 컨테이너 뒤에서는 sticky session(ALB) 필요.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("video-ai-backend")
+
+STATUS_QUEUED = "QUEUED"
+STATUS_RUNNING = "RUNNING"
+STATUS_SUCCEEDED = "SUCCEEDED"
+STATUS_FAILED = "FAILED"
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobManager:
+    """
+    submit(fn, *args) → job id. fn의 반환값이 result, 예외는 error_handler(e) → (payload, http status)로 기록.
+    끝난 작업은 ttl_seconds 뒤 정리, 전체 기록은 max_jobs개까지 (오래된 완료 작업부터 삭제)
+    """
+
+    def __init__(self, max_workers: int, ttl_seconds: int, max_jobs: int,
+                 error_handler: Optional[Callable[[Exception], Any]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self.error_handler = error_handler
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flow-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._evict_locked()
+            self._jobs[job_id] = {
+                "jobId": job_id,
+                "status": STATUS_QUEUED,
+                "createdAt": _now_iso(),
+                "startedAt": None,
+                "finishedAt": None,
+                "_finished": None
+            }
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        logger.info("[Job] submitted %s", job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """외부 응답용 사본 (내부 필드 제외). 없으면 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {STATUS_QUEUED: 0, STATUS_RUNNING: 0, STATUS_SUCCEEDED: 0, STATUS_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _run(self, job_id: str, fn: Callable, args, kwargs):
+        self._update(job_id, status=STATUS_RUNNING, startedAt=_now_iso())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job_id, status=STATUS_SUCCEEDED, result=result,
+                         finishedAt=_now_iso(), _finished=time.time())
+            logger.info("[Job] succeeded %s", job_id)
+        except Exception as e:
+            logger.exception("[Job] failed %s", job_id)
+            if self.error_handler:
+                error, http_status = self.error_handler(e)
+            else:
+                error, http_status = {"ok": False, "error": "UNEXPECTED_ERROR", "detail": str(e)}, 500
+            self._update(job_id, status=STATUS_FAILED, error=error, httpStatus=http_status,
+                         finishedAt=_now_iso(), _finished=time.time())
+
+    def _evict_locked(self):
+        now = time.time()
+        expired = [jid for jid, job in self._jobs.items()
+                   if job["_finished"] and now - job["_finished"] > self.ttl_seconds]
+        for jid in expired:
+            del self._jobs[jid]
+        overflow = len(self._jobs) - self.max_jobs + 1
+        if overflow > 0:
+            finished = sorted((job["_finished"], jid) for jid, job in self._jobs.items() if job["_finished"])
+            for _, jid in finished[:overflow]:
+                del self._jobs[jid]
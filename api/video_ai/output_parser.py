@@ -0,0 +1,189 @@
+"""
+Flow 출력 → 클립 목록.
+
+자르기 Action Group이 남긴 클립 매니페스트(```clip-manifest 블록 / clip-manifest-uri / dict)가 있으면 그대로 쓴다.
+매니페스트가 없는 출력(이전 Flow 버전, 에이전트가 블록을 빠뜨린 경우)만 아래 방식으로 추출한다.
+
+LLM이 돌려준 문자열에서 마크다운 링크/S3 URL/프리사인 URL/파일명을 미리 컴파일한 정규식 하나로
+한 번만 훑어 클립(파일명, 원본 URL, CloudFront URL, 썸네일 URL)을 등장 순서대로, 파일명 기준 중복 없이 뽑는다.
+URL이 하나도 없을 때만 본문에 적힌 파일명(soccer_0s-34s.mp4 등)을 쓴다.
+"""
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("video-ai-backend")
+
+VIDEO_CDN_BASE = "https://d1nmrhn4eusal2.cloudfront.net"
+THUMBNAIL_CDN_BASE = "https://d3il8axvt9p9ix.cloudfront.net"
+
+# url: http(s) .mp4 URL (쿼리 포함, 마크다운 링크의 괄호 안 포함) — url_name은 경로 마지막 파일명
+# name: URL 밖에 적힌 컷 파일명 (soccer_0s-34s.mp4, soccer_0-34.mp4, soccer_15s-410s_short.mp4 ...)
+_URL_CHARS = r"[^\s()<>\[\]\"'?#]"
+CLIP_TOKEN_PATTERN = re.compile(
+    rf"(?P<url>https?://{_URL_CHARS}*/(?P<url_name>[^/\s()<>\[\]\"'?#]+\.mp4)(?:\?[^\s()<>\[\]\"']*)?)"
+    r"|(?P<name>\b\w+_\d+s?-\d+s?(?:_short)?\.mp4)"
+)
+
+
+# 클립 매니페스트 (cut_transcribe / cut_shorts 의 clip_manifest.py 와 같은 형식)
+SUPPORTED_MANIFEST_VERSIONS = (1,)
+MANIFEST_BLOCK_PATTERN = re.compile(r"```clip-manifest\s*(\{.*?\})\s*```", re.S)
+MANIFEST_URI_PATTERN = re.compile(r"clip-manifest-uri:\s*(s3://[^\s`]+\.json)")
+
+
+def is_clip_manifest(value: Any) -> bool:
+    return (isinstance(value, dict) and value.get("kind") == "clips"
+            and value.get("manifest_version") in SUPPORTED_MANIFEST_VERSIONS)
+
+
+def find_manifests(output: Any) -> List[Dict[str, Any]]:
+    """출력에 들어 있는 매니페스트들 (등장 순서). 버전이 다르거나 JSON이 깨진 블록은 건너뜀"""
+    if is_clip_manifest(output):
+        return [output]
+    if not isinstance(output, str) or "clip-manifest" not in output:
+        return []
+    manifests = []
+    for match in MANIFEST_BLOCK_PATTERN.finditer(output):
+        try:
+            manifest = json.loads(match.group(1))
+        except ValueError as e:
+            logger.warning("clip-manifest 블록 JSON 파싱 실패: %s", e)
+            continue
+        if is_clip_manifest(manifest):
+            manifests.append(manifest)
+        else:
+            logger.warning("지원하지 않는 clip-manifest: version=%s", manifest.get("manifest_version"))
+    return manifests
+
+
+def find_manifest_uris(output: Any) -> List[str]:
+    """블록 없이 URI 줄만 남은 경우 (S3에서 읽어야 함)"""
+    if not isinstance(output, str):
+        return []
+    return list(dict.fromkeys(MANIFEST_URI_PATTERN.findall(output)))
+
+
+def clips_from_manifests(manifests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """매니페스트 클립 → clip_record 형식 (+ key/크기/길이 등 매니페스트 필드). 키 기준 중복 제거"""
+    clips, seen = [], set()
+    for manifest in manifests:
+        for clip in manifest.get("clips") or []:
+            key = clip.get("key")
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            record = clip_record(clip.get("filename") or key.rsplit("/", 1)[-1])
+            record["cloudfrontUrl"] = clip.get("cdn_url") or record["cloudfrontUrl"]
+            record["thumbnailUrl"] = clip.get("thumbnail_cdn_url") if clip.get("thumbnail_key") else None
+            record.update({
+                "bucket": clip.get("bucket"),
+                "key": key,
+                "start": clip.get("start"),
+                "end": clip.get("end"),
+                "duration": clip.get("duration"),
+                "size": clip.get("size"),
+                "thumbnailKey": clip.get("thumbnail_key"),
+                "producer": manifest.get("producer")
+            })
+            clips.append(record)
+    return clips
+
+
+def clip_record(filename: Optional[str], source_url: Optional[str] = None) -> Dict[str, Any]:
+    """파일명 → CloudFront 영상/썸네일 URL (.mp4 → .jpg)"""
+    if not filename:
+        return {"filename": None, "sourceUrl": source_url, "cloudfrontUrl": None, "thumbnailUrl": None}
+    stem = filename[:-len(".mp4")] if filename.endswith(".mp4") else filename
+    return {
+        "filename": filename,
+        "sourceUrl": source_url,
+        "cloudfrontUrl": f"{VIDEO_CDN_BASE}/{filename}",
+        "thumbnailUrl": f"{THUMBNAIL_CDN_BASE}/{stem}.jpg"
+    }
+
+
+def parse_clips(text: str) -> List[Dict[str, Any]]:
+    """문자열 출력 1회 스캔 → 클립 목록 (등장 순서, 파일명 중복 제거)"""
+    url_clips: Dict[str, Dict[str, Any]] = {}
+    named_clips: Dict[str, Dict[str, Any]] = {}
+    for match in CLIP_TOKEN_PATTERN.finditer(text):
+        url = match.group("url")
+        if url:
+            name = match.group("url_name")
+            if name not in url_clips:
+                url_clips[name] = clip_record(name, url)
+        elif not url_clips:
+            name = match.group("name")
+            if name not in named_clips:
+                named_clips[name] = clip_record(name)
+    return list((url_clips or named_clips).values())
+
+
+def parse_flow_output(output: Any) -> List[Dict[str, Any]]:
+    """Flow 마지막 output (매니페스트 / 문자열 / {"cut_video": {...} | [...]}) → 클립 목록"""
+    manifests = find_manifests(output)
+    if manifests:
+        return clips_from_manifests(manifests)
+    if isinstance(output, str):
+        return parse_clips(output)
+    if not isinstance(output, dict) or "cut_video" not in output:
+        return []
+    cut_videos = output["cut_video"]
+    if isinstance(cut_videos, dict):
+        cut_videos = [cut_videos]
+    clips, seen = [], set()
+    for cut_video in cut_videos or []:
+        if not isinstance(cut_video, dict):
+            continue
+        filename = cut_video.get("filename")
+        if filename and filename in seen:
+            continue
+        seen.add(filename)
+        clips.append(clip_record(filename, cut_video.get("video_url")))
+    return clips
+
+
+if __name__ == "__main__":
+    # 벤치마크: python output_parser.py [클립 수] [반복 횟수]
+    import sys
+    import time
+
+    def legacy_parse(text):
+        """기존 invoke_flow 방식 (findall 3회 + set 중복 제거 + 파일명 패턴 5회)"""
+        links = re.findall(r'\[[^\]]+\]\(([^)]+)\)', text)
+        video_urls = [link for link in links if '.mp4?' in link and 's3.amazonaws.com' in link]
+        s3_urls = re.findall(r'https://[^\s\)]+\.s3\.amazonaws\.com/[^\s\)]+\.mp4', text)
+        presigned = re.findall(r'https://[^\s\)]+\.mp4\?[^\)\s]+', text)
+        all_urls = list(set(video_urls + s3_urls + presigned))
+        names = []
+        for url in all_urls:
+            match = re.search(r'/([^/]+\.mp4)(?:\?|$)', url)
+            if match:
+                names.append(match.group(1))
+        if not all_urls:
+            for pattern in (r'(\w+_\d+s-\d+s_short\.mp4)', r'(\w+_\d+s-\d+s\.mp4)', r'(\w+_\d+-\d+\.mp4)',
+                            r'(\w+_\d+s-\d+\.mp4)', r'(\w+_\d+-\d+s\.mp4)'):
+                names.extend(re.findall(pattern, text))
+            names = list(set(names))
+        return names
+
+    clips = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    lines = []
+    for i in range(clips):
+        key = f"soccer_{i * 10}s-{i * 10 + 8}s.mp4"
+        url = (f"https://video-output.s3.amazonaws.com/{key}?X-Amz-Algorithm=AWS4-HMAC-SHA256"
+               f"&X-Amz-Credential=AKIAEXAMPLE%2F20250101%2Fap-northeast-2%2Fs3%2Faws4_request&X-Amz-Signature={i:064x}")
+        lines.append(f"{i + 1}. 장면 {i + 1}: 골 장면 하이라이트입니다. [{key}]({url})\n   설명: 선수가 드리블 후 슈팅합니다.")
+    text = "\n".join(lines)
+
+    for label, fn in (("legacy", legacy_parse), ("single-pass", parse_clips)):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            found = fn(text)
+        elapsed = (time.perf_counter() - t0) / rounds
+        print(f"{label:12s} {len(text):,} chars, {len(found)}개: {elapsed * 1000:.2f} ms/회")
+    names = [clip["filename"] for clip in parse_clips(text)]
+    print("순서 유지:", names == [f"soccer_{i * 10}s-{i * 10 + 8}s.mp4" for i in range(clips)])
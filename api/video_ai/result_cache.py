@@ -0,0 +1,238 @@
+"""
+Flow 결과 캐시.
+
+같은 질의(영상/유형/개수/프롬프트 + 원본 ETag)를 다시 보내면 Flow(Pegasus 분석 + MediaConvert 컷)를
+다시 돌리지 않고 저장된 결과를 돌려준다.
+  - 1차: 프로세스 메모리 LRU (max_entries개, TTL)
+  - 2차(선택): 로컬 디스크 디렉터리 또는 Redis 호환 서버 → 컨테이너 재시작/여러 인스턴스 간 공유
+  - single-flight: 같은 키로 동시에 들어온 요청은 첫 요청의 Flow 호출 하나를 기다려 결과를 공유
+  - is_valid(값)가 거짓이면 (결과가 가리키는 클립이 지워진 경우 등) 적중으로 보지 않고 두 저장소에서 지움
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from serialization import dumps, loads
+
+logger = logging.getLogger("video-ai-backend")
+
+
+def make_cache_key(*parts) -> str:
+    """정규화된 값들 → 고정 길이 키"""
+    raw = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """디렉터리에 키별 JSON 파일 ({"expires", "value"})"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        # 임시 파일에 쓰고 rename → 다른 프로세스가 반쯤 쓴 파일을 읽지 않음
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(dumps({"expires": time.time() + ttl_seconds, "value": value}))
+        os.replace(tmp, self._path(key))
+
+
+class RedisTier:
+    """Redis 호환 서버 (redis 패키지 필요). 만료는 서버 TTL(SETEX)에 맡김"""
+
+    def __init__(self, url: str, prefix: str = "flow-result:"):
+        import redis  # 선택 의존성
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return loads(raw) if raw else None
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        self.client.setex(self.prefix + key, ttl_seconds, dumps(value))
+
+
+def build_second_tier(disk_dir: Optional[str] = None, redis_url: Optional[str] = None):
+    """설정된 2차 저장소 (Redis 우선). 없거나 초기화 실패면 None → 메모리만 사용"""
+    try:
+        if redis_url:
+            return RedisTier(redis_url)
+        if disk_dir:
+            return DiskTier(disk_dir)
+    except Exception as e:
+        logger.warning("[Cache] 2차 저장소 사용 불가 → 메모리만 사용: %s", e)
+    return None
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    get_or_compute(key, fn) → (값, 캐시 적중 여부, 진행 중인 같은 계산에 합류했는지).
+    should_store(값)이 참인 결과만 저장 (실패/추가 입력 요청 응답은 저장하지 않음).
+    is_valid(값)는 적중할 때마다 확인 (거짓이면 지우고 없는 것으로 처리)
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, second_tier=None,
+                 should_store: Optional[Callable[[Any], bool]] = None,
+                 is_valid: Optional[Callable[[Any], bool]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.second_tier = second_tier
+        self.should_store = should_store or (lambda value: True)
+        self.is_valid = is_valid or (lambda value: True)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidated": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._lookup(key)
+        if value is None or self.is_valid(value):
+            return value
+        logger.info("[Cache] 무효 결과 삭제 %s", key[:12])
+        self._count("invalidated")
+        self.delete(key)
+        return None
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        if self.second_tier is None:
+            return None
+        try:
+            value = self.second_tier.get(key)
+        except Exception as e:
+            logger.warning("[Cache] 2차 저장소 조회 실패: %s", e)
+            return None
+        if value is not None:
+            self._store_memory(key, value)
+        return value
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.second_tier is not None:
+            try:
+                self.second_tier.delete(key)
+            except Exception as e:
+                logger.warning("[Cache] 2차 저장소 삭제 실패: %s", e)
+
+    def set(self, key: str, value: Any):
+        if not self.should_store(value):
+            return
+        self._store_memory(key, value)
+        if self.second_tier is not None:
+            try:
+                self.second_tier.set(key, value, self.ttl_seconds)
+            except Exception as e:
+                logger.warning("[Cache] 2차 저장소 저장 실패: %s", e)
+
+    def _store_memory(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, fn: Callable[[], Any], refresh: bool = False) -> Tuple[Any, bool, bool]:
+        """
+        refresh=True면 저장된 값을 무시하고 다시 계산 (진행 중인 같은 계산에는 합류).
+        합류한 요청은 캐시 적중이 아님 → (값, False, True)
+        """
+        if not refresh:
+            value = self.get(key)
+            if value is not None:
+                self._count("hits")
+                return value, True, False
+
+        flight, leader = self.join(key)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, False, True
+
+        value, error = None, None
+        try:
+            value = fn()
+            return value, False, False
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.finish(key, flight, value, error)
+
+    def join(self, key: str) -> Tuple[_Flight, bool]:
+        """같은 키로 진행 중인 계산에 합류 → (flight, leader). leader는 끝나면 반드시 finish 호출"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        self._count("misses" if leader else "coalesced")
+        return flight, leader
+
+    def finish(self, key: str, flight: _Flight, value: Any = None, error: Optional[Exception] = None):
+        """leader 결과 저장 (오류가 아니면) → 기다리던 요청들에 전달"""
+        flight.value, flight.error = value, error
+        try:
+            if error is None:
+                self.set(key, value)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "inFlight": len(self._flights)}
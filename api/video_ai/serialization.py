@@ -0,0 +1,106 @@
+"""
+JSON 직렬화.
+
+응답은 한 번만 인코딩한다 (검사용 dumps → loads → jsonify 로 세 번 하지 않음).
+orjson이 설치돼 있으면 사용하고, 없으면 표준 json. JSON이 아닌 값은 default 훅에서 변환:
+datetime/date → ISO 8601, bytes → UTF-8 문자열(안 되면 base64), Decimal → 숫자, set/tuple → 리스트, 그 외 → str.
+"""
+import base64
+import datetime
+import decimal
+import json
+from typing import Any, Dict, Optional
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+JSON_MIMETYPE = "application/json"
+
+
+def json_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        raw = bytes(obj)
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            return base64.b64encode(raw).decode("ascii")
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=json_default, option=_ORJSON_OPTIONS)
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+    def loads(data):
+        return json.loads(data)
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def json_response(payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """jsonify 대신 한 번 인코딩한 바이트로 바로 Response 생성"""
+    return Response(dumps(payload), status=status, headers=headers, mimetype=JSON_MIMETYPE)
+
+
+if __name__ == "__main__":
+    # 마이크로벤치마크: python serialization.py [trace 이벤트 수] [반복 횟수]
+    import sys
+    import time
+
+    def to_jsonable(obj):
+        """기존 app.to_jsonable (검사용 dumps, 실패 시 dumps + loads)"""
+        try:
+            json.dumps(obj)
+            return obj
+        except TypeError:
+            return json.loads(json.dumps(obj, default=str))
+
+    n_traces = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    now = datetime.datetime.now(datetime.timezone.utc)
+    traces = [{
+        "nodeName": f"Agent_{i % 4}",
+        "eventTime": now,
+        "nodeInputTrace": {"fields": [{"nodeInputName": "document", "content": {"document": "장면 분석 " * 40}}]},
+        "nodeOutputTrace": {"fields": [{"nodeOutputName": "response", "content": {"document": {"scenes": [
+            {"start_time": j * 10, "end_time": j * 10 + 8, "text": "골 장면 하이라이트"} for j in range(5)
+        ]}}}]}
+    } for i in range(n_traces)]
+    outputs = ["영상 자르기 완료! " + "https://b.s3.amazonaws.com/output/soccer_0s-8s.mp4 " * 5]
+
+    def legacy():
+        # trace/출력마다 to_jsonable → 최종 payload to_jsonable → jsonify(json.dumps)
+        converted = [to_jsonable(t) for t in traces]
+        payload = to_jsonable({"ok": True, "outputs": [to_jsonable(o) for o in outputs], "trace": converted})
+        return json.dumps(payload).encode("utf-8")
+
+    def single_pass():
+        return dumps({"ok": True, "outputs": outputs, "trace": traces})
+
+    print(f"encoder: {'orjson' if orjson else 'json'}")
+    for label, fn in (("legacy", legacy), ("single-pass", single_pass)):
+        t0 = time.process_time()
+        for _ in range(rounds):
+            body = fn()
+        cpu = (time.process_time() - t0) / rounds
+        print(f"{label:12s} {n_traces} trace, {len(body):,} bytes: CPU {cpu * 1000:.2f} ms/요청")
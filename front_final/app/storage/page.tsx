@@ -201,11 +201,15 @@ export default function StoragePage() {
         .map((file: string) => {
           const filename = file.replace("output/", "")
           const baseName = filename.replace(/\.[^/.]+$/, "") // 확장자 제거
+          // ffmpeg 없는 자르기 Lambda는 MediaConvert 프레임 캡처 이름(<클립>.0000000.jpg)을 그대로 썸네일로 씀
+          const thumbnailName = thumbnailFiles.includes(`thumbnails/${baseName}.0000000.jpg`)
+            ? `${baseName}.0000000.jpg`
+            : `${baseName}.jpg`
           return {
             id: `cut-${file}`,
             filename: filename,
             path: file,
-            thumbnail: `https://d3il8axvt9p9ix.cloudfront.net/${baseName}.jpg`,
+            thumbnail: `https://d3il8axvt9p9ix.cloudfront.net/${thumbnailName}`,
             type: "cut" as const,
           }
         })
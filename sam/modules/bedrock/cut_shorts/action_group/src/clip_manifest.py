@@ -0,0 +1,72 @@
+"""
+클립 매니페스트 (자르기 Action Group → video_ai 계약).
+
+응답 문장에서 파일명을 정규식으로 추측하지 않도록, 만든 클립 정보(키/길이/크기/썸네일/CDN URL)를
+버전이 붙은 JSON 하나로 남긴다.
+  - S3: <출력 버킷>/manifests/<이름>.json
+  - 응답 본문 끝: ```clip-manifest 블록(한 줄 JSON) + "clip-manifest-uri: s3://..." 줄 (에이전트가 그대로 전달)
+필드 추가는 같은 버전에서, 기존 필드의 의미가 바뀌면 MANIFEST_VERSION을 올린다.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+MANIFEST_VERSION = 1
+MANIFEST_PREFIX = "manifests/"
+MANIFEST_BLOCK_TAG = "clip-manifest"
+VIDEO_CDN_BASE = "https://d1nmrhn4eusal2.cloudfront.net"       # 원점: 출력 버킷 output/
+THUMBNAIL_CDN_BASE = "https://d3il8axvt9p9ix.cloudfront.net"   # 원점: 출력 버킷 thumbnails/
+
+
+def manifest_clip(index, bucket, key, start, end, size=None, thumbnail_key=None, **extra):
+    """클립 1개. start/end/duration은 원본 기준 초, size는 bytes"""
+    filename = os.path.basename(key)
+    clip = {
+        "index": index,
+        "bucket": bucket,
+        "key": key,
+        "filename": filename,
+        "start": round(float(start), 3),
+        "end": round(float(end), 3),
+        "duration": round(float(end) - float(start), 3),
+        "size": size,
+        "thumbnail_key": thumbnail_key,
+        "cdn_url": f"{VIDEO_CDN_BASE}/{filename}",
+        "thumbnail_cdn_url": f"{THUMBNAIL_CDN_BASE}/{os.path.basename(thumbnail_key)}" if thumbnail_key else None
+    }
+    clip.update(extra)
+    return clip
+
+
+def build_manifest(producer, source_bucket, source_key, clips):
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "kind": "clips",
+        "producer": producer,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "source": {"bucket": source_bucket, "key": source_key},
+        "clips": clips
+    }
+
+
+def manifest_key(name):
+    return f"{MANIFEST_PREFIX}{name}.json"
+
+
+def write_manifest(s3_client, bucket, key, manifest):
+    """S3에 저장하고 s3 URI 반환"""
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
+        ContentType="application/json"
+    )
+    return f"s3://{bucket}/{key}"
+
+
+def manifest_block(manifest, manifest_uri=None):
+    """응답 본문에 붙일 블록 (에이전트가 수정 없이 전달할 부분)"""
+    block = f"```{MANIFEST_BLOCK_TAG}\n{json.dumps(manifest, ensure_ascii=False, separators=(',', ':'))}\n```"
+    if manifest_uri:
+        block += f"\n{MANIFEST_BLOCK_TAG}-uri: {manifest_uri}"
+    return block
@@ -4,7 +4,22 @@ import os
 import time
 import re
 from datetime import datetime
-from typing import Optional
+
+from cut_backends import (
+    BACKEND_FFMPEG,
+    BACKEND_MEDIACONVERT,
+    MODE_COPY,
+    MODE_SMART,
+    CutBackend,
+    FfmpegCutBackend,
+    choose_backend,
+    ffmpeg_available,
+)
+from clip_manifest import build_manifest, manifest_block, manifest_clip, manifest_key, write_manifest
+from job_status import get_job_status_store
+from keyframe_index import DEFAULT_FPS, load_keyframe_index, source_etag_of
+from scene_plan import DEFAULT_GAP_TOLERANCE, encoded_seconds, plan_scenes
+from thumbnailer import extract_thumbnail, thumbnailer_available
 
 # ===================== 하드코딩된 설정값 =====================
 VIDEO_BUCKET = "video-input-pipeline-20250724"
@@ -14,12 +29,35 @@ OUTPUT_PREFIX = "output/"
 THUMBNAIL_PREFIX = "thumbnails/"
 THUMBNAIL_ENABLED = True
 THUMBNAIL_TIME = 1
+THUMBNAIL_WIDTH = None   # 썸네일 폭 (None이면 원본 크기)
 MEDIACONVERT_ROLE_ARN = "arn:aws:iam::567279714866:role/MediaConvertServiceRole"
 
-# 인덱스 패턴 (media_th.py에서 가져옴)
-INDEXED_JPG_PATTERN = re.compile(r'^([^/]+?)\.(\d+)\.jpg$', re.IGNORECASE)
+# 장면 계획: 겹치거나 SCENE_MERGE_GAP초 이내로 붙은 장면은 합쳐서 같은 구간이 숏츠에 두 번 들어가지 않게 함
+SCENE_PLANNING_ENABLED = True
+SCENE_MERGE_GAP = DEFAULT_GAP_TOLERANCE
+
+# 자르기 백엔드: auto(짧은 숏츠는 로컬 ffmpeg, 나머지 MediaConvert) | mediaconvert | ffmpeg
+CUT_BACKEND = os.getenv("CUT_BACKEND", "auto")
+
+# 숏츠/썸네일은 최종 키에 바로 기록 (LIST/COPY/DELETE 없음)
+#  - ffmpeg 사용 가능: 완성된 숏츠에서 키프레임 1장만 디코딩해 thumbnails/<이름>.jpg로 업로드 (thumbnailer)
+#  - 그 외: 같은 Job의 프레임 캡처 thumbnails/<이름>.0000000.jpg를 그대로 썸네일로 사용
+#    (MediaConvert가 붙이는 번호는 바꿀 수 없음. bucket_list/카탈로그/프론트는 이 이름도 숏츠 썸네일로 인식)
+FRAME_CAPTURE_INDEX_SUFFIX = ".0000000.jpg"
 
 # ===================== 유틸리티 함수 =====================
+def parse_merge_gap(value) -> float:
+    """에이전트 파라미터 merge_gap(초) → 0 이상 실수. 비었거나 잘못된 값이면 SCENE_MERGE_GAP"""
+    try:
+        gap = float(value)
+    except (TypeError, ValueError):
+        print(f"⚠️ merge_gap 값 무시: {value!r} → {SCENE_MERGE_GAP}")
+        return SCENE_MERGE_GAP
+    if gap != gap or gap < 0 or gap == float("inf"):
+        print(f"⚠️ merge_gap 값 무시: {value!r} → {SCENE_MERGE_GAP}")
+        return SCENE_MERGE_GAP
+    return gap
+
 def ensure_prefix(p: str) -> str:
     return p if p.endswith("/") else (p + "/")
 
@@ -52,11 +90,19 @@ def seconds_to_time_format(seconds):
     s = int(seconds % 60)
     return f"{h:02d}:{m:02d}:{s:02d}"
 
-def seconds_to_timecode(seconds, fps=29.97):
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    frames = 0
+def seconds_to_timecode(seconds, fps=DEFAULT_FPS):
+    """
+    초 → HH:MM:SS:FF. 소수 초는 fps 기준 프레임 번호로 변환 (키프레임 인덱스의 fps 사용)
+    """
+    timebase = max(1, int(round(fps)))
+    seconds = max(0.0, seconds)
+    whole = int(seconds)
+    frames = int(round((seconds - whole) * fps))
+    if frames >= timebase:
+        whole, frames = whole + 1, 0
+    hours = whole // 3600
+    minutes = (whole % 3600) // 60
+    secs = whole % 60
     return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
 
 def error_json(msg, action_group="default", function_name="default", details=None):
@@ -154,19 +200,18 @@ def s3_key_exists(bucket: str, key: str) -> bool:
         return False
 
 # ===================== MediaConvert Assembly Workflow 함수 =====================
-def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, output_filename, generate_thumbnail=True):
+def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, output_filename, thumbnail_s3_base=None, fps=DEFAULT_FPS):
     """
     MediaConvert Assembly Workflow를 사용하여 한 번의 Job으로 숏츠 생성
+    Destination에 파일명까지 지정하므로 결과는 정확히 output_s3_uri (NameModifier/리네임 없음).
+    thumbnail_s3_base를 주면 같은 Job에서 <thumbnail_s3_base>.0000000.jpg 1장 캡처.
     """
     print(f"🎬 MediaConvert Assembly Workflow 숏츠 생성 시작: {len(scenes)}개 장면")
     
     mediaconvert = boto3.client('mediaconvert', region_name='ap-northeast-2')
     
-    # 출력 파일명에서 확장자 제거
-    base_filename = output_filename.replace('.mp4', '')
-    
-    # 썸네일 출력 경로 설정
-    thumbnail_output_dir = f"s3://{VIDEO_BUCKET}/{THUMBNAIL_PREFIX}"
+    # 출력 경로에서 확장자 제거 (MediaConvert가 .mp4를 붙임)
+    output_s3_base = output_s3_uri[:-len(".mp4")] if output_s3_uri.endswith(".mp4") else output_s3_uri
     
     # InputClipping 설정 생성
     input_clippings = []
@@ -175,8 +220,8 @@ def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, ou
         end_time = parse_time_to_seconds(scene.get("end_time"))
         
         input_clippings.append({
-            "StartTimecode": seconds_to_timecode(start_time),
-            "EndTimecode": seconds_to_timecode(end_time)
+            "StartTimecode": seconds_to_timecode(start_time, fps),
+            "EndTimecode": seconds_to_timecode(end_time, fps)
         })
         print(f"📋 장면 {i+1}: {start_time}s ~ {end_time}s")
     
@@ -202,12 +247,11 @@ def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, ou
                 "OutputGroupSettings": {
                     "Type": "FILE_GROUP_SETTINGS",
                     "FileGroupSettings": {
-                        "Destination": output_s3_uri.replace(f"/{output_filename}", "/")
+                        "Destination": output_s3_base
                     }
                 },
                 "Outputs": [
                     {
-                        "NameModifier": "_short",
                         "VideoDescription": {
                             "CodecSettings": {
                                 "Codec": "H_264",
@@ -261,18 +305,17 @@ def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, ou
     }
     
     # 썸네일 생성이 활성화된 경우 썸네일 출력 그룹 추가
-    if generate_thumbnail and THUMBNAIL_ENABLED:
+    if thumbnail_s3_base and THUMBNAIL_ENABLED:
         job_settings["OutputGroups"].append({
             "Name": "Thumbnail",
             "OutputGroupSettings": {
                 "Type": "FILE_GROUP_SETTINGS",
                 "FileGroupSettings": {
-                    "Destination": thumbnail_output_dir
+                    "Destination": thumbnail_s3_base
                 }
             },
             "Outputs": [
                 {
-                    "NameModifier": "_short",
                     "Extension": "jpg",
                     "ContainerSettings": {"Container": "RAW"},
                     "VideoDescription": {
@@ -289,18 +332,20 @@ def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, ou
                 }
             ]
         })
-        print(f"🖼️ 썸네일 생성 활성화: {thumbnail_output_dir}")
+        print(f"🖼️ 썸네일 생성 활성화: {thumbnail_s3_base}{FRAME_CAPTURE_INDEX_SUFFIX}")
 
+    user_metadata = {
+        'type': 'assembly_workflow',
+        'scene_count': str(len(scenes)),
+        'output_filename': output_filename
+    }
+    
     try:
         response = mediaconvert.create_job(
             Role=MEDIACONVERT_ROLE_ARN,
             Settings=job_settings,
             StatusUpdateInterval='SECONDS_10',
-            UserMetadata={
-                'type': 'assembly_workflow',
-                'scene_count': str(len(scenes)),
-                'output_filename': output_filename
-            }
+            UserMetadata=user_metadata
         )
         
         job_id = response['Job']['Id']
@@ -311,8 +356,38 @@ def create_shorts_with_assembly_workflow(input_s3_uri, output_s3_uri, scenes, ou
         print(f"❌ MediaConvert Assembly Workflow Job 생성 실패: {e}")
         return False, None
 
+def get_mediaconvert_job_status(job_id):
+    """
+    mediaconvert.get_job으로 현재 상태 조회 (이벤트 유실 시 보정용)
+    """
+    mediaconvert = boto3.client('mediaconvert', region_name='ap-northeast-2')
+    try:
+        job = mediaconvert.get_job(Id=job_id)['Job']
+        return {"status": job['Status'], "error_message": job.get('ErrorMessage')}
+    except Exception as e:
+        print(f"⚠️ MediaConvert Job 상태 조회 실패: {e}")
+        return None
+
 def wait_for_mediaconvert_job(job_id, timeout_seconds=300):
     print(f"⏳ MediaConvert Job 완료 대기: {job_id}")
+    
+    # 1) 이벤트 기반: job_events Lambda가 기록한 상태를 ~1초 간격으로 확인
+    store = get_job_status_store()
+    if store is not None:
+        try:
+            record = store.wait(job_id, timeout_seconds, reconcile=lambda: get_mediaconvert_job_status(job_id))
+            if record is None:
+                print(f"⏰ MediaConvert Job 타임아웃: {job_id}")
+                return False
+            if record["status"] == 'COMPLETE':
+                print(f"✅ MediaConvert Job 완료: {job_id}")
+                return True
+            print(f"❌ MediaConvert Job 실패: {record.get('error_message') or record['status']}")
+            return False
+        except Exception as e:
+            print(f"⚠️ Job 상태 테이블 조회 실패, get_job 폴링으로 전환: {e}")
+    
+    # 2) 상태 테이블이 없거나 조회 실패 시 기존 get_job 폴링
     mediaconvert = boto3.client('mediaconvert', region_name='ap-northeast-2')
     
     start_time = time.time()
@@ -342,98 +417,50 @@ def wait_for_mediaconvert_job(job_id, timeout_seconds=300):
     print(f"⏰ MediaConvert Job 타임아웃: {job_id}")
     return False
 
-# ===================== 썸네일 관련 함수 =====================
-def find_indexed_thumbnail(bucket: str, prefix: str, base: str):
+# ===================== 자르기 백엔드 =====================
+class MediaConvertCutBackend(CutBackend):
     """
-    thumbnails/ 아래에서 <base>.<숫자>.jpg 를 찾아 키를 반환.
-    없으면 None.
+    create_shorts_with_assembly_workflow / wait_for_mediaconvert_job을 CutBackend 인터페이스로 감싼 것.
+    thumbnail_output을 주면 같은 Job의 프레임 캡처로 <thumbnail_output 확장자 제외>.0000000.jpg 생성
     """
-    target_prefix = f"{prefix}{base}"
-    s3 = boto3.client("s3")
-    
-    try:
-        paginator = s3.get_paginator('list_objects_v2')
-        for page in paginator.paginate(Bucket=bucket, Prefix=target_prefix):
-            for obj in page.get('Contents', []):
-                key = obj['Key']  # thumbnails/base.0000000.jpg
-                filename = key[len(prefix):]  # base.0000000.jpg
-                if INDEXED_JPG_PATTERN.match(filename):
-                    print(f"🔎 인덱스 썸네일 발견: s3://{bucket}/{key}")
-                    return key
-    except Exception as e:
-        print(f"⚠️ 썸네일 검색 중 오류: {e}")
-    
-    # 더 넓은 범위로 검색 (base 이름의 일부만으로도 검색)
-    try:
-        print(f"🔍 더 넓은 범위로 썸네일 검색 중...")
-        paginator = s3.get_paginator('list_objects_v2')
-        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-            for obj in page.get('Contents', []):
-                key = obj['Key']  # thumbnails/...
-                filename = key[len(prefix):]  # base.0000000.jpg
-                if INDEXED_JPG_PATTERN.match(filename):
-                    # base 이름이 파일명에 포함되어 있는지 확인
-                    if base in filename:
-                        print(f"🔎 인덱스 썸네일 발견 (확장 검색): s3://{bucket}/{key}")
-                        return key
-    except Exception as e:
-        print(f"⚠️ 확장 썸네일 검색 중 오류: {e}")
+    name = BACKEND_MEDIACONVERT
     
-    print(f"⚠️ 인덱스 썸네일을 못 찾음: s3://{bucket}/{prefix}{base}.<num>.jpg")
-    return None
-
-def rename_indexed_thumbnail(bucket: str, base_name: str, indexed_key: str):
-    """
-    s3://<bucket>/thumbnails/<base>.<번호>.jpg → s3://<bucket>/thumbnails/<base>.jpg 로 리네임(copy→delete)
-    """
-    final_key = f"{THUMBNAIL_PREFIX}{base_name}.jpg"
-    print(f"🖼️ 썸네일 리네임: s3://{bucket}/{indexed_key} → s3://{bucket}/{final_key}")
+    def __init__(self, output_filename, fps=DEFAULT_FPS):
+        self.output_filename = output_filename
+        self.fps = fps
     
-    try:
-        s3 = boto3.client("s3")
-        s3.copy(
-            CopySource={"Bucket": bucket, "Key": indexed_key},
-            Bucket=bucket,
-            Key=final_key
+    def submit(self, source, segments, output, thumbnail_output=None):
+        scenes = [{"start_time": start, "end_time": end} for start, end in segments]
+        success, job_id = create_shorts_with_assembly_workflow(
+            source,
+            output,
+            scenes,
+            self.output_filename,
+            thumbnail_s3_base=thumbnail_output[:-len(".jpg")] if thumbnail_output else None,
+            fps=self.fps
         )
-        s3.delete_object(Bucket=bucket, Key=indexed_key)
-        print("✅ 썸네일 리네임 완료 (copy→delete)")
-        return final_key
-    except Exception as e:
-        print(f"❌ 썸네일 리네임 실패: {e}")
-        return None
+        return job_id if success else None
+    
+    def wait(self, handle, timeout_seconds=300):
+        return bool(handle) and wait_for_mediaconvert_job(handle, timeout_seconds)
 
-def process_thumbnail_after_job(bucket: str, base_name: str):
+def select_cut_backend(duration_seconds, frame_accurate, output_filename, keyframe_index=None):
     """
-    MediaConvert Job 완료 후 썸네일 처리
+    CUT_BACKEND 설정과 숏츠 길이/정확도 요구에 따라 백엔드 인스턴스 선택.
+    keyframe_index가 있으면 ffmpeg은 키프레임 조회에, MediaConvert는 타임코드 fps에 사용
     """
-    if not THUMBNAIL_ENABLED:
-        print("⚠️ 썸네일 생성이 비활성화됨")
-        return None
-        
-    print(f"🖼️ 썸네일 처리 시작... (base_name: {base_name})")
-    
-    # 인덱스 썸네일 찾기 (NameModifier가 포함된 파일명으로 검색)
-    indexed_key = find_indexed_thumbnail(bucket, THUMBNAIL_PREFIX, base_name)
-    if not indexed_key:
-        # 혹시 이미 리네임되어 있을 수도 있으니 최종 파일 존재도 체크
-        final_key = f"{THUMBNAIL_PREFIX}{base_name}.jpg"
-        try:
-            s3 = boto3.client("s3")
-            s3.head_object(Bucket=bucket, Key=final_key)
-            print(f"ℹ️ 최종 썸네일 이미 존재: s3://{bucket}/{final_key}")
-            return final_key
-        except:
-            print(f"❌ 썸네일을 찾을 수 없음: {base_name}")
-            return None
-    
-    # 썸네일 리네임
-    final_key = rename_indexed_thumbnail(bucket, base_name, indexed_key)
-    if final_key:
-        print(f"✅ 썸네일 처리 완료: s3://{bucket}/{final_key}")
-        return final_key
+    fps = keyframe_index.fps if keyframe_index else DEFAULT_FPS
+    if CUT_BACKEND == BACKEND_MEDIACONVERT:
+        return MediaConvertCutBackend(output_filename, fps)
+    if CUT_BACKEND == BACKEND_FFMPEG:
+        local_ok = ffmpeg_available()
+        name, mode = (BACKEND_FFMPEG, MODE_SMART if frame_accurate else MODE_COPY) if local_ok else (BACKEND_MEDIACONVERT, None)
+    else:
+        name, mode = choose_backend(duration_seconds, frame_accurate)
     
-    return None
+    if name == BACKEND_FFMPEG:
+        return FfmpegCutBackend(mode=mode, keyframe_index=keyframe_index)
+    return MediaConvertCutBackend(output_filename, fps)
 
 # ===================== 메인 핸들러 =====================
 def lambda_handler(event, context):
@@ -505,6 +532,20 @@ def lambda_handler(event, context):
             source_bucket = SOURCE_BUCKET_DEFAULT
             source_key = f"{DEFAULT_PREFIX}video.mp4"
         
+        # 장면 계획 (정렬 + 겹침/근접 구간 병합 + 원본 길이로 자르기)
+        keyframe_index = load_keyframe_index(source_key, source_etag_of(source_bucket, source_key))
+        if SCENE_PLANNING_ENABLED:
+            planned = plan_scenes(
+                scenes_to_process,
+                gap_tolerance=parse_merge_gap(params.get("merge_gap", SCENE_MERGE_GAP)),
+                source_duration=keyframe_index.duration_seconds if keyframe_index else None
+            )
+            if not planned:
+                return error_json("유효한 장면 구간이 없습니다.", action_group, function_name)
+            print(f"🧩 장면 계획: {len(scenes_to_process)}개 → {len(planned)}개, "
+                  f"인코딩 {encoded_seconds(scenes_to_process):.1f}s → {sum(sc['duration'] for sc in planned):.1f}s")
+            scenes_to_process = [{"start_time": sc["start"], "end_time": sc["end"]} for sc in planned]
+        
         # S3 경로/버킷 설정
         output_bucket = VIDEO_BUCKET
         base_name, _ = os.path.splitext(os.path.basename(source_key))
@@ -514,119 +555,100 @@ def lambda_handler(event, context):
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_filename, thumbnail_filename = build_output_names(base_name, scenes_to_process, ts)
         
-        # MediaConvert용 파일명 생성 (NameModifier를 고려)
+        # 출력 파일명 생성 (출력/썸네일 모두 이 이름으로 바로 기록)
         first_start = parse_time_to_seconds(scenes_to_process[0].get("start_time"))
         last_end = parse_time_to_seconds(scenes_to_process[-1].get("end_time"))
         mediaconvert_base_name = f"{base_name}_{int(first_start)}s-{int(last_end)}s"
         
-        # MediaConvert에서 시간 정보가 포함된 파일명을 생성하려면
-        # 원본 파일명을 변경해야 함
         output_key = f"{OUTPUT_PREFIX}{mediaconvert_base_name}_short.mp4"
         output_s3_uri = f"s3://{output_bucket}/{output_key}"
         
         # 입력 S3 URI
         input_s3_uri = f"s3://{source_bucket}/{source_key}"
         
-        print(f"🎬 MediaConvert Assembly Workflow 시작")
-        print(f"📥 입력: {input_s3_uri}")
-        print(f"📤 출력: {output_s3_uri}")
-        
-        # MediaConvert Assembly Workflow 실행
-        success, job_id = create_shorts_with_assembly_workflow(
-            input_s3_uri,
-            output_s3_uri,
-            scenes_to_process,
-            output_filename,
-            generate_thumbnail=True
-        )
-        
-        if not success:
-            return error_json("MediaConvert Assembly Workflow Job 생성 실패", action_group, function_name)
-        
-        # Job 완료 대기
-        if not wait_for_mediaconvert_job(job_id):
-            return error_json("MediaConvert Assembly Workflow Job 실패", action_group, function_name)
+        # 자르기 백엔드 선택 (짧은 숏츠는 로컬 ffmpeg, 나머지는 MediaConvert Assembly Workflow)
+        segments = [
+            (parse_time_to_seconds(scene.get("start_time")), parse_time_to_seconds(scene.get("end_time")))
+            for scene in scenes_to_process
+        ]
+        planned_duration = sum(max(0.0, end - start) for start, end in segments)
+        frame_accurate = str(params.get("frame_accurate", "false")).lower() in ("true", "1", "yes")
+        backend = select_cut_backend(planned_duration, frame_accurate, output_filename, keyframe_index)
+        thumbnail_key = f"{THUMBNAIL_PREFIX}{mediaconvert_base_name}_short.jpg" if THUMBNAIL_ENABLED else None
+        file_size = None
         
-        # 실제 생성된 파일명 찾기 및 리네임
-        s3 = boto3.client("s3")
-        actual_filename = None
-        file_size_mb = 0
+        if backend.name == BACKEND_FFMPEG:
+            print(f"🎬 로컬 ffmpeg 숏츠 생성 시작 ({backend.mode})")
+            print(f"📥 입력: {input_s3_uri}")
+            print(f"📤 출력: {output_s3_uri}")
+            
+            result = backend.wait(backend.submit(
+                input_s3_uri,
+                segments,
+                output_s3_uri,
+                f"s3://{output_bucket}/{thumbnail_key}" if thumbnail_key else None
+            ))
+            if result:
+                actual_filename = os.path.basename(output_key)
+                file_size = result["size"]
+                file_size_mb = file_size / (1024 * 1024)
+                if not result.get("thumbnail"):
+                    thumbnail_key = None
+                print(f"📄 출력 파일명: {actual_filename}")
+                print(f"📄 출력 파일 크기: {result['size']:,} bytes ({file_size_mb:.1f}MB)")
+            else:
+                # 로컬 ffmpeg 실패 → 같은 구간을 MediaConvert Assembly Workflow로 다시 만듦
+                print("⚠️ ffmpeg 숏츠 생성 실패 → MediaConvert로 재시도")
+                backend = MediaConvertCutBackend(output_filename, keyframe_index.fps if keyframe_index else DEFAULT_FPS)
         
-        try:
-            # S3에서 _short.mp4로 끝나는 파일 찾기
-            response = s3.list_objects_v2(
-                Bucket=output_bucket,
-                Prefix=OUTPUT_PREFIX,
-                MaxKeys=100
-            )
+        if backend.name == BACKEND_MEDIACONVERT:
+            print(f"🎬 MediaConvert Assembly Workflow 시작")
+            print(f"📥 입력: {input_s3_uri}")
+            print(f"📤 출력: {output_s3_uri}")
             
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    key = obj['Key']
-                    if key.endswith('_short.mp4'):
-                        # MediaConvert가 생성한 파일을 원하는 이름으로 리네임
-                        old_key = key
-                        new_key = f"{OUTPUT_PREFIX}{mediaconvert_base_name}_short.mp4"
-                        
-                        if old_key != new_key:
-                            print(f"🔄 파일 리네임: {os.path.basename(old_key)} → {os.path.basename(new_key)}")
-                            s3.copy(
-                                CopySource={"Bucket": output_bucket, "Key": old_key},
-                                Bucket=output_bucket,
-                                Key=new_key
-                            )
-                            s3.delete_object(Bucket=output_bucket, Key=old_key)
-                            print(f"✅ 파일 리네임 완료")
-                        
-                        actual_filename = os.path.basename(new_key)
-                        file_size = obj['Size']
-                        file_size_mb = file_size / (1024 * 1024)
-                        print(f"✅ 최종 파일명: {actual_filename}")
-                        print(f"📄 출력 파일 크기: {file_size:,} bytes ({file_size_mb:.1f}MB)")
-                        break
+            # MediaConvert Assembly Workflow 실행
+            # 썸네일: 완료 후 숏츠에서 추출, ffmpeg이 없으면 같은 Job에서 프레임 캡처
+            thumb_from_clip = bool(thumbnail_key) and thumbnailer_available()
+            capture_output = f"s3://{output_bucket}/{thumbnail_key}" if thumbnail_key and not thumb_from_clip else None
+            job_id = backend.submit(input_s3_uri, segments, output_s3_uri, capture_output)
             
-            if not actual_filename:
-                # 기존 방식으로 시도
-                response = s3.head_object(Bucket=output_bucket, Key=output_key)
-                file_size = response['ContentLength']
+            if not job_id:
+                return error_json("MediaConvert Assembly Workflow Job 생성 실패", action_group, function_name)
+            
+            # Job 완료 대기
+            if not backend.wait(job_id):
+                return error_json("MediaConvert Assembly Workflow Job 실패", action_group, function_name)
+            
+            # 출력은 정확히 output_key에 생성됨 → 크기만 확인
+            s3 = boto3.client("s3")
+            actual_filename = os.path.basename(output_key)
+            file_size_mb = 0
+            try:
+                file_size = s3.head_object(Bucket=output_bucket, Key=output_key)['ContentLength']
                 file_size_mb = file_size / (1024 * 1024)
-                actual_filename = os.path.basename(output_key)
                 print(f"📄 출력 파일명: {actual_filename}")
                 print(f"📄 출력 파일 크기: {file_size:,} bytes ({file_size_mb:.1f}MB)")
-                
-        except Exception as e:
-            print(f"⚠️ 파일 크기 확인 실패: {e}")
-            actual_filename = os.path.basename(output_key)
-        
-        # 썸네일 처리 및 리네임
-        thumbnail_key = None
-        if THUMBNAIL_ENABLED:
-            # MediaConvert가 생성한 썸네일을 원하는 이름으로 리네임
-            old_thumb_key = f"{THUMBNAIL_PREFIX}{base_name}_short.jpg"
-            new_thumb_key = f"{THUMBNAIL_PREFIX}{mediaconvert_base_name}_short.jpg"
+            except Exception as e:
+                print(f"⚠️ 파일 크기 확인 실패: {e}")
             
-            try:
-                # 기존 썸네일 처리 (인덱스 파일 찾기 및 리네임)
-                base_name_for_thumb = f"{base_name}_short"
-                thumbnail_key = process_thumbnail_after_job(output_bucket, base_name_for_thumb)
-                
-                # 추가로 시간 정보가 포함된 이름으로 리네임
-                if thumbnail_key and thumbnail_key != new_thumb_key:
-                    print(f"🔄 썸네일 리네임: {os.path.basename(thumbnail_key)} → {os.path.basename(new_thumb_key)}")
-                    s3.copy(
-                        CopySource={"Bucket": output_bucket, "Key": thumbnail_key},
-                        Bucket=output_bucket,
-                        Key=new_thumb_key
+            # 썸네일: 최종 키로 바로 기록
+            if thumb_from_clip:
+                try:
+                    extract_thumbnail(
+                        output_s3_uri,
+                        f"s3://{output_bucket}/{thumbnail_key}",
+                        min(float(THUMBNAIL_TIME), planned_duration * 0.5),
+                        width=THUMBNAIL_WIDTH,
+                        s3_client=s3
                     )
-                    s3.delete_object(Bucket=output_bucket, Key=thumbnail_key)
-                    thumbnail_key = new_thumb_key
-                    print(f"✅ 썸네일 리네임 완료")
-                    
-            except Exception as e:
-                print(f"⚠️ 썸네일 리네임 실패: {e}")
-                # 기존 썸네일 처리 결과 사용
-                base_name_for_thumb = f"{base_name}_short"
-                thumbnail_key = process_thumbnail_after_job(output_bucket, base_name_for_thumb)
+                    print(f"✅ 썸네일 추출 완료: s3://{output_bucket}/{thumbnail_key}")
+                except Exception as e:
+                    print(f"⚠️ 썸네일 추출 실패: {e}")
+                    thumbnail_key = None
+            elif capture_output:
+                # 프레임 캡처 파일명이 정해져 있어 목록 조회/이동 없이 그대로 사용
+                thumbnail_key = thumbnail_key[:-len(".jpg")] + FRAME_CAPTURE_INDEX_SUFFIX
+                print(f"✅ 썸네일 (프레임 캡처): s3://{output_bucket}/{thumbnail_key}")
         
         # 장면 정보 요약
         scene_summary = []
@@ -639,8 +661,30 @@ def lambda_handler(event, context):
             
             scene_summary.append(f"{i+1}. {seconds_to_time_format(start_time)} ~ {seconds_to_time_format(end_time)} ({seconds_to_time_format(duration)})")
         
+        # 클립 매니페스트 (video_ai가 응답 문장 대신 읽는 기계용 결과)
+        manifest = build_manifest("cut_shorts", source_bucket, source_key, [
+            manifest_clip(
+                1, output_bucket, output_key, segments[0][0], segments[-1][1],
+                size=file_size, thumbnail_key=thumbnail_key,
+                duration=round(planned_duration, 3),   # 여러 구간을 이어 붙인 숏츠 → 실제 재생 길이
+                segments=[[round(start, 3), round(end, 3)] for start, end in segments]
+            )
+        ])
+        manifest_uri = None
+        try:
+            manifest_uri = write_manifest(boto3.client("s3"), output_bucket, manifest_key(f"{mediaconvert_base_name}_short_{ts}"), manifest)
+            print(f"🧾 클립 매니페스트: {manifest_uri}")
+        except Exception as e:
+            print(f"⚠️ 매니페스트 저장 실패 (응답 본문에만 포함): {e}")
+        
         # 응답 메시지 생성
-        response_message = f"""숏츠 영상 생성 완료! MediaConvert Assembly Workflow를 사용하여 {len(scenes_to_process)}개 장면을 한 번에 처리했습니다.
+        if backend.name == BACKEND_FFMPEG:
+            engine_name = f"로컬 ffmpeg ({backend.mode})"
+            process_method = f"로컬 ffmpeg {'스마트 렌더' if backend.mode == MODE_SMART else '스트림 복사'}"
+        else:
+            engine_name = "MediaConvert Assembly Workflow"
+            process_method = "MediaConvert Assembly Workflow (InputClipping)"
+        response_message = f"""숏츠 영상 생성 완료! {engine_name}를 사용하여 {len(scenes_to_process)}개 장면을 한 번에 처리했습니다.
 
 생성된 파일명: {actual_filename}
 파일 크기: {file_size_mb:.1f}MB
@@ -650,7 +694,9 @@ def lambda_handler(event, context):
 {chr(10).join(scene_summary)}
 
 저장 위치: S3 버킷 '{output_bucket}'의 '{OUTPUT_PREFIX}' 폴더
-처리 방식: MediaConvert Assembly Workflow (InputClipping)"""
+처리 방식: {process_method}
+
+{manifest_block(manifest, manifest_uri)}"""
 
         return {
             "messageVersion": "1.0",
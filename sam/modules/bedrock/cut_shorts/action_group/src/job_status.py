@@ -0,0 +1,151 @@
+"""
+MediaConvert Job 상태 저장소.
+
+job_events Lambda가 EventBridge "MediaConvert Job State Change" 이벤트를 DynamoDB에 기록하고,
+액션 그룹은 mediaconvert.get_job을 10초마다 호출하는 대신 이 저장소에서 완료를 기다린다.
+테스트/로컬 실행용으로 메모리 기반 LocalJobStatusStore를 끼워 넣을 수 있다.
+"""
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import boto3
+
+TERMINAL_STATUSES = ("COMPLETE", "ERROR", "CANCELED")
+DEFAULT_POLL_INTERVAL = 1.0     # DynamoDB GetItem 간격 (get_job 10초 폴링 대비 완료 감지 ~1초)
+DEFAULT_RECONCILE_EVERY = 30.0  # 이벤트 유실 대비: 이 간격마다 한 번씩 원본(get_job) 상태 확인
+STATUS_TTL_SECONDS = 24 * 3600  # job_events Lambda와 같은 TTL (expires_at)
+
+
+class JobStatusStore:
+    """
+    Job 상태 저장소 인터페이스.
+    get()은 {"status": ..., "error_message": ...} 또는 None(기록 없음)을 반환한다.
+    """
+
+    poll_interval = DEFAULT_POLL_INTERVAL
+
+    def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put(self, job_id: str, status: str, error_message: Optional[str] = None):
+        raise NotImplementedError
+
+    def wait(self, job_id: str, timeout_seconds: float,
+             reconcile: Optional[Callable[[], Optional[dict]]] = None,
+             reconcile_every: float = DEFAULT_RECONCILE_EVERY) -> Optional[dict]:
+        """
+        종료 상태(COMPLETE/ERROR/CANCELED)가 기록될 때까지 대기. 타임아웃이면 None.
+        reconcile은 이벤트가 유실됐을 때를 위한 원본 상태 조회 함수.
+        """
+        deadline = time.time() + timeout_seconds
+        next_reconcile = time.time() + reconcile_every
+        while time.time() < deadline:
+            record = self.get(job_id)
+            if record and record.get("status") in TERMINAL_STATUSES:
+                return record
+
+            if reconcile and time.time() >= next_reconcile:
+                next_reconcile = time.time() + reconcile_every
+                record = reconcile()
+                if record and record.get("status") in TERMINAL_STATUSES:
+                    self.put(job_id, record["status"], record.get("error_message"))
+                    return record
+
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.time())))
+        return None
+
+
+class DynamoJobStatusStore(JobStatusStore):
+    """job_events Lambda가 채우는 DynamoDB 테이블 (파티션 키: job_id)"""
+
+    def __init__(self, table_name: str, client=None):
+        self.table_name = table_name
+        self.client = client or boto3.client("dynamodb")
+
+    def get(self, job_id: str) -> Optional[dict]:
+        response = self.client.get_item(
+            TableName=self.table_name,
+            Key={"job_id": {"S": job_id}},
+            ConsistentRead=True
+        )
+        item = response.get("Item")
+        if not item:
+            return None
+        return {
+            "status": item.get("status", {}).get("S"),
+            "error_message": item.get("error_message", {}).get("S")
+        }
+
+    def put(self, job_id: str, status: str, error_message: Optional[str] = None):
+        now = int(time.time())
+        item = {
+            "job_id": {"S": job_id},
+            "status": {"S": status},
+            "updated_at": {"N": str(now)},
+            "expires_at": {"N": str(now + STATUS_TTL_SECONDS)}
+        }
+        if error_message:
+            item["error_message"] = {"S": error_message}
+        self.client.put_item(TableName=self.table_name, Item=item)
+
+
+class LocalJobStatusStore(JobStatusStore):
+    """
+    프로세스 내 메모리 저장소 (테스트용 stand-in).
+    put()이 호출되는 즉시 wait() 중인 스레드를 깨운다.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._cond = threading.Condition()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            record = self._records.get(job_id)
+            return dict(record) if record else None
+
+    def put(self, job_id: str, status: str, error_message: Optional[str] = None):
+        with self._cond:
+            self._records[job_id] = {"status": status, "error_message": error_message}
+            self._cond.notify_all()
+
+    def wait(self, job_id: str, timeout_seconds: float,
+             reconcile: Optional[Callable[[], Optional[dict]]] = None,
+             reconcile_every: float = DEFAULT_RECONCILE_EVERY) -> Optional[dict]:
+        deadline = time.time() + timeout_seconds
+        with self._cond:
+            while True:
+                record = self._records.get(job_id)
+                if record and record.get("status") in TERMINAL_STATUSES:
+                    return dict(record)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+# ===================== 저장소 선택 =====================
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_status_store() -> Optional[JobStatusStore]:
+    """
+    JOB_STATUS_TABLE 환경변수가 있으면 DynamoDB 저장소, 없으면 None (기존 get_job 폴링 사용)
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            table_name = os.getenv("JOB_STATUS_TABLE", "")
+            if table_name:
+                _store = DynamoJobStatusStore(table_name)
+        return _store
+
+
+def set_job_status_store(store: Optional[JobStatusStore]):
+    """테스트에서 LocalJobStatusStore 등을 주입"""
+    global _store
+    with _store_lock:
+        _store = store
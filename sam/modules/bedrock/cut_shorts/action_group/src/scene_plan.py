@@ -0,0 +1,83 @@
+"""
+장면 구간 계획.
+
+Pegasus는 장면 앞뒤로 여유 시간을 붙여 돌려주므로 구간이 겹치거나 1초 남짓 떨어져 있는 경우가 많다.
+Job을 만들기 전에
+  1) 시간 파싱/정규화 (밀리초 단위 반올림)
+  2) 길이 0 이하·뒤집힌 구간 제거, 원본 길이로 자르기
+  3) 시작 시각 기준 정렬 후 겹치거나 gap_tolerance 이내로 붙은 구간 병합
+을 거쳐 같은 입력이면 항상 같은 결과가 나오게 한다.
+"""
+import math
+
+DEFAULT_GAP_TOLERANCE = 1.0   # 이 간격(초) 이하로 떨어진 구간은 하나로 합침
+TIME_PRECISION = 3
+
+
+def to_seconds(value):
+    """숫자, "SS", "MM:SS", "HH:MM:SS(.ms)" → 초 (해석 불가면 None)"""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            seconds = float(value)
+        else:
+            parts = str(value).strip().split(":")
+            seconds = 0.0
+            for part in parts:
+                seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    if math.isnan(seconds) or math.isinf(seconds):
+        return None
+    return seconds
+
+
+def plan_scenes(scenes, gap_tolerance=DEFAULT_GAP_TOLERANCE, source_duration=None):
+    """
+    scenes: [{"start_time", "end_time"}, ...] 또는 [(start, end), ...]
+    반환: [{"start", "end", "duration", "sources": [원래 장면 인덱스(0부터)]}, ...] (시작 시각 순)
+    """
+    intervals = []
+    for i, scene in enumerate(scenes):
+        if isinstance(scene, dict):
+            start, end = to_seconds(scene.get("start_time")), to_seconds(scene.get("end_time"))
+        else:
+            start, end = to_seconds(scene[0]), to_seconds(scene[1])
+        if start is None or end is None:
+            continue
+        start = max(0.0, start)
+        if source_duration:
+            end = min(end, float(source_duration))
+        start, end = round(start, TIME_PRECISION), round(end, TIME_PRECISION)
+        if end <= start:
+            continue
+        intervals.append((start, end, i))
+
+    intervals.sort()
+    planned = []
+    for start, end, i in intervals:
+        if planned and start <= planned[-1]["end"] + gap_tolerance:
+            last = planned[-1]
+            last["end"] = max(last["end"], end)
+            last["sources"].append(i)
+        else:
+            planned.append({"start": start, "end": end, "sources": [i]})
+
+    for scene in planned:
+        scene["duration"] = round(scene["end"] - scene["start"], TIME_PRECISION)
+        scene["sources"].sort()
+    return planned
+
+
+def encoded_seconds(scenes):
+    """계획 전 입력 기준 총 구간 길이 (비교용)"""
+    total = 0.0
+    for scene in scenes:
+        if isinstance(scene, dict):
+            start, end = to_seconds(scene.get("start_time")), to_seconds(scene.get("end_time"))
+        else:
+            start, end = to_seconds(scene[0]), to_seconds(scene[1])
+        if start is not None and end is not None and end > start:
+            total += end - start
+    return total
@@ -0,0 +1,170 @@
+"""
+키프레임 썸네일 추출기.
+
+썸네일 한 장에 MediaConvert Job(수십 초)을 쓰지 않고 Lambda 안에서
+  1) moov만 읽어(mp4_index) 요청 시각에 가장 가까운 키프레임을 찾고
+  2) 그 키프레임 샘플만 Range GET으로 받아
+  3) ffmpeg으로 키프레임 1장만 디코딩(-skip_frame nokey) → 지정 크기 JPEG
+로 만든다. 여러 장은 Range 요청 한 묶음 + ffmpeg 1회 실행(입력 N개)으로 처리한다.
+
+MP4/MOV가 아니거나(moov 없음, fragmented 등) 인덱스를 못 읽으면 presigned URL을 ffmpeg에 넘긴다
+(ffmpeg이 직접 seek, 키프레임만 디코딩하는 것은 같음).
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+from mp4_index import Mp4IndexError, load_index
+
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+THUMBNAIL_QUALITY = 3              # ffmpeg -q:v (2=최고 ~ 31=최저)
+MAX_FRAMES_PER_RUN = 32            # ffmpeg 1회 실행당 입력(프레임) 수 상한
+UPLOAD_WORKERS = 8
+SEEK_NUDGE = 0.001                 # 키프레임 시각보다 살짝 뒤로 seek → 반올림으로 이전 키프레임에 걸리지 않음
+PRESIGNED_INPUT_EXPIRE_SEC = 3600
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def thumbnailer_available(ffmpeg_path=FFMPEG_PATH):
+    return bool(shutil.which(ffmpeg_path))
+
+
+def split_s3_uri(uri):
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+def scale_filter(width=None, height=None):
+    """하나만 주면 비율 유지, 둘 다 주면 그 안에 맞춤. 둘 다 없으면 원본 크기"""
+    if width and height:
+        return f"scale={width}:{height}:force_original_aspect_ratio=decrease"
+    if width:
+        return f"scale={width}:-2"
+    if height:
+        return f"scale=-2:{height}"
+    return None
+
+
+def resolve_thumbnail_input(source, times, job_dir, s3_client):
+    """
+    (ffmpeg 입력, seek 시각 목록).
+    MP4/MOV면 가장 가까운 키프레임 시각으로 맞추고, S3 원본은 그 키프레임 샘플만 담은 sparse 파일을 쓴다
+    """
+    try:
+        index = load_index(source, s3_client)
+        if source.startswith("s3://"):
+            stats = index.fetch_keyframes(times, os.path.join(job_dir, "keyframes.mp4"))
+            print(f"📥 키프레임 {len(times)}장: {stats['bytes_fetched']:,} / {stats['file_size']:,} bytes ({stats['ranges']}개 Range)")
+            return stats["path"], stats["keyframe_times"]
+        video = index.video_track
+        if video is None:
+            raise Mp4IndexError(f"비디오 트랙 없음: {source}")
+        return source, [video.nearest_keyframe(t)[1] for t in times]
+    except Mp4IndexError as e:
+        print(f"⚠️ 키프레임 인덱스 사용 불가 → ffmpeg 직접 seek: {e}")
+
+    if not source.startswith("s3://"):
+        if not os.path.exists(source):
+            raise ThumbnailError(f"입력 파일 없음: {source}")
+        return source, times
+    bucket, key = split_s3_uri(source)
+    url = s3_client.generate_presigned_url(
+        "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=PRESIGNED_INPUT_EXPIRE_SEC
+    )
+    return url, times
+
+
+def run_ffmpeg(input_path, seek_times, outputs, width=None, height=None, quality=THUMBNAIL_QUALITY,
+               ffmpeg_path=FFMPEG_PATH):
+    """입력 하나를 seek 시각마다 따로 열어(키프레임만 디코딩) 출력마다 프레임 1장씩"""
+    cmd = [ffmpeg_path, "-y", "-v", "error"]
+    for seconds in seek_times:
+        cmd += ["-threads", "1", "-skip_frame", "nokey", "-noaccurate_seek",
+                "-ss", f"{seconds + SEEK_NUDGE:.6f}", "-i", input_path]
+    vf = scale_filter(width, height)
+    for i, output in enumerate(outputs):
+        cmd += ["-map", f"{i}:v:0", "-frames:v", "1", "-q:v", str(quality)]
+        if vf:
+            cmd += ["-vf", vf]
+        cmd.append(output)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise ThumbnailError(f"ffmpeg 실패 ({result.returncode}): {result.stderr.strip()[-500:]}")
+    missing = [o for o in outputs if not os.path.exists(o) or not os.path.getsize(o)]
+    if missing:
+        raise ThumbnailError(f"프레임을 못 뽑음: {missing}")
+
+
+def extract_thumbnails(source, requests, width=None, height=None, quality=THUMBNAIL_QUALITY,
+                       s3_client=None, ffmpeg_path=FFMPEG_PATH, work_dir=None):
+    """
+    source(s3 URI/로컬 경로)에서 requests [(시각 초, 출력 s3 URI/로컬 경로), ...]를 한 번에 추출.
+    반환: [{"requested", "time", "output", "size"}, ...] (requests 순서, time은 실제 사용한 키프레임 시각)
+    """
+    if not requests:
+        return []
+    uses_s3 = source.startswith("s3://") or any(output.startswith("s3://") for _, output in requests)
+    s3 = s3_client or (boto3.client("s3") if uses_s3 else None)
+    job_dir = os.path.join(work_dir or tempfile.gettempdir(), f"thumb_{uuid.uuid4().hex[:12]}")
+    os.makedirs(job_dir, exist_ok=True)
+    try:
+        times = [max(0.0, float(t)) for t, _ in requests]
+        input_path, seek_times = resolve_thumbnail_input(source, times, job_dir, s3)
+        local_outputs = [
+            output if not output.startswith("s3://") else os.path.join(job_dir, f"thumb_{i:03d}.jpg")
+            for i, (_, output) in enumerate(requests)
+        ]
+        for first in range(0, len(requests), MAX_FRAMES_PER_RUN):
+            last = first + MAX_FRAMES_PER_RUN
+            run_ffmpeg(input_path, seek_times[first:last], local_outputs[first:last],
+                       width, height, quality, ffmpeg_path)
+
+        def store(i):
+            output = requests[i][1]
+            if output.startswith("s3://"):
+                bucket, key = split_s3_uri(output)
+                s3.upload_file(local_outputs[i], bucket, key, ExtraArgs={"ContentType": "image/jpeg"})
+            return {"requested": times[i], "time": seek_times[i], "output": output,
+                    "size": os.path.getsize(local_outputs[i])}
+
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(requests))) as pool:
+            return list(pool.map(store, range(len(requests))))
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def extract_thumbnail(source, output, at_seconds=0.0, **kwargs):
+    """썸네일 1장. extract_thumbnails와 같은 옵션"""
+    return extract_thumbnails(source, [(at_seconds, output)], **kwargs)[0]
+
+
+if __name__ == "__main__":
+    # 사용법: python thumbnailer.py <s3://bucket/key | 로컬.mp4> <시각1,시각2,...> [폭] [출력폴더]
+    import sys
+    import time
+
+    if len(sys.argv) < 3:
+        print("usage: python thumbnailer.py <source> <t1,t2,...> [width] [output_dir]")
+        sys.exit(1)
+    source = sys.argv[1]
+    times = [float(t) for t in sys.argv[2].split(",") if t]
+    width = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3] else None
+    output_dir = sys.argv[4] if len(sys.argv) > 4 else "."
+    os.makedirs(output_dir, exist_ok=True)
+
+    t0 = time.time()
+    results = extract_thumbnails(
+        source, [(t, os.path.join(output_dir, f"thumb_{i:03d}.jpg")) for i, t in enumerate(times)], width=width
+    )
+    elapsed = time.time() - t0
+    for r in results:
+        print(f"🖼️ {r['requested']:.3f}s → 키프레임 {r['time']:.3f}s: {r['output']} ({r['size']:,} bytes)")
+    print(f"⏱️ {len(results)}장 {elapsed:.3f}s (장당 {elapsed / len(results):.3f}s)")
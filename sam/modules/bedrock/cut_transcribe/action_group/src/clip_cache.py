@@ -0,0 +1,199 @@
+"""
+잘라낸 클립 캐시 (content-addressed).
+
+키 = sha256(원본 ETag, 정규화된 시작/끝, 인코딩 프로파일).
+같은 원본의 같은 장면을 같은 설정으로 다시 요청하면 Job을 제출하지 않고 기존 출력의 presigned URL을 돌려준다.
+
+  - S3ClipCacheStore: s3://<버킷>/cache/clips/<키>.json 매니페스트 (LastModified = 마지막 사용 시각)
+  - LocalClipCacheStore: 메모리 저장소 (테스트용)
+  - ClipCache.evict(): TTL이 지났거나 최대 개수를 넘은 항목(LRU)의 매니페스트만 삭제
+출력 영상/썸네일(output/, thumbnails/)은 사용자 클립이므로 캐시가 지우지 않는다 (삭제는 bucket_list API 몫).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import boto3
+
+CLIP_CACHE_PREFIX = "cache/clips/"
+CLIP_CACHE_TTL_SECONDS = int(os.getenv("CLIP_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CLIP_CACHE_MAX_ENTRIES = int(os.getenv("CLIP_CACHE_MAX_ENTRIES", "500"))
+TOUCH_INTERVAL_SECONDS = 3600      # 적중 시 마지막 사용 시각 갱신(PUT)은 이 간격 이상일 때만
+TIME_PRECISION = 3                 # 시작/끝 정규화 (밀리초)
+
+
+def make_clip_key(source_etag: str, start: float, end: float, profile: str) -> str:
+    payload = json.dumps({
+        "etag": (source_etag or "").strip('"'),
+        "start": round(float(start), TIME_PRECISION),
+        "end": round(float(end), TIME_PRECISION),
+        "profile": profile
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ===================== 저장소 =====================
+class ClipCacheStore:
+    """get/put/delete + list_entries() → [(키, 마지막 사용 시각)]"""
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put(self, cache_key: str, entry: dict):
+        raise NotImplementedError
+
+    def delete(self, cache_key: str):
+        raise NotImplementedError
+
+    def list_entries(self):
+        raise NotImplementedError
+
+
+class S3ClipCacheStore(ClipCacheStore):
+    def __init__(self, bucket: str, prefix: str = CLIP_CACHE_PREFIX, client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client or boto3.client("s3")
+
+    def _key(self, cache_key):
+        return f"{self.prefix}{cache_key}.json"
+
+    def get(self, cache_key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(cache_key))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response["Body"].read())
+
+    def put(self, cache_key, entry):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(cache_key),
+            Body=json.dumps(entry, ensure_ascii=False).encode("utf-8"),
+            ContentType="application/json"
+        )
+
+    def delete(self, cache_key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(cache_key))
+
+    def list_entries(self):
+        entries = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                name = obj["Key"][len(self.prefix):]
+                if name.endswith(".json"):
+                    entries.append((name[:-len(".json")], obj["LastModified"].timestamp()))
+        return entries
+
+
+class LocalClipCacheStore(ClipCacheStore):
+    """프로세스 내 메모리 저장소 (테스트용 stand-in)"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            return dict(entry) if entry else None
+
+    def put(self, cache_key, entry):
+        with self._lock:
+            self._entries[cache_key] = dict(entry)
+
+    def delete(self, cache_key):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+    def list_entries(self):
+        with self._lock:
+            return [(k, e.get("last_access", 0)) for k, e in self._entries.items()]
+
+
+# ===================== 캐시 =====================
+class ClipCache:
+    """
+    entry: {"output_bucket", "output_key", "output_etag", "thumbnail_key", "size",
+            "source", "start", "end", "profile", "created_at", "last_access"}
+    """
+
+    def __init__(self, store: ClipCacheStore, s3_client=None,
+                 ttl_seconds: int = CLIP_CACHE_TTL_SECONDS, max_entries: int = CLIP_CACHE_MAX_ENTRIES):
+        self.store = store
+        self.s3 = s3_client or boto3.client("s3")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def source_etag(self, bucket: str, key: str) -> Optional[str]:
+        try:
+            return self.s3.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+        except Exception as e:
+            print(f"⚠️ 원본 ETag 조회 실패 → 캐시 사용 안 함: {e}")
+            return None
+
+    def _output_etag(self, bucket, key):
+        try:
+            return self.s3.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+        except Exception:
+            return None
+
+    def lookup(self, cache_key: str) -> Optional[dict]:
+        """
+        적중하면 entry, 아니면 None.
+        만료됐거나 출력 파일이 없어졌거나 다른 요청이 같은 이름으로 덮어쓴 경우(ETag 불일치)는 미스 처리
+        """
+        entry = self.store.get(cache_key)
+        if not entry:
+            return None
+        now = time.time()
+        if now - entry.get("last_access", 0) > self.ttl_seconds:
+            self.drop(cache_key)
+            return None
+        if self._output_etag(entry["output_bucket"], entry["output_key"]) != entry.get("output_etag"):
+            self.store.delete(cache_key)
+            return None
+        if now - entry.get("last_access", 0) > TOUCH_INTERVAL_SECONDS:
+            entry["last_access"] = now
+            self.store.put(cache_key, entry)
+        return entry
+
+    def record(self, cache_key: str, output_bucket: str, output_key: str, thumbnail_key: Optional[str] = None,
+               size: Optional[int] = None, **info) -> Optional[dict]:
+        etag = self._output_etag(output_bucket, output_key)
+        if not etag:
+            return None
+        now = time.time()
+        entry = dict(info)
+        entry.update({
+            "output_bucket": output_bucket,
+            "output_key": output_key,
+            "output_etag": etag,
+            "thumbnail_key": thumbnail_key,
+            "size": size,
+            "created_at": now,
+            "last_access": now
+        })
+        self.store.put(cache_key, entry)
+        return entry
+
+    def drop(self, cache_key: str):
+        """캐시 매니페스트만 삭제 (출력 파일은 그대로 → 같은 이름을 쓰는 다른 항목/사용자 클립에 영향 없음)"""
+        self.store.delete(cache_key)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """TTL 만료 항목 + max_entries 초과분(오래 안 쓴 순) 삭제. 삭제 개수 반환"""
+        now = now or time.time()
+        entries = sorted(self.store.list_entries(), key=lambda e: e[1])
+        expired = [k for k, last_access in entries if now - last_access > self.ttl_seconds]
+        alive = [k for k, last_access in entries if now - last_access <= self.ttl_seconds]
+        overflow = alive[:max(0, len(alive) - self.max_entries)]
+        for cache_key in expired + overflow:
+            self.drop(cache_key)
+        if expired or overflow:
+            print(f"🧹 클립 캐시 정리: 만료 {len(expired)}개, 초과 {len(overflow)}개 삭제")
+        return len(expired) + len(overflow)
@@ -0,0 +1,463 @@
+"""
+영상 자르기 백엔드.
+
+  - CutBackend: 공통 인터페이스 (submit → wait)
+  - FfmpegCutBackend: 로컬 ffmpeg 스트림 복사. 정확도가 필요하면 GOP 경계 앞부분만 재인코딩(smart render)
+  - choose_backend: 클립 길이/정확도 요구/ffmpeg 유무에 따라 ffmpeg ↔ MediaConvert 선택
+  - self_check: lavfi로 만든 테스트 영상을 copy/smart/이어 붙이기로 잘라 ffprobe로 검증 (python cut_backends.py check)
+
+MediaConvert 백엔드는 각 액션 그룹 모듈(cuttranscribe.py, cutshorts.py)의 Job 함수를 감싸서 정의한다.
+입력/출력은 s3://bucket/key 또는 로컬 경로 모두 가능하므로 로컬 파일만으로 오프라인 테스트할 수 있다.
+"""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+from mp4_index import Mp4IndexError, fetch_partial_source
+
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+FFPROBE_PATH = os.getenv("FFPROBE_PATH", "ffprobe")
+LOCAL_CUT_MAX_SECONDS = float(os.getenv("LOCAL_CUT_MAX_SECONDS", "60"))  # 이보다 긴 클립은 MediaConvert
+LOCAL_CUT_WORKERS = 4
+PRESIGNED_INPUT_EXPIRE_SEC = 3600
+KEYFRAME_EPSILON = 0.05   # 이 이내면 컷 지점이 키프레임과 같다고 간주
+SEEK_NUDGE = 0.001        # 키프레임 시각으로 seek할 때 반올림으로 이전 GOP에 걸리지 않도록 살짝 뒤로
+PARTIAL_FETCH = True      # S3 원본은 moov + 구간 샘플만 Range GET으로 받아 로컬 sparse 파일로 자름
+# auto 선택에서 정확도 요구 시 smart render 사용 여부. 레이어의 ffmpeg으로 self_check가 통과한 뒤에만 켬
+# (꺼져 있으면 frame_accurate 요청은 MediaConvert 재인코딩, CUT_BACKEND=ffmpeg로 지정하면 그대로 smart)
+SMART_CUT_AUTO = os.getenv("SMART_CUT_AUTO", "false").lower() in ("true", "1", "yes")
+
+BACKEND_MEDIACONVERT = "mediaconvert"
+BACKEND_FFMPEG = "ffmpeg"
+MODE_COPY = "copy"     # 직전 키프레임부터 스트림 복사 (가장 빠름, 시작점이 GOP 단위로 앞당겨질 수 있음)
+MODE_SMART = "smart"   # 시작~첫 키프레임만 재인코딩 + 나머지 스트림 복사 (프레임 단위 정확)
+
+# smart render로 이어 붙일 수 있는 원본 (그 외 코덱은 구간 전체 재인코딩)
+SMART_VIDEO_CODECS = {"h264"}
+SMART_AUDIO_CODECS = {None, "aac"}
+# ffprobe profile 이름 → libx264 -profile:v
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+# 재인코딩한 앞부분이 원본 꼬리와 같아야 이어 붙일 수 있는 항목
+JOIN_VIDEO_FIELDS = ("codec_name", "profile", "level", "width", "height", "pix_fmt")
+JOIN_AUDIO_FIELDS = ("codec_name", "sample_rate", "channels")
+SMART_JOIN_VERSION = 3   # 이음새 방식이 바뀌면 올림 (클립 캐시 키의 profile에 포함 → 이전 방식 결과 재사용 안 함)
+
+
+class CutError(Exception):
+    pass
+
+
+class CutBackend:
+    """
+    segments: [(start_seconds, end_seconds), ...] 순서대로 이어 붙여 output 하나를 만든다.
+    submit()은 바로 handle을 반환하고, wait()은 결과 dict 또는 실패 시 None.
+    """
+
+    name = "base"
+
+    @property
+    def profile(self):
+        """출력 인코딩 설정 식별자 (클립 캐시 키에 포함)"""
+        return self.name
+
+    def submit(self, source, segments, output, thumbnail_output=None):
+        raise NotImplementedError
+
+    def wait(self, handle, timeout_seconds=300):
+        raise NotImplementedError
+
+
+def stream_mismatch(source, encoded):
+    """재인코딩 결과가 원본과 다른 항목 이름 목록 (비어 있으면 이어 붙여도 됨)"""
+    mismatch = []
+    for kind, fields in (("video", JOIN_VIDEO_FIELDS), ("audio", JOIN_AUDIO_FIELDS)):
+        expected = source.get(kind) or {}
+        actual = encoded.get(kind) or {}
+        if bool(expected) != bool(actual):
+            mismatch.append(kind)
+            continue
+        mismatch.extend(f"{kind}.{field}" for field in fields if expected and expected.get(field) != actual.get(field))
+    return mismatch
+
+
+def split_s3_uri(uri):
+    path = uri[len("s3://"):]
+    bucket, _, key = path.partition("/")
+    return bucket, key
+
+
+def ffmpeg_available(ffmpeg_path=FFMPEG_PATH, ffprobe_path=FFPROBE_PATH):
+    return bool(shutil.which(ffmpeg_path)) and bool(shutil.which(ffprobe_path))
+
+
+def choose_backend(duration_seconds, frame_accurate=False, local_available=None):
+    """
+    (백엔드, 모드) 선택.
+      - ffmpeg이 없으면 MediaConvert
+      - LOCAL_CUT_MAX_SECONDS 이하 클립은 로컬 ffmpeg (정확도 필요 시 smart, 아니면 copy)
+      - 정확도가 필요한데 SMART_CUT_AUTO가 꺼져 있으면 MediaConvert
+      - 긴 클립은 재인코딩 품질/처리량이 좋은 MediaConvert
+    """
+    if local_available is None:
+        local_available = ffmpeg_available()
+    if not local_available or duration_seconds > LOCAL_CUT_MAX_SECONDS or (frame_accurate and not SMART_CUT_AUTO):
+        return BACKEND_MEDIACONVERT, None
+    return BACKEND_FFMPEG, (MODE_SMART if frame_accurate else MODE_COPY)
+
+
+class FfmpegCutBackend(CutBackend):
+    """
+    로컬 ffmpeg 자르기 엔진.
+    S3 입력은 mp4_index로 moov + 구간 샘플만 Range GET해서 자르고, 안 되면 presigned URL로 넘긴다 (원본 전체 다운로드 없음).
+    """
+
+    name = BACKEND_FFMPEG
+    _executor = ThreadPoolExecutor(max_workers=LOCAL_CUT_WORKERS)
+
+    def __init__(self, mode=MODE_COPY, ffmpeg_path=FFMPEG_PATH, ffprobe_path=FFPROBE_PATH,
+                 work_dir=None, s3_client=None, keyframe_index=None):
+        self.mode = mode
+        self.keyframe_index = keyframe_index   # keyframe_index.KeyframeIndex (있으면 ffprobe 생략)
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+        self.work_dir = work_dir or tempfile.gettempdir()
+        self._s3 = s3_client
+        self._s3_lock = threading.Lock()
+        self._stream_params = {}   # 입력 → probe_streams 결과 (구간마다 다시 probe하지 않음)
+
+    # ---------- 인터페이스 ----------
+    @property
+    def profile(self):
+        if self.mode == MODE_SMART:
+            return f"{self.name}:{self.mode}:v{SMART_JOIN_VERSION}"
+        return f"{self.name}:{self.mode}"
+
+    def submit(self, source, segments, output, thumbnail_output=None):
+        return self._executor.submit(self.cut, source, segments, output, thumbnail_output)
+
+    def wait(self, handle, timeout_seconds=300):
+        try:
+            return handle.result(timeout=timeout_seconds)
+        except Exception as e:
+            print(f"❌ ffmpeg 자르기 실패: {e}")
+            return None
+
+    # ---------- 본체 ----------
+    def cut(self, source, segments, output, thumbnail_output=None):
+        """
+        동기 실행. {"output", "size", "thumbnail", "backend", "mode"} 반환
+        """
+        if not segments:
+            raise CutError("segments가 비어 있음")
+
+        job_dir = os.path.join(self.work_dir, f"cut_{uuid.uuid4().hex[:12]}")
+        os.makedirs(job_dir, exist_ok=True)
+        try:
+            input_url = self.resolve_input(source, segments, job_dir)
+            parts = []
+            for i, (start, end) in enumerate(segments):
+                if end <= start:
+                    continue
+                part_path = os.path.join(job_dir, f"segment_{i:03d}.mp4")
+                self.cut_segment(input_url, start, end, part_path, job_dir)
+                parts.append(part_path)
+            if not parts:
+                raise CutError("유효한 구간이 없음")
+
+            local_out = output if not output.startswith("s3://") else os.path.join(job_dir, "output.mp4")
+            if len(parts) == 1:
+                shutil.move(parts[0], local_out)
+            elif self.mode == MODE_SMART:
+                # 구간마다 재인코딩한 앞부분이 섞여 있으므로 파라미터 세트를 샘플마다 싣는 경로로 연결
+                self.concat_bitstream(parts, local_out, job_dir)
+            else:
+                self.concat(parts, local_out, job_dir)
+
+            thumbnail = None
+            if thumbnail_output:
+                local_thumb = thumbnail_output if not thumbnail_output.startswith("s3://") else os.path.join(job_dir, "thumb.jpg")
+                self.run([self.ffmpeg_path, "-y", "-v", "error", "-i", local_out,
+                          "-frames:v", "1", "-q:v", "3", local_thumb])
+                thumbnail = self.store_output(local_thumb, thumbnail_output, "image/jpeg")
+
+            size = os.path.getsize(local_out)
+            stored = self.store_output(local_out, output, "video/mp4")
+            print(f"✅ ffmpeg 자르기 완료 ({self.mode}): {stored} ({size:,} bytes)")
+            return {"output": stored, "size": size, "thumbnail": thumbnail, "backend": self.name, "mode": self.mode}
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def cut_segment(self, input_url, start, end, out_path, job_dir):
+        if self.mode == MODE_SMART:
+            self.smart_cut(input_url, start, end, out_path, job_dir)
+        else:
+            self.copy_cut(input_url, start, end, out_path)
+
+    def copy_cut(self, input_url, start, end, out_path):
+        # -ss를 입력 앞에 두면 직전 키프레임으로 seek → 스트림 복사 가능
+        # 인덱스가 있으면 시작점을 그 키프레임으로 명시해서 끝 지점이 밀리지 않게 함
+        if self.keyframe_index is not None:
+            keyframe = self.keyframe_index.keyframe_at_or_before(start + KEYFRAME_EPSILON)
+            if keyframe is not None:
+                start = keyframe
+        self.run([self.ffmpeg_path, "-y", "-v", "error",
+                  "-ss", f"{start + SEEK_NUDGE:.6f}", "-i", input_url, "-t", f"{end - start - SEEK_NUDGE:.6f}",
+                  "-map", "0:v:0", "-map", "0:a?", "-c", "copy",
+                  "-avoid_negative_ts", "make_zero", "-movflags", "+faststart", out_path])
+
+    def smart_cut(self, input_url, start, end, out_path, job_dir):
+        """
+        [start, 첫 키프레임) 구간만 원본과 같은 profile/level/해상도/픽셀 포맷으로 재인코딩하고
+        [첫 키프레임, end]는 스트림 복사한 뒤 Annex B 비트스트림으로 이어 붙인다 (이음새에 SPS/PPS 포함).
+        원본이 H.264/AAC가 아니거나 재인코딩 결과가 원본과 다르면 구간 전체를 재인코딩 (이음새 없음)
+        """
+        source = self.source_streams(input_url)
+        video = source.get("video") or {}
+        audio = source.get("audio") or {}
+        if video.get("codec_name") not in SMART_VIDEO_CODECS or audio.get("codec_name") not in SMART_AUDIO_CODECS \
+                or video.get("profile") not in X264_PROFILES:
+            # 스트림 복사 부분을 섞지 않음 → 모든 구간이 같은 설정의 H.264라 구간끼리도 이어 붙일 수 있음
+            print(f"ℹ️ smart render 불가 (video={video.get('codec_name')}/{video.get('profile')}, "
+                  f"audio={audio.get('codec_name')}) → 구간 전체 재인코딩")
+            self.encode_cut(input_url, start, end, out_path)
+            return
+
+        keyframe = self.next_keyframe(input_url, start, end)
+        if keyframe is None or keyframe >= end - KEYFRAME_EPSILON:
+            # 구간 안에 키프레임이 없으면 짧은 구간 전체를 재인코딩
+            self.encode_cut(input_url, start, end, out_path, match=source)
+            return
+        if keyframe - start <= KEYFRAME_EPSILON:
+            self.copy_cut(input_url, keyframe, end, out_path)
+            return
+
+        head_path = os.path.join(job_dir, f"head_{uuid.uuid4().hex[:8]}.mp4")
+        tail_path = os.path.join(job_dir, f"tail_{uuid.uuid4().hex[:8]}.mp4")
+        self.encode_cut(input_url, start, keyframe, head_path, match=source)
+        mismatch = stream_mismatch(source, self.probe_streams(head_path))
+        if mismatch:
+            print(f"ℹ️ 재인코딩 앞부분이 원본과 다름 ({', '.join(mismatch)}) → 구간 전체 재인코딩")
+            self.encode_cut(input_url, start, end, out_path, match=source)
+            return
+        self.copy_cut(input_url, keyframe, end, tail_path)
+        self.concat_bitstream([head_path, tail_path], out_path, job_dir)
+
+    def encode_cut(self, input_url, start, end, out_path, match=None):
+        """
+        구간 재인코딩. match(probe_streams 결과)를 주면 원본 스트림과 같은 profile/level/해상도/픽셀 포맷,
+        같은 샘플레이트/채널로 인코딩해 스트림 복사한 부분과 이어 붙일 수 있게 한다
+        """
+        video = (match or {}).get("video") or {}
+        audio = (match or {}).get("audio") or {}
+        video_args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+                      "-pix_fmt", video.get("pix_fmt") or "yuv420p"]
+        if video.get("profile") in X264_PROFILES:
+            video_args += ["-profile:v", X264_PROFILES[video["profile"]]]
+        if isinstance(video.get("level"), int) and video["level"] > 0:
+            video_args += ["-level:v", f"{video['level'] / 10:.1f}"]
+        audio_args = ["-c:a", "aac", "-b:a", "128k"]
+        if audio.get("sample_rate"):
+            audio_args += ["-ar", str(audio["sample_rate"])]
+        if audio.get("channels"):
+            audio_args += ["-ac", str(audio["channels"])]
+        self.run([self.ffmpeg_path, "-y", "-v", "error",
+                  "-ss", f"{start:.6f}", "-i", input_url, "-t", f"{end - start:.6f}",
+                  "-map", "0:v:0", "-map", "0:a?", *video_args, *audio_args,
+                  "-movflags", "+faststart", out_path])
+
+    def source_streams(self, input_url):
+        if input_url not in self._stream_params:
+            self._stream_params[input_url] = self.probe_streams(input_url)
+        return self._stream_params[input_url]
+
+    def probe_streams(self, path):
+        """첫 비디오/오디오 스트림의 코덱 파라미터 → {"video": {...}, "audio": {...} 또는 None}"""
+        output = self.run([self.ffprobe_path, "-v", "error",
+                           "-show_entries", "stream=codec_type,codec_name,profile,level,width,height,pix_fmt,sample_rate,channels",
+                           "-of", "json", path])
+        streams = {"video": None, "audio": None}
+        for stream in json.loads(output or "{}").get("streams", []):
+            kind = stream.get("codec_type")
+            if kind in streams and streams[kind] is None:
+                if stream.get("sample_rate"):
+                    stream["sample_rate"] = int(stream["sample_rate"])
+                streams[kind] = stream
+        return streams
+
+    def concat_bitstream(self, parts, out_path, job_dir):
+        """
+        각 파트를 h264_mp4toannexb로 다시 감싸 SPS/PPS를 키프레임마다 샘플 안에 싣고(in-band) concat demuxer로 잇는다.
+        이음새에서 디코더가 뒷부분의 파라미터 세트로 다시 설정됨
+        (그냥 concat demuxer -c copy는 첫 파일의 extradata만 써서 뒷부분 파라미터 세트가 빠짐.
+         MPEG-TS 경유는 정적 빌드 ffmpeg에서 TS demux가 죽는 경우가 있어 MP4로 유지)
+        """
+        inband_parts = []
+        for part in parts:
+            inband_path = os.path.join(job_dir, f"{os.path.splitext(os.path.basename(part))[0]}_{uuid.uuid4().hex[:8]}.mp4")
+            self.run([self.ffmpeg_path, "-y", "-v", "error", "-i", part, "-map", "0", "-c", "copy",
+                      "-bsf:v", "h264_mp4toannexb", inband_path])
+            inband_parts.append(inband_path)
+        list_path = os.path.join(job_dir, f"concat_{uuid.uuid4().hex[:8]}.txt")
+        with open(list_path, "w") as f:
+            for part in inband_parts:
+                f.write(f"file '{part}'\n")
+        self.run([self.ffmpeg_path, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+                  "-map", "0", "-c", "copy", "-movflags", "+faststart", out_path])
+
+    def concat(self, parts, out_path, job_dir):
+        list_path = os.path.join(job_dir, f"concat_{uuid.uuid4().hex[:8]}.txt")
+        with open(list_path, "w") as f:
+            for part in parts:
+                f.write(f"file '{part}'\n")
+        self.run([self.ffmpeg_path, "-y", "-v", "error", "-f", "concat", "-safe", "0",
+                  "-i", list_path, "-c", "copy", "-movflags", "+faststart", out_path])
+
+    def next_keyframe(self, input_url, start, end):
+        """
+        start 이후 첫 키프레임 시각. 인덱스가 있으면 O(log n) 조회, 없으면 ffprobe (키프레임 패킷만 읽음). 없으면 None
+        """
+        if self.keyframe_index is not None:
+            return self.keyframe_index.keyframe_at_or_after(start - KEYFRAME_EPSILON)
+        output = self.run([self.ffprobe_path, "-v", "error", "-select_streams", "v:0",
+                           "-skip_frame", "nokey", "-show_entries", "frame=best_effort_timestamp_time",
+                           "-read_intervals", f"{max(0.0, start - 1):.3f}%{end:.3f}",
+                           "-of", "csv=p=0", input_url])
+        for line in output.splitlines():
+            line = line.strip().rstrip(",")
+            try:
+                ts = float(line)
+            except ValueError:
+                continue
+            if ts >= start - KEYFRAME_EPSILON:
+                return ts
+        return None
+
+    # ---------- 입출력 ----------
+    def s3(self):
+        with self._s3_lock:
+            if self._s3 is None:
+                self._s3 = boto3.client("s3")
+            return self._s3
+
+    def resolve_input(self, source, segments=None, job_dir=None):
+        """
+        로컬 경로는 그대로. S3는 가능하면 구간만 담은 부분 다운로드 파일,
+        실패(fragmented MP4 등)하면 presigned URL (ffmpeg이 HTTP Range로 읽음)
+        """
+        if not source.startswith("s3://"):
+            if not os.path.exists(source):
+                raise CutError(f"입력 파일 없음: {source}")
+            return source
+        if PARTIAL_FETCH and segments and job_dir:
+            try:
+                stats = fetch_partial_source(source, segments, os.path.join(job_dir, "source_partial.mp4"), self.s3())
+                print(f"📥 부분 다운로드: {stats['bytes_fetched']:,} / {stats['file_size']:,} bytes ({stats['ranges']}개 Range)")
+                return stats["path"]
+            except Mp4IndexError as e:
+                print(f"⚠️ 부분 다운로드 불가 → presigned URL 사용: {e}")
+        bucket, key = split_s3_uri(source)
+        return self.s3().generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=PRESIGNED_INPUT_EXPIRE_SEC
+        )
+
+    def store_output(self, local_path, destination, content_type):
+        if not destination.startswith("s3://"):
+            return destination
+        bucket, key = split_s3_uri(destination)
+        self.s3().upload_file(local_path, bucket, key, ExtraArgs={"ContentType": content_type})
+        return destination
+
+    def run(self, cmd):
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise CutError(f"{os.path.basename(cmd[0])} 실패 ({result.returncode}): {result.stderr.strip()[-500:]}")
+        return result.stdout
+
+
+# ---------- 오프라인 검증 ----------
+CHECK_FPS = 30
+CHECK_GOP_SECONDS = 2.0
+CHECK_SOURCE_SECONDS = 12
+# 구간당 허용 오차: 스트림 복사의 끝은 패킷 단위라 B-frame 재정렬 깊이만큼(2~3프레임) 더 들어가고
+# 첫 pts 오프셋(B-frame 지연)도 컨테이너 길이에 포함됨
+CHECK_DURATION_TOLERANCE = 0.2   # 초
+CHECK_FRAME_TOLERANCE = 3
+
+
+def probe_cut(backend, path):
+    """
+    결과 파일 → (길이, 비디오 프레임 수). ffprobe -count_frames로 모든 스트림을 끝까지 디코딩하고
+    디코더 오류가 하나라도 찍히면 CutError (ffmpeg -f null은 이음새의 타임스탬프 반올림 경고까지 섞여서 쓰지 않음)
+    """
+    result = subprocess.run([backend.ffprobe_path, "-v", "error", "-count_frames",
+                             "-show_entries", "format=duration:stream=codec_type,nb_read_frames", "-of", "json", path],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0 or result.stderr.strip():
+        raise CutError(f"디코딩 오류 {os.path.basename(path)}: {result.stderr.strip()[-500:]}")
+    info = json.loads(result.stdout)
+    frames = [int(s.get("nb_read_frames") or 0) for s in info.get("streams", []) if s.get("codec_type") == "video"]
+    if not frames or not frames[0]:
+        raise CutError(f"비디오 프레임 없음 {os.path.basename(path)}")
+    return float(info["format"]["duration"]), frames[0]
+
+
+def self_check(ffmpeg_path=FFMPEG_PATH, ffprobe_path=FFPROBE_PATH, work_dir=None):
+    """
+    lavfi 테스트 영상(H.264 High, GOP 2초 + AAC)을 copy_cut / smart_cut / 여러 구간 smart(concat_bitstream)로 잘라
+    모두 오류 없이 디코딩되고 길이/프레임 수가 기대값과 맞는지 확인. 결과 목록 반환, 실패하면 CutError
+    """
+    work_dir = tempfile.mkdtemp(prefix="cut_check_", dir=work_dir)
+    try:
+        source = os.path.join(work_dir, "source.mp4")
+        gop = int(CHECK_FPS * CHECK_GOP_SECONDS)
+        FfmpegCutBackend(ffmpeg_path=ffmpeg_path, ffprobe_path=ffprobe_path).run([
+            ffmpeg_path, "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate={CHECK_FPS}:duration={CHECK_SOURCE_SECONDS}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={CHECK_SOURCE_SECONDS}",
+            "-c:v", "libx264", "-profile:v", "high", "-pix_fmt", "yuv420p", "-g", str(gop), "-keyint_min", str(gop),
+            "-sc_threshold", "0", "-c:a", "aac", "-ac", "2", "-movflags", "+faststart", source])
+
+        # (이름, 모드, 구간, 기대 길이) — copy는 키프레임에서 시작하는 구간만 (앞당겨지지 않음)
+        cases = [
+            ("copy", MODE_COPY, [(2.0, 6.0)], 4.0),
+            ("smart", MODE_SMART, [(2.5, 7.0)], 4.5),
+            ("smart_concat", MODE_SMART, [(0.7, 3.3), (5.2, 8.9)], 2.6 + 3.7),
+        ]
+        results = []
+        for name, mode, segments, expected in cases:
+            backend = FfmpegCutBackend(mode=mode, ffmpeg_path=ffmpeg_path, ffprobe_path=ffprobe_path, work_dir=work_dir)
+            output = os.path.join(work_dir, f"{name}.mp4")
+            backend.cut(source, segments, output)
+            duration, frames = probe_cut(backend, output)
+            expected_frames = round(expected * CHECK_FPS)
+            if abs(duration - expected) > CHECK_DURATION_TOLERANCE * len(segments) \
+                    or abs(frames - expected_frames) > CHECK_FRAME_TOLERANCE * len(segments):
+                raise CutError(f"{name}: 길이 {duration:.3f}s / {frames}프레임 "
+                               f"(기대 {expected:.3f}s / {expected_frames}프레임)")
+            results.append({"case": name, "duration": duration, "frames": frames, "expected": expected})
+            print(f"✅ {name}: {duration:.3f}s, {frames}프레임 (기대 {expected:.3f}s)")
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # 오프라인 검증: python cut_backends.py check [ffmpeg 경로] [ffprobe 경로]
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "check":
+        print("usage: python cut_backends.py check [ffmpeg] [ffprobe]")
+        sys.exit(1)
+    try:
+        self_check(*(sys.argv[2:4]))
+    except CutError as e:
+        print(f"❌ 검증 실패: {e}")
+        sys.exit(1)
+    print("✅ copy / smart / concat_bitstream 검증 통과")
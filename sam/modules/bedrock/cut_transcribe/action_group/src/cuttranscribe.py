@@ -3,9 +3,28 @@ import boto3
 import os
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Optional
 
+from cut_backends import (
+    BACKEND_FFMPEG,
+    BACKEND_MEDIACONVERT,
+    MODE_COPY,
+    MODE_SMART,
+    CutBackend,
+    FfmpegCutBackend,
+    choose_backend,
+    ffmpeg_available,
+)
+from clip_cache import ClipCache, S3ClipCacheStore, make_clip_key
+from clip_manifest import build_manifest, manifest_block, manifest_clip, manifest_key, write_manifest
+from job_status import get_job_status_store
+from scene_plan import DEFAULT_GAP_TOLERANCE, encoded_seconds, plan_scenes
+from keyframe_index import DEFAULT_FPS, load_keyframe_index, source_etag_of
+from thumbnailer import extract_thumbnail, thumbnailer_available
+
 # ===================== 하드코딩된 설정값 =====================
 VIDEO_BUCKET = "video-input-pipeline-20250724"
 SOURCE_BUCKET_DEFAULT = VIDEO_BUCKET
@@ -15,12 +34,68 @@ THUMBNAIL_PREFIX = "thumbnails/"
 PRESIGNED_EXPIRE_SEC = 3600
 THUMBNAIL_ENABLED = True
 THUMBNAIL_TIME = 1
+THUMBNAIL_WIDTH = None   # 썸네일 폭 (None이면 원본 크기)
 MEDIACONVERT_ROLE_ARN = "arn:aws:iam::567279714866:role/MediaConvertServiceRole"
+MEDIACONVERT_REGION = "ap-northeast-2"
+
+# 장면 병렬 처리: 모든 장면의 Job을 먼저 제출한 뒤 동시에 완료를 기다림
+PARALLEL_SCENE_JOBS = True
+MAX_PARALLEL_SCENES = 10
+
+# 장면 계획: 겹치거나 SCENE_MERGE_GAP초 이내로 붙은 장면은 하나로 합쳐서 한 번만 인코딩
+SCENE_PLANNING_ENABLED = True
+SCENE_MERGE_GAP = DEFAULT_GAP_TOLERANCE
+
+# 썸네일은 최종 키(thumbnails/<장면>.jpg)에 바로 기록 (LIST/COPY/DELETE, 썸네일용 영상 인코딩 없음)
+#  - ffmpeg 사용 가능: 잘라낸 클립에서 가장 가까운 키프레임 1장만 디코딩해 바로 업로드 (thumbnailer)
+#  - 그 외: 자르기 Job의 프레임 캡처 출력 thumbnails/<이름>.0000000.jpg를 그대로 썸네일로 사용
+#    (MediaConvert가 붙이는 번호는 바꿀 수 없음. bucket_list/카탈로그/프론트는 이 이름도 클립 썸네일로 인식)
+THUMBNAIL_FROM_CLIP = True
+FRAME_CAPTURE_INDEX_SUFFIX = ".0000000.jpg"
+
+# 자르기 백엔드: auto(짧은 클립은 로컬 ffmpeg, 나머지 MediaConvert) | mediaconvert | ffmpeg
+CUT_BACKEND = os.getenv("CUT_BACKEND", "auto")
+# 응답의 processing_method 표기 (캐시 적중 장면은 "cache")
+PROCESSING_METHOD_NAMES = {BACKEND_MEDIACONVERT: "MediaConvert", BACKEND_FFMPEG: "ffmpeg", "cache": "clip cache"}
+
+# 클립 캐시: 같은 원본(ETag)·구간·인코딩 설정이면 Job 없이 기존 출력 재사용
+CLIP_CACHE_ENABLED = True
+CLIP_CACHE_EVICT_INTERVAL = 3600   # 컨테이너당 캐시 정리(LRU/TTL) 주기 (초)
+MEDIACONVERT_PROFILE = "mediaconvert:h264-qvbr8-aac128"  # cut_video_with_mediaconvert 인코딩 설정이 바뀌면 같이 변경
+
+# ===================== AWS 클라이언트 =====================
+_client_lock = threading.Lock()
+_clients = {}
 
-# 인덱스 패턴 (media_th.py에서 가져옴)
-INDEXED_JPG_PATTERN = re.compile(r'^([^/]+?)\.(\d+)\.jpg$', re.IGNORECASE)
+def get_client(service_name: str, region_name: Optional[str] = None):
+    """
+    boto3 클라이언트를 캐시해서 재사용.
+    클라이언트 자체는 스레드 안전하지만 생성은 그렇지 않으므로 lock 안에서 생성한다.
+    """
+    cache_key = (service_name, region_name)
+    with _client_lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            if region_name:
+                client = boto3.client(service_name, region_name=region_name)
+            else:
+                client = boto3.client(service_name)
+            _clients[cache_key] = client
+        return client
 
 # ===================== 유틸리티 함수 =====================
+def parse_merge_gap(value) -> float:
+    """에이전트 파라미터 merge_gap(초) → 0 이상 실수. 비었거나 잘못된 값이면 SCENE_MERGE_GAP"""
+    try:
+        gap = float(value)
+    except (TypeError, ValueError):
+        print(f"⚠️ merge_gap 값 무시: {value!r} → {SCENE_MERGE_GAP}")
+        return SCENE_MERGE_GAP
+    if gap != gap or gap < 0 or gap == float("inf"):
+        print(f"⚠️ merge_gap 값 무시: {value!r} → {SCENE_MERGE_GAP}")
+        return SCENE_MERGE_GAP
+    return gap
+
 def ensure_prefix(p: str) -> str:
     return p if p.endswith("/") else (p + "/")
 
@@ -44,13 +119,19 @@ def seconds_to_time_format(seconds):
     s = int(seconds % 60)
     return f"{h:02d}:{m:02d}:{s:02d}"
 
-def seconds_to_timecode(seconds, fps=29.97):
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    # 프레임을 0으로 고정하여 더 안전하게 처리
-    frames = 0
-    # 더 안전한 형식: HH:MM:SS:FF
+def seconds_to_timecode(seconds, fps=DEFAULT_FPS):
+    """
+    초 → HH:MM:SS:FF. 소수 초는 fps 기준 프레임 번호로 변환 (키프레임 인덱스의 fps 사용)
+    """
+    timebase = max(1, int(round(fps)))
+    seconds = max(0.0, seconds)
+    whole = int(seconds)
+    frames = int(round((seconds - whole) * fps))
+    if frames >= timebase:
+        whole, frames = whole + 1, 0
+    hours = whole // 3600
+    minutes = (whole % 3600) // 60
+    secs = whole % 60
     return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
 
 def error_json(msg, action_group="default", function_name="default", details=None):
@@ -141,7 +222,7 @@ def extract_source_from_prompt(prompt_text: str):
     return SOURCE_BUCKET_DEFAULT, f"{DEFAULT_PREFIX}video.mp4"
 
 def s3_key_exists(bucket: str, key: str) -> bool:
-    s3 = boto3.client("s3")
+    s3 = get_client("s3")
     try:
         s3.head_object(Bucket=bucket, Key=key)
         return True
@@ -150,7 +231,7 @@ def s3_key_exists(bucket: str, key: str) -> bool:
         return False
 
 def generate_presigned_url(bucket, key, expiration):
-    s3 = boto3.client("s3")
+    s3 = get_client("s3")
     try:
         return s3.generate_presigned_url(
             "get_object",
@@ -162,17 +243,51 @@ def generate_presigned_url(bucket, key, expiration):
         return None
 
 # ===================== MediaConvert 관련 함수 =====================
-def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, duration_seconds, output_filename):
+def build_frame_capture_output_group(destination):
+    """
+    자르기 Job에 함께 붙이는 썸네일(FRAME_CAPTURE) 출력 그룹.
+    destination에 파일명까지 지정하므로 결과는 <destination>.0000000.jpg (클립 첫 프레임 1장)
+    """
+    return {
+        "Name": "Thumbnail",
+        "OutputGroupSettings": {
+            "Type": "FILE_GROUP_SETTINGS",
+            "FileGroupSettings": {
+                "Destination": destination
+            }
+        },
+        "Outputs": [
+            {
+                "Extension": "jpg",
+                "ContainerSettings": {"Container": "RAW"},
+                "VideoDescription": {
+                    "CodecSettings": {
+                        "Codec": "FRAME_CAPTURE",
+                        "FrameCaptureSettings": {
+                            "FramerateNumerator": 1,
+                            "FramerateDenominator": 1,
+                            "MaxCaptures": 1,
+                            "Quality": 80
+                        }
+                    }
+                }
+            }
+        ]
+    }
+
+def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, duration_seconds, output_filename, thumbnail_s3_base=None, fps=DEFAULT_FPS):
+    """
+    장면 하나를 자르는 MediaConvert Job 생성.
+    thumbnail_s3_base(확장자 없는 s3 경로)를 주면 같은 Job에 썸네일 출력 그룹을 추가해
+    입력 프로빙/큐 대기를 한 번으로 줄인다.
+    """
     print(f"🎬 MediaConvert 영상 자르기 시작: {start_seconds}s ~ {start_seconds + duration_seconds}s")
     
-    mediaconvert = boto3.client('mediaconvert', region_name='ap-northeast-2')
+    mediaconvert = get_client('mediaconvert', MEDIACONVERT_REGION)
     
     # 시간 코드 변환
-    start_timecode = seconds_to_timecode(start_seconds)
-    end_timecode = seconds_to_timecode(start_seconds + duration_seconds)
-    
-    # 출력 파일명에서 확장자 제거
-    base_filename = output_filename.replace('.mp4', '')
+    start_timecode = seconds_to_timecode(start_seconds, fps)
+    end_timecode = seconds_to_timecode(start_seconds + duration_seconds, fps)
     
     job_settings = {
         "TimecodeConfig": {
@@ -184,8 +299,8 @@ def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, dura
                 "TimecodeSource": "ZEROBASED",
                 "InputClippings": [
                     {
-                        "StartTimecode": seconds_to_timecode(start_seconds),
-                        "EndTimecode": seconds_to_timecode(start_seconds + duration_seconds)
+                        "StartTimecode": start_timecode,
+                        "EndTimecode": end_timecode
                     }
                 ],
                 "AudioSelectors": {
@@ -201,12 +316,12 @@ def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, dura
                 "OutputGroupSettings": {
                     "Type": "FILE_GROUP_SETTINGS",
                     "FileGroupSettings": {
-                        "Destination": output_s3_uri.replace(f"/{output_filename}", "/")
+                        # 파일명까지 지정 → build_output_names의 이름(<base>_<s>s-<e>s.mp4) 그대로 생성
+                        "Destination": output_s3_uri[:-len(".mp4")] if output_s3_uri.endswith(".mp4") else output_s3_uri
                     }
                 },
                 "Outputs": [
                     {
-                        "NameModifier": f"_{int(start_seconds)}s-{int(start_seconds + duration_seconds)}s",
                         "VideoDescription": {
                             "CodecSettings": {
                                 "Codec": "H_264",
@@ -259,6 +374,9 @@ def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, dura
         ]
     }
     
+    if thumbnail_s3_base:
+        job_settings["OutputGroups"].append(build_frame_capture_output_group(thumbnail_s3_base))
+    
     try:
         response = mediaconvert.create_job(
             Role=MEDIACONVERT_ROLE_ARN,
@@ -267,7 +385,8 @@ def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, dura
             UserMetadata={
                 'start_time': str(start_seconds),
                 'duration': str(duration_seconds),
-                'output_filename': output_filename
+                'output_filename': output_filename,
+                'with_thumbnail': 'true' if thumbnail_s3_base else 'false'
             }
         )
         
@@ -279,9 +398,39 @@ def cut_video_with_mediaconvert(input_s3_uri, output_s3_uri, start_seconds, dura
         print(f"❌ MediaConvert Job 생성 실패: {e}")
         return False, None
 
+def get_mediaconvert_job_status(job_id):
+    """
+    mediaconvert.get_job으로 현재 상태 조회 (이벤트 유실 시 보정용)
+    """
+    mediaconvert = get_client('mediaconvert', MEDIACONVERT_REGION)
+    try:
+        job = mediaconvert.get_job(Id=job_id)['Job']
+        return {"status": job['Status'], "error_message": job.get('ErrorMessage')}
+    except Exception as e:
+        print(f"⚠️ MediaConvert Job 상태 조회 실패: {e}")
+        return None
+
 def wait_for_mediaconvert_job(job_id, timeout_seconds=300):
     print(f"⏳ MediaConvert Job 완료 대기: {job_id}")
-    mediaconvert = boto3.client('mediaconvert', region_name='ap-northeast-2')
+    
+    # 1) 이벤트 기반: job_events Lambda가 기록한 상태를 ~1초 간격으로 확인
+    store = get_job_status_store()
+    if store is not None:
+        try:
+            record = store.wait(job_id, timeout_seconds, reconcile=lambda: get_mediaconvert_job_status(job_id))
+            if record is None:
+                print(f"⏰ MediaConvert Job 타임아웃: {job_id}")
+                return False
+            if record["status"] == 'COMPLETE':
+                print(f"✅ MediaConvert Job 완료: {job_id}")
+                return True
+            print(f"❌ MediaConvert Job 실패: {record.get('error_message') or record['status']}")
+            return False
+        except Exception as e:
+            print(f"⚠️ Job 상태 테이블 조회 실패, get_job 폴링으로 전환: {e}")
+    
+    # 2) 상태 테이블이 없거나 조회 실패 시 기존 get_job 폴링
+    mediaconvert = get_client('mediaconvert', MEDIACONVERT_REGION)
     
     start_time = time.time()
     while time.time() - start_time < timeout_seconds:
@@ -310,183 +459,285 @@ def wait_for_mediaconvert_job(job_id, timeout_seconds=300):
     print(f"⏰ MediaConvert Job 타임아웃: {job_id}")
     return False
 
-def generate_thumbnail_with_mediaconvert(input_s3_uri, output_s3_uri, timestamp_seconds, output_filename, original_video_base_name):
-    if not THUMBNAIL_ENABLED:
-        return False, None
-    
-    print(f"🖼️ MediaConvert 썸네일 생성: {timestamp_seconds}s")
-    
-    mediaconvert = boto3.client('mediaconvert', region_name='ap-northeast-2')
+# ===================== 자르기 백엔드 =====================
+class MediaConvertCutBackend(CutBackend):
+    """
+    cut_video_with_mediaconvert / wait_for_mediaconvert_job을 CutBackend 인터페이스로 감싼 것.
+    thumbnail_output을 주면 같은 Job의 프레임 캡처로 <thumbnail_output 확장자 제외>.0000000.jpg 생성
+    """
+    name = BACKEND_MEDIACONVERT
+    profile = MEDIACONVERT_PROFILE
     
-    # 시간 코드 변환
-    thumbnail_timecode = seconds_to_timecode(timestamp_seconds)
+    def __init__(self, fps=DEFAULT_FPS):
+        self.fps = fps
     
-    # 출력 파일명에서 확장자 제거
-    scene_specific_base_name = output_filename.replace('.jpg', '') # e.g., soccer_16s-40s
+    def submit(self, source, segments, output, thumbnail_output=None):
+        start, end = segments[0]
+        success, job_id = cut_video_with_mediaconvert(
+            source,
+            output,
+            start,
+            end - start,
+            os.path.basename(output),
+            thumbnail_s3_base=thumbnail_output[:-len(".jpg")] if thumbnail_output else None,
+            fps=self.fps
+        )
+        return job_id if success else None
     
-    # NameModifier는 원본 비디오 파일명 뒤에 붙으므로, 
-    # scene_specific_base_name에서 original_video_base_name을 제거한 나머지를 사용
-    # 예: soccer_10s-35s에서 soccer를 제거하면 _10s-35s가 됨
-    if scene_specific_base_name.startswith(original_video_base_name):
-        name_modifier_suffix = scene_specific_base_name[len(original_video_base_name):]
+    def wait(self, handle, timeout_seconds=300):
+        if handle and wait_for_mediaconvert_job(handle, timeout_seconds):
+            return {"output": None, "size": None, "thumbnail": None, "backend": self.name, "job_id": handle}
+        return None
+
+def select_cut_backend(duration_seconds, frame_accurate=False, keyframe_index=None):
+    """
+    CUT_BACKEND 설정과 클립 길이/정확도 요구에 따라 백엔드 인스턴스 선택.
+    keyframe_index가 있으면 ffmpeg은 키프레임 조회에, MediaConvert는 타임코드 fps에 사용
+    """
+    fps = keyframe_index.fps if keyframe_index else DEFAULT_FPS
+    if CUT_BACKEND == BACKEND_MEDIACONVERT:
+        return MediaConvertCutBackend(fps)
+    if CUT_BACKEND == BACKEND_FFMPEG:
+        local_ok = ffmpeg_available()
+        name, mode = (BACKEND_FFMPEG, MODE_SMART if frame_accurate else MODE_COPY) if local_ok else (BACKEND_MEDIACONVERT, None)
     else:
-        name_modifier_suffix = f"_{scene_specific_base_name}"
+        name, mode = choose_backend(duration_seconds, frame_accurate)
     
-    # S3 URI에서 버킷과 프리픽스 추출 (더 안전한 방법)
-    uri_parts = output_s3_uri.replace('s3://', '').split('/')
-    output_bucket = uri_parts[0]  # bucket
-    out_prefix = '/'.join(uri_parts[1:-1]) + '/' if len(uri_parts) > 2 else ''  # prefix/
-    
-    job_settings = {
-        "TimecodeConfig": {
-            "Source": "ZEROBASED"
-        },
-        "Inputs": [
-            {
-                "FileInput": input_s3_uri,
-                "TimecodeSource": "ZEROBASED",
-                "InputClippings": [
-                    {
-                        "StartTimecode": thumbnail_timecode,
-                        "EndTimecode": seconds_to_timecode(timestamp_seconds + 0.1)
-                    }
-                ]
-            }
-        ],
-        "OutputGroups": [
-            # 임시 비디오 출력 (MediaConvert 요구사항)
-            {
-                "Name": "File Group",
-                "OutputGroupSettings": {
-                    "Type": "FILE_GROUP_SETTINGS",
-                    "FileGroupSettings": {
-                        "Destination": f"s3://{output_bucket}/{out_prefix}"
-                    }
-                },
-                "Outputs": [
-                    {
-                        "NameModifier": f"_{int(timestamp_seconds)}s",
-                        "VideoDescription": {
-                            "CodecSettings": {
-                                "Codec": "H_264",
-                                "H264Settings": {
-                                    "RateControlMode": "QVBR",
-                                    "QvbrSettings": {
-                                        "QvbrQualityLevel": 8
-                                    },
-                                    "MaxBitrate": 5000000,
-                                    "AdaptiveQuantization": "HIGH",
-                                    "EntropyEncoding": "CABAC",
-                                    "FramerateControl": "INITIALIZE_FROM_SOURCE",
-                                    "FramerateConversionAlgorithm": "DUPLICATE_DROP",
-                                    "CodecProfile": "MAIN",
-                                    "SlowPal": "DISABLED",
-                                    "SpatialAdaptiveQuantization": "ENABLED",
-                                    "Syntax": "DEFAULT",
-                                    "TemporalAdaptiveQuantization": "ENABLED"
-                                }
-                            }
-                        },
-                        "AudioDescriptions": [],
-                        "ContainerSettings": {
-                            "Container": "MP4",
-                            "Mp4Settings": {
-                                "CslgAtom": "INCLUDE",
-                                "FreeSpaceBox": "EXCLUDE",
-                                "MoovPlacement": "PROGRESSIVE_DOWNLOAD"
-                            }
-                        }
-                    }
-                ]
-            },
-            # 썸네일 출력
-            {
-                "Name": "Thumbnail",
-                "OutputGroupSettings": {
-                    "Type": "FILE_GROUP_SETTINGS",
-                    "FileGroupSettings": {
-                        "Destination": output_s3_uri.replace(f"/{output_filename}", "/")
-                    }
-                },
-                "Outputs": [
-                    {
-                        "NameModifier": name_modifier_suffix,
-                        "Extension": "jpg",
-                        "ContainerSettings": {"Container": "RAW"},
-                        "VideoDescription": {
-                            "CodecSettings": {
-                                "Codec": "FRAME_CAPTURE",
-                                "FrameCaptureSettings": {
-                                    "FramerateNumerator": 1,
-                                    "FramerateDenominator": 1,
-                                    "MaxCaptures": 1,
-                                    "Quality": 80
-                                }
-                            }
-                        }
-                    }
-                ]
-            }
-        ]
-    }
+    if name == BACKEND_FFMPEG:
+        return FfmpegCutBackend(mode=mode, s3_client=get_client("s3"), keyframe_index=keyframe_index)
+    return MediaConvertCutBackend(fps)
+
+# ===================== 장면 처리 함수 =====================
+def submit_scene_jobs(scene_job, input_s3_uri, output_bucket, thumb_prefix, base_name, frame_accurate=False, keyframe_index=None):
+    """
+    장면 하나의 자르기(및 썸네일) 작업을 제출만 하고 바로 반환 (완료 대기 없음).
+    사용한 백엔드와 handle은 scene_job["cut_backend"], scene_job["cut_handle"]에 기록.
+    """
+    n = scene_job["scene_number"]
+    backend = scene_job.get("cut_backend") or select_cut_backend(scene_job["duration"], frame_accurate, keyframe_index)
+    scene_job["cut_backend"] = backend
+    scene_job["input_s3_uri"] = input_s3_uri   # 로컬 자르기 실패 시 MediaConvert로 다시 제출할 때 사용
+    scene_job["fps"] = keyframe_index.fps if keyframe_index else DEFAULT_FPS
+    print(f"🔧 장면 {n} 자르기 백엔드: {backend.name}" + (f" ({backend.mode})" if backend.name == BACKEND_FFMPEG else ""))
     
-    try:
-        response = mediaconvert.create_job(
-            Role=MEDIACONVERT_ROLE_ARN,
-            Settings=job_settings,
-            StatusUpdateInterval='SECONDS_10',
-            UserMetadata={
-                'timestamp': str(timestamp_seconds),
-                'output_filename': output_filename
-            }
+    # 1) 로컬 ffmpeg: 클립과 썸네일을 직접 최종 키로 업로드
+    if backend.name == BACKEND_FFMPEG:
+        thumbnail_s3_uri = f"s3://{output_bucket}/{thumb_prefix}{scene_job['thumb_name']}" if THUMBNAIL_ENABLED else None
+        scene_job["cut_handle"] = backend.submit(
+            input_s3_uri,
+            [(scene_job["start"], scene_job["end"])],
+            scene_job["output_s3_uri"],
+            thumbnail_s3_uri
         )
-        
-        job_id = response['Job']['Id']
-        print(f"✅ MediaConvert 썸네일 Job 생성 성공: {job_id}")
-        return True, job_id
-        
-    except Exception as e:
-        print(f"❌ MediaConvert 썸네일 Job 생성 실패: {e}")
-        return False, None
+        scene_job["thumb_local"] = bool(thumbnail_s3_uri)
+        return scene_job
+    
+    # 2) MediaConvert로 영상 자르기
+    #    썸네일은 완료 후 클립에서 추출 (ffmpeg 없으면 같은 Job의 프레임 캡처로 출력)
+    thumb_from_clip = THUMBNAIL_ENABLED and THUMBNAIL_FROM_CLIP and thumbnailer_available()
+    batched = THUMBNAIL_ENABLED and not thumb_from_clip
+    job_id = backend.submit(
+        input_s3_uri,
+        [(scene_job["start"], scene_job["end"])],
+        scene_job["output_s3_uri"],
+        f"s3://{output_bucket}/{thumb_prefix}{scene_job['thumb_name']}" if batched else None
+    )
+    if not job_id:
+        print(f"❌ 장면 {n} MediaConvert Job 생성 실패")
+        return scene_job
+    scene_job["cut_handle"] = job_id
+    scene_job["cut_job_id"] = job_id
+    scene_job["thumb_from_clip"] = thumb_from_clip
+    if batched:
+        scene_job["thumb_job_id"] = job_id
+        scene_job["thumb_batched"] = True
+    return scene_job
 
-def find_indexed_thumbnail(bucket: str, prefix: str, base: str) -> Optional[str]:
+def resubmit_with_mediaconvert(scene_job, output_bucket, thumb_prefix, base_name):
     """
-    thumbnails/ 아래에서 <base>.<숫자>.jpg 를 찾아 키를 반환.
-    없으면 None.
+    ffmpeg 결과 대신 MediaConvert Job을 같은 구간/출력 키로 다시 제출하고 새 백엔드를 반환.
+    캐시 키는 백엔드 profile이 달라지므로 다시 계산
     """
-    target_prefix = f"{prefix}{base}"
-    # 예: thumbnails/soccer_0s-45s 로 시작하는 객체들 검색
-    s3 = boto3.client("s3")
-    paginator = s3.get_paginator('list_objects_v2')
-    for page in paginator.paginate(Bucket=bucket, Prefix=target_prefix):
-        for obj in page.get('Contents', []):
-            key = obj['Key']  # thumbnails/soccer_0s-45s.0000000.jpg
-            filename = key[len(prefix):]  # soccer_0s-45s.0000000.jpg
-            if INDEXED_JPG_PATTERN.match(filename):
-                print(f"🔎 인덱스 썸네일 발견: s3://{bucket}/{key}")
-                return key
-    print(f"⚠️ 인덱스 썸네일을 못 찾음: s3://{bucket}/{prefix}{base}.<num>.jpg")
-    return None
-
-def rename_indexed_thumbnail(bucket: str, base_name: str, indexed_key: str) -> bool:
+    backend = MediaConvertCutBackend(scene_job.get("fps") or DEFAULT_FPS)
+    for field in ("cut_handle", "cut_job_id", "thumb_local", "thumb_from_clip", "thumb_job_id", "thumb_batched"):
+        scene_job.pop(field, None)
+    scene_job["cut_backend"] = backend
+    if scene_job.get("cache_key") and scene_job.get("source_etag"):
+        scene_job["cache_key"] = make_clip_key(scene_job["source_etag"], scene_job["start"], scene_job["end"], backend.profile)
+    submit_scene_jobs(scene_job, scene_job["input_s3_uri"], output_bucket, thumb_prefix, base_name)
+    return backend
+
+def finalize_scene(scene_job, output_bucket, thumb_prefix, base_name):
     """
-    s3://<bucket>/thumbnails/<base>.<번호>.jpg → s3://<bucket>/thumbnails/<base>.jpg 로 리네임(copy→delete)
+    submit_scene_jobs로 제출한 작업들의 완료를 기다리고 결과(파일 크기, 썸네일, URL)를 정리.
+    실패한 장면은 None 반환.
     """
-    final_key = f"{THUMBNAIL_PREFIX}{base_name}.jpg"
-    print(f"🖼️ Rename thumbnail: s3://{bucket}/{indexed_key} → s3://{bucket}/{final_key}")
+    n = scene_job["scene_number"]
+    backend = scene_job.get("cut_backend")
+    handle = scene_job.get("cut_handle")
+    if backend is None or not handle:
+        return None
+    
+    # 1) 자르기 완료 대기
+    result = backend.wait(handle)
+    if not result and backend.name == BACKEND_FFMPEG:
+        # 로컬 ffmpeg 실패 → 같은 구간을 MediaConvert로 다시 자름
+        print(f"⚠️ 장면 {n} ffmpeg 자르기 실패 → MediaConvert로 재시도")
+        backend = resubmit_with_mediaconvert(scene_job, output_bucket, thumb_prefix, base_name)
+        result = backend.wait(scene_job["cut_handle"]) if scene_job.get("cut_handle") else None
+    if not result:
+        print(f"❌ 장면 {n} {backend.name} 자르기 실패")
+        return None
+    job_id = result.get("job_id") or f"local-{result.get('mode')}"
+    
+    # 2) 파일 크기 확인 (로컬 백엔드는 이미 알고 있음)
+    scene_out_key = scene_job["out_key"]
+    scene_out_name = scene_job["out_name"]
+    file_size = result.get("size")
+    if file_size is None:
+        try:
+            s3 = get_client("s3")
+            response = s3.head_object(Bucket=output_bucket, Key=scene_out_key)
+            file_size = response['ContentLength']
+        except Exception as e:
+            print(f"⚠️ 파일 크기 확인 실패: {e}")
+            print(f"⚠️ 장면 {n} MediaConvert 결과 다운로드 실패")
+            return None
+    print(f"📄 출력 파일명: {scene_out_name}")
+    print(f"📄 출력 파일 크기: {file_size:,} bytes")
+    
+    # 3) 썸네일 정리
+    scene_thumb_key = None
+    scene_thumb_name = scene_job["thumb_name"]
+    thumbnail_job_id = scene_job.get("thumb_job_id")
+    if scene_job.get("thumb_local"):
+        # 로컬 백엔드가 최종 키로 바로 업로드함
+        if result.get("thumbnail"):
+            scene_thumb_key = f"{thumb_prefix}{scene_thumb_name}"
+    elif thumbnail_job_id and scene_job.get("thumb_batched"):
+        # 자르기 Job에서 함께 출력됨 → 이미 완료. 파일명이 정해져 있어 목록 조회/이동 없이 그대로 사용
+        scene_thumb_key = f"{thumb_prefix}{scene_thumb_name[:-len('.jpg')]}{FRAME_CAPTURE_INDEX_SUFFIX}"
+        print(f"✅ 장면 {n} 썸네일 (프레임 캡처): {scene_thumb_key}")
+    elif scene_job.get("thumb_from_clip"):
+        # 완료된 클립에서 키프레임 1장만 받아 디코딩 → 최종 키로 바로 업로드
+        thumbnail_time = min(float(THUMBNAIL_TIME), scene_job["duration"] * 0.5)
+        thumb_key = f"{thumb_prefix}{scene_thumb_name}"
+        try:
+            extract_thumbnail(
+                f"s3://{output_bucket}/{scene_out_key}",
+                f"s3://{output_bucket}/{thumb_key}",
+                thumbnail_time,
+                width=THUMBNAIL_WIDTH,
+                s3_client=get_client("s3")
+            )
+            print(f"✅ 장면 {n} 썸네일 추출 완료: {thumb_key}")
+            scene_thumb_key = thumb_key
+        except Exception as e:
+            print(f"❌ 장면 {n} 썸네일 추출 실패: {e}")
+    
+    # presigned URL 생성
+    scene_video_url = generate_presigned_url(output_bucket, scene_out_key, PRESIGNED_EXPIRE_SEC)
+    scene_thumb_url = generate_presigned_url(output_bucket, scene_thumb_key, PRESIGNED_EXPIRE_SEC) if scene_thumb_key else None
+    scene_size_mb = file_size / (1024 * 1024)
+    
+    # 클립 캐시에 기록 (다음 동일 요청은 Job 없이 반환)
+    cache = scene_job.get("clip_cache")
+    if cache and scene_job.get("cache_key"):
+        try:
+            cache.record(
+                scene_job["cache_key"],
+                output_bucket,
+                scene_out_key,
+                thumbnail_key=scene_thumb_key,
+                size=file_size,
+                source=scene_job.get("source"),
+                start=scene_job["start"],
+                end=scene_job["end"],
+                profile=backend.profile
+            )
+        except Exception as e:
+            print(f"⚠️ 장면 {n} 캐시 기록 실패: {e}")
+    
+    print(f"✅ 장면 {n} 처리 완료: {scene_out_name}")
+    return {
+        "scene_number": n,
+        "source_scenes": scene_job.get("source_scenes"),
+        "video_url": scene_video_url,
+        "thumbnail_url": scene_thumb_url,
+        "filename": scene_out_name,
+        "start_time": seconds_to_time_format(scene_job["start"]),
+        "end_time": seconds_to_time_format(scene_job["end"]),
+        "duration": seconds_to_time_format(scene_job["duration"]),
+        "file_size": f"{scene_size_mb:.1f}MB",
+        "output_key": scene_out_key,
+        "start": scene_job["start"],
+        "end": scene_job["end"],
+        "size": file_size,
+        "thumbnail_key": scene_thumb_key,
+        "job_id": job_id,
+        "backend": backend.name
+    }
+
+# ===================== 클립 캐시 =====================
+_clip_cache = None
+_last_evict = 0.0
+
+def get_clip_cache():
+    global _clip_cache
+    if _clip_cache is None:
+        s3 = get_client("s3")
+        _clip_cache = ClipCache(S3ClipCacheStore(VIDEO_BUCKET, client=s3), s3_client=s3)
+    return _clip_cache
+
+def maybe_evict_clip_cache(cache):
+    """컨테이너당 CLIP_CACHE_EVICT_INTERVAL마다 한 번 LRU/TTL 정리"""
+    global _last_evict
+    if time.time() - _last_evict < CLIP_CACHE_EVICT_INTERVAL:
+        return
+    _last_evict = time.time()
     try:
-        s3 = boto3.client("s3")
-        s3.copy(
-            CopySource={"Bucket": bucket, "Key": indexed_key},
-            Bucket=bucket,
-            Key=final_key
-        )
-        s3.delete_object(Bucket=bucket, Key=indexed_key)
-        print("✅ Renamed (copy→delete) complete")
-        return True
+        cache.evict()
     except Exception as e:
-        print(f"❌ Rename failed: {e}")
-        return False
+        print(f"⚠️ 클립 캐시 정리 실패: {e}")
+
+def lookup_cached_scene(scene_job, cache, source_etag, frame_accurate=False, keyframe_index=None):
+    """
+    캐시 적중이면 finalize_scene과 같은 형태의 결과 반환 (Job 제출 없음).
+    미스면 None, 이후 finalize_scene에서 기록할 수 있게 scene_job에 cache_key를 남긴다.
+    """
+    backend = select_cut_backend(scene_job["duration"], frame_accurate, keyframe_index)
+    scene_job["cut_backend"] = backend
+    cache_key = make_clip_key(source_etag, scene_job["start"], scene_job["end"], backend.profile)
+    scene_job["clip_cache"] = cache
+    scene_job["cache_key"] = cache_key
+    scene_job["source_etag"] = source_etag
+    
+    entry = cache.lookup(cache_key)
+    if not entry:
+        return None
+    
+    n = scene_job["scene_number"]
+    print(f"⚡ 장면 {n} 캐시 적중: s3://{entry['output_bucket']}/{entry['output_key']}")
+    size = entry.get("size") or 0
+    return {
+        "scene_number": n,
+        "source_scenes": scene_job.get("source_scenes"),
+        "video_url": generate_presigned_url(entry["output_bucket"], entry["output_key"], PRESIGNED_EXPIRE_SEC),
+        "thumbnail_url": generate_presigned_url(entry["output_bucket"], entry["thumbnail_key"], PRESIGNED_EXPIRE_SEC) if entry.get("thumbnail_key") else None,
+        "filename": os.path.basename(entry["output_key"]),
+        "start_time": seconds_to_time_format(scene_job["start"]),
+        "end_time": seconds_to_time_format(scene_job["end"]),
+        "duration": seconds_to_time_format(scene_job["duration"]),
+        "file_size": f"{size / (1024 * 1024):.1f}MB",
+        "output_key": entry["output_key"],
+        "start": scene_job["start"],
+        "end": scene_job["end"],
+        "size": entry.get("size"),
+        "thumbnail_key": entry.get("thumbnail_key"),
+        "job_id": "cache",
+        "backend": backend.name,
+        "cached": True
+    }
 
 # ===================== 메인 핸들러 =====================
 def lambda_handler(event, context):
@@ -573,16 +824,35 @@ def lambda_handler(event, context):
         # 입력 S3 URI
         input_s3_uri = f"s3://{source_bucket}/{source_key}"
         
-        # 장면별 처리
-        processed_scenes = []
+        # 원본 ETag: 키프레임 인덱스 검증과 클립 캐시 키에 같이 사용
+        source_etag = source_etag_of(source_bucket, source_key, get_client("s3"))
         
-        for i, scene in enumerate(scenes_to_process):
-            print(f"\n🎬 장면 {i+1} 처리 시작...")
-            
-            # 장면 정보 추출
-            scene_start = parse_time_to_seconds(scene.get("start_time"))
-            scene_end = parse_time_to_seconds(scene.get("end_time"))
-            scene_duration = scene_end - scene_start
+        # ingest 때 만든 키프레임 인덱스 (없거나 원본과 다르면 None → ffprobe / 기본 fps)
+        keyframe_index = load_keyframe_index(source_key, source_etag, get_client("s3"))
+        
+        # 장면 계획 (정렬 + 겹침/근접 구간 병합 + 원본 길이로 자르기)
+        if SCENE_PLANNING_ENABLED:
+            merge_gap = parse_merge_gap(params.get("merge_gap", SCENE_MERGE_GAP))
+            planned = plan_scenes(
+                scenes_to_process,
+                gap_tolerance=merge_gap,
+                source_duration=keyframe_index.duration_seconds if keyframe_index else None
+            )
+            print(f"🧩 장면 계획: {len(scenes_to_process)}개 → {len(planned)}개, "
+                  f"인코딩 {encoded_seconds(scenes_to_process):.1f}s → {sum(sc['duration'] for sc in planned):.1f}s")
+        else:
+            planned = []
+            for i, scene in enumerate(scenes_to_process):
+                scene_start = parse_time_to_seconds(scene.get("start_time"))
+                scene_end = parse_time_to_seconds(scene.get("end_time"))
+                planned.append({"start": scene_start, "end": scene_end, "duration": scene_end - scene_start, "sources": [i]})
+        
+        # 장면별 Job 계획
+        scene_jobs = []
+        for i, scene in enumerate(planned):
+            scene_start = scene["start"]
+            scene_end = scene["end"]
+            scene_duration = scene["duration"]
             
             if scene_duration <= 0:
                 print(f"⚠️ 장면 {i+1} 건너뜀: 잘못된 시간 범위")
@@ -595,115 +865,95 @@ def lambda_handler(event, context):
                 scene_end, 
                 ts
             )
-            
             scene_out_key = f"{out_prefix}{scene_out_name}"
-            scene_out_path = f"/tmp/output_scene{i+1}_{uid}.mp4"
-            
-            # 출력 S3 URI
-            output_s3_uri = f"s3://{output_bucket}/{scene_out_key}"
             
-            # 1) MediaConvert로 영상 자르기
-            success, job_id = cut_video_with_mediaconvert(
-                input_s3_uri,
-                output_s3_uri,
-                scene_start,
-                scene_duration,
-                scene_out_name
-            )
-            
-            if not success:
-                print(f"❌ 장면 {i+1} MediaConvert Job 생성 실패")
-                continue
-            
-            # 2) Job 완료 대기
-            if not wait_for_mediaconvert_job(job_id):
-                print(f"❌ 장면 {i+1} MediaConvert Job 실패")
-                continue
-            
-            # 3) 파일 크기 확인
-            try:
-                s3 = boto3.client("s3")
-                response = s3.head_object(Bucket=output_bucket, Key=scene_out_key)
-                file_size = response['ContentLength']
-                print(f"📄 출력 파일명: {scene_out_name}")
-                print(f"📄 출력 파일 크기: {file_size:,} bytes")
-            except Exception as e:
-                print(f"⚠️ 파일 크기 확인 실패: {e}")
-                print(f"⚠️ 장면 {i+1} MediaConvert 결과 다운로드 실패")
-                continue
-            
-            # 4) 썸네일 생성 (옵션)
-            scene_thumb_url = None
-            if THUMBNAIL_ENABLED:
-                thumbnail_time = min(int(float(THUMBNAIL_TIME)), int(scene_duration * 0.5))
-                thumbnail_s3_uri = f"s3://{output_bucket}/{thumb_prefix}{scene_thumb_name}"
-                
-                thumbnail_success, thumbnail_job_id = generate_thumbnail_with_mediaconvert(
-                    input_s3_uri, 
-                    thumbnail_s3_uri, 
-                    scene_start + thumbnail_time, 
-                    scene_thumb_name,
-                    base_name # Pass the original base_name (e.g., "soccer")
-                )
-                
-                if thumbnail_success:
-                    print(f"✅ 장면 {i+1} MediaConvert 썸네일 Job 생성 성공: {thumbnail_job_id}")
-                    
-                    # 썸네일 Job 완료 대기
-                    if wait_for_mediaconvert_job(thumbnail_job_id):
-                        print(f"✅ 장면 {i+1} MediaConvert 썸네일 Job 완료: {thumbnail_job_id}")
-                        
-                        # 임시 비디오 파일 삭제 (MediaConvert NameModifier 규칙에 맞춤)
-                        temp_video_name = f"{base_name}_{int(scene_start + thumbnail_time)}s.mp4"
-                        temp_video_key = f"{thumb_prefix}{temp_video_name}"  # thumbnails/ 폴더에서 삭제
-                        try:
-                            s3 = boto3.client("s3")
-                            s3.delete_object(Bucket=output_bucket, Key=temp_video_key)
-                            print(f"🗑️ 임시 비디오 파일 삭제: {temp_video_key}")
-                        except Exception as e:
-                            print(f"⚠️ 임시 비디오 파일 삭제 실패: {e}")
-                        
-                        # 썸네일 리네임 과정 추가
-                        scene_thumb_base = scene_thumb_name.replace('.jpg', '')
-                        indexed_key = find_indexed_thumbnail(output_bucket, thumb_prefix, scene_thumb_base)
-                        
-                        if indexed_key:
-                            if rename_indexed_thumbnail(output_bucket, scene_thumb_base, indexed_key):
-                                print(f"✅ 장면 {i+1} 썸네일 리네임 완료")
-                                tkey = f"{thumb_prefix}{scene_thumb_name}"
-                                scene_thumb_url = generate_presigned_url(output_bucket, tkey, PRESIGNED_EXPIRE_SEC)
-                            else:
-                                print(f"❌ 장면 {i+1} 썸네일 리네임 실패")
-                        else:
-                            print(f"⚠️ 장면 {i+1} 인덱스 썸네일을 찾을 수 없음")
-                    else:
-                        print(f"❌ 장면 {i+1} MediaConvert 썸네일 Job 실패")
-                else:
-                    print(f"⚠️ 장면 {i+1} MediaConvert 썸네일 생성 실패")
-
-            # presigned URL 생성
-            scene_video_url = generate_presigned_url(output_bucket, scene_out_key, PRESIGNED_EXPIRE_SEC)
-            scene_size_mb = file_size / (1024 * 1024)
-            
-            # 장면 정보 저장
-            processed_scenes.append({
+            scene_jobs.append({
                 "scene_number": i + 1,
-                "video_url": scene_video_url,
-                "thumbnail_url": scene_thumb_url,
-                "filename": scene_out_name,
-                "start_time": seconds_to_time_format(scene_start),
-                "end_time": seconds_to_time_format(scene_end),
-                "duration": seconds_to_time_format(scene_duration),
-                "file_size": f"{scene_size_mb:.1f}MB",
-                "output_key": scene_out_key,
-                "job_id": job_id
+                "source_scenes": [n + 1 for n in scene["sources"]],
+                "start": scene_start,
+                "end": scene_end,
+                "duration": scene_duration,
+                "out_name": scene_out_name,
+                "thumb_name": scene_thumb_name,
+                "out_key": scene_out_key,
+                "output_s3_uri": f"s3://{output_bucket}/{scene_out_key}",
+                "cut_job_id": None,
+                "thumb_job_id": None
             })
+        
+        parallel = str(params.get("parallel", PARALLEL_SCENE_JOBS)).lower() not in ("false", "0", "no")
+        frame_accurate = str(params.get("frame_accurate", "false")).lower() in ("true", "1", "yes")
+        use_cache = CLIP_CACHE_ENABLED and str(params.get("use_cache", "true")).lower() not in ("false", "0", "no")
+        processed_scenes = []
+        
+        # 0) 클립 캐시 조회 → 적중한 장면은 바로 결과에 넣고 Job 대상에서 제외
+        clip_cache = get_clip_cache() if use_cache else None
+        cache_hits = 0
+        if clip_cache and source_etag:
+            pending_jobs = []
+            for scene_job in scene_jobs:
+                scene_job["source"] = input_s3_uri
+                cached_scene = lookup_cached_scene(scene_job, clip_cache, source_etag, frame_accurate, keyframe_index)
+                if cached_scene:
+                    processed_scenes.append(cached_scene)
+                    cache_hits += 1
+                else:
+                    pending_jobs.append(scene_job)
+            print(f"⚡ 클립 캐시: {cache_hits}/{len(scene_jobs)}개 적중")
+        else:
+            pending_jobs = scene_jobs
+        
+        if parallel and len(pending_jobs) > 1:
+            # 1) 모든 장면의 자르기/썸네일 Job을 먼저 제출
+            print(f"🚀 병렬 모드: {len(pending_jobs)}개 장면 Job 일괄 제출")
+            for scene_job in pending_jobs:
+                submit_scene_jobs(scene_job, input_s3_uri, output_bucket, thumb_prefix, base_name, frame_accurate, keyframe_index)
+            
+            # 2) 완료되는 순서대로 결과 정리 (전체 시간 ≈ 가장 느린 Job)
+            workers = min(MAX_PARALLEL_SCENES, len(pending_jobs))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(finalize_scene, scene_job, output_bucket, thumb_prefix, base_name)
+                    for scene_job in pending_jobs
+                ]
+                for future in as_completed(futures):
+                    scene_result = future.result()
+                    if scene_result:
+                        processed_scenes.append(scene_result)
             
-            print(f"✅ 장면 {i+1} 처리 완료: {scene_out_name}")
+        else:
+            for scene_job in pending_jobs:
+                print(f"\n🎬 장면 {scene_job['scene_number']} 처리 시작...")
+                submit_scene_jobs(scene_job, input_s3_uri, output_bucket, thumb_prefix, base_name, frame_accurate, keyframe_index)
+                scene_result = finalize_scene(scene_job, output_bucket, thumb_prefix, base_name)
+                if scene_result:
+                    processed_scenes.append(scene_result)
+        
+        processed_scenes.sort(key=lambda sc: sc["scene_number"])
+        if clip_cache:
+            maybe_evict_clip_cache(clip_cache)
+
+        # 5) 클립 매니페스트 (video_ai가 응답 문장 대신 읽는 기계용 결과)
+        manifest = build_manifest("cut_transcribe", source_bucket, source_key, [
+            manifest_clip(
+                sc["scene_number"], output_bucket, sc["output_key"], sc["start"], sc["end"],
+                size=sc["size"], thumbnail_key=sc["thumbnail_key"],
+                source_scenes=sc["source_scenes"], cached=bool(sc.get("cached"))
+            )
+            for sc in processed_scenes
+        ])
+        manifest_uri = None
+        try:
+            manifest_uri = write_manifest(get_client("s3"), output_bucket, manifest_key(f"{base_name}_{ts}"), manifest)
+            print(f"🧾 클립 매니페스트: {manifest_uri}")
+        except Exception as e:
+            print(f"⚠️ 매니페스트 저장 실패 (응답 본문에만 포함): {e}")
 
         # 6) 성공 응답
         final_time = time.time()
         print(f"⏱️ 전체 처리 시간: {final_time - start_time:.2f}초")
+        methods = sorted({"cache" if sc.get("cached") else sc["backend"] for sc in processed_scenes})
+        processing_method = " + ".join(PROCESSING_METHOD_NAMES.get(m, m) for m in methods)
         
         resp = {
             "success": True,
@@ -712,8 +962,12 @@ def lambda_handler(event, context):
             "source_bucket": source_bucket,
             "source_key": source_key,
             "bucket": output_bucket,
-            "processing_method": "MediaConvert",
-            "message": f"영상 자르기 완료! 총 {len(processed_scenes)}개 장면 처리 - MediaConvert 사용"
+            "processing_method": processing_method,
+            "backends": sorted({sc["backend"] for sc in processed_scenes}),
+            "mediaconvert_jobs": len({jid for sj in scene_jobs for jid in (sj.get("cut_job_id"), sj.get("thumb_job_id")) if jid}),
+            "cache_hits": cache_hits,
+            "clip_manifest": manifest_uri,
+            "message": f"영상 자르기 완료! 총 {len(processed_scenes)}개 장면 처리 - {processing_method} 사용"
         }
         print(json.dumps(resp, indent=2, ensure_ascii=False))
 
@@ -728,7 +982,9 @@ def lambda_handler(event, context):
 {chr(10).join(scene_details)}
 
 모든 파일은 S3 버킷 '{output_bucket}'의 '{OUTPUT_PREFIX}' 폴더에 저장되었습니다.
-파일명 형식: [원본파일명]_[시작시간]s-[종료시간]s.mp4"""
+파일명 형식: [원본파일명]_[시작시간]s-[종료시간]s.mp4
+
+{manifest_block(manifest, manifest_uri)}"""
 
         return {
             "messageVersion": "1.0",
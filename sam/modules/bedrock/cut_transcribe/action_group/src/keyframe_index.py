@@ -0,0 +1,262 @@
+"""
+영상별 키프레임(GOP) 인덱스.
+
+mediaconvert_lambda가 업로드(ingest) 시 원본의 moov만 읽어 만들고, 변환된 MP4 옆
+(s3://<출력버킷>/converted/<영상이름>.kfi)에 저장한다.
+자르기 엔진은 요청마다 원본을 ffprobe하지 않고 이 파일로 컷 지점 주변 키프레임을 O(log n)에 찾는다.
+만들 때 읽은 원본의 ETag를 S3 메타데이터(x-amz-meta-source-etag)로 함께 저장하고, 조회 측은 지금 원본의 ETag와
+같을 때만 사용한다 (파일 이름만 같은 다른 영상(.mov/.mp4)이나 다시 올리기 전 인덱스를 쓰지 않음).
+
+파일 형식 (big-endian):
+  헤더  "KFI1" | fps_num u32 | fps_den u32 | timescale u32 | duration u64 | count u32
+  열    pts u64 × count | offset u64 × count | gop_frames u32 × count | gop_bytes u32 × count
+"""
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+import boto3
+from botocore.exceptions import ClientError
+
+KFI_MAGIC = b"KFI1"
+KFI_HEADER = struct.Struct(">4sIIIQI")
+KFI_EXTENSION = ".kfi"
+KEYFRAME_INDEX_BUCKET = os.getenv("KEYFRAME_INDEX_BUCKET", "video-output-pipeline-20250724")
+KEYFRAME_INDEX_PREFIX = "converted/"
+ORIGINAL_PREFIX = "original/"   # 인덱스는 이 폴더 바로 아래 원본에만 만듦
+SOURCE_ETAG_METADATA = "source-etag"
+DEFAULT_FPS = 29.97
+INDEX_CACHE_MAX_ENTRIES = 32   # warm 컨테이너가 들고 있는 인덱스 수 (LRU)
+
+
+class KeyframeIndexError(Exception):
+    pass
+
+
+def _column(typecode, data, pos, count):
+    values = array(typecode)
+    end = pos + values.itemsize * count
+    if end > len(data):
+        raise KeyframeIndexError("인덱스 파일이 잘림")
+    values.frombytes(data[pos:end])
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values, end
+
+
+def _column_bytes(values):
+    values = array(values.typecode, values)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+class KeyframeIndex:
+    """
+    pts: 키프레임 표시 시각 (timescale 단위), offsets: 키프레임 샘플의 바이트 오프셋,
+    gop_frames/gop_bytes: 해당 키프레임부터 다음 키프레임 전까지의 프레임 수/바이트 수
+    """
+
+    def __init__(self, fps_num, fps_den, timescale, duration, pts, offsets, gop_frames, gop_bytes, source_etag=None):
+        self.source_etag = source_etag   # 만들 때 읽은 원본의 ETag (파일 본문이 아니라 S3 메타데이터로 저장)
+        self.fps_num = fps_num
+        self.fps_den = fps_den
+        self.timescale = timescale
+        self.duration = duration
+        self.pts = pts
+        self.offsets = offsets
+        self.gop_frames = gop_frames
+        self.gop_bytes = gop_bytes
+
+    def __len__(self):
+        return len(self.pts)
+
+    @property
+    def fps(self):
+        return self.fps_num / self.fps_den if self.fps_num and self.fps_den else DEFAULT_FPS
+
+    @property
+    def duration_seconds(self):
+        return self.duration / self.timescale
+
+    def time_at(self, i):
+        return self.pts[i] / self.timescale
+
+    # ---------- 조회 (O(log n)) ----------
+    def keyframe_at_or_before(self, seconds):
+        """seconds 이하인 마지막 키프레임 시각 (없으면 첫 키프레임)"""
+        if not self.pts:
+            return None
+        i = bisect_right(self.pts, round(seconds * self.timescale)) - 1
+        return self.time_at(max(i, 0))
+
+    def keyframe_at_or_after(self, seconds):
+        """seconds 이상인 첫 키프레임 시각 (없으면 None)"""
+        i = bisect_left(self.pts, round(seconds * self.timescale))
+        return self.time_at(i) if i < len(self.pts) else None
+
+    def gop_at(self, seconds):
+        """seconds가 속한 GOP: {"start", "end", "offset", "frames", "bytes"}"""
+        if not self.pts:
+            return None
+        i = max(bisect_right(self.pts, round(seconds * self.timescale)) - 1, 0)
+        end = self.time_at(i + 1) if i + 1 < len(self.pts) else self.duration_seconds
+        return {
+            "start": self.time_at(i),
+            "end": end,
+            "offset": self.offsets[i],
+            "frames": self.gop_frames[i],
+            "bytes": self.gop_bytes[i]
+        }
+
+    def snap_to_frame(self, seconds):
+        """프레임 경계로 반올림"""
+        fps = self.fps
+        return round(seconds * fps) / fps
+
+    # ---------- 직렬화 ----------
+    def to_bytes(self):
+        header = KFI_HEADER.pack(KFI_MAGIC, self.fps_num, self.fps_den, self.timescale, self.duration, len(self.pts))
+        return b"".join([header, _column_bytes(self.pts), _column_bytes(self.offsets),
+                         _column_bytes(self.gop_frames), _column_bytes(self.gop_bytes)])
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < KFI_HEADER.size:
+            raise KeyframeIndexError("인덱스 파일이 너무 짧음")
+        magic, fps_num, fps_den, timescale, duration, count = KFI_HEADER.unpack_from(data, 0)
+        if magic != KFI_MAGIC:
+            raise KeyframeIndexError(f"잘못된 인덱스 형식: {magic!r}")
+        pos = KFI_HEADER.size
+        pts, pos = _column("Q", data, pos, count)
+        offsets, pos = _column("Q", data, pos, count)
+        gop_frames, pos = _column("I", data, pos, count)
+        gop_bytes, pos = _column("I", data, pos, count)
+        return cls(fps_num, fps_den, timescale, duration, pts, offsets, gop_frames, gop_bytes)
+
+    @classmethod
+    def from_track(cls, track):
+        """mp4_index.Mp4Track(비디오)에서 생성"""
+        keyframes = list(track.keyframe_indices())
+        if not keyframes:
+            raise KeyframeIndexError("키프레임 없음")
+        pts, offsets, gop_frames, gop_bytes = array("Q"), array("Q"), array("I"), array("I")
+        for n, first in enumerate(keyframes):
+            last = keyframes[n + 1] if n + 1 < len(keyframes) else track.sample_count
+            pts.append(round(track.presentation_time(first) * track.timescale))
+            offsets.append(track.offsets[first])
+            gop_frames.append(last - first)
+            gop_bytes.append(min(sum(track.sizes[first:last]), 0xFFFFFFFF))
+        fps_num, fps_den = track.frame_rate
+        duration = round(track.duration * track.timescale)
+        return cls(fps_num, fps_den, track.timescale, duration, pts, offsets, gop_frames, gop_bytes)
+
+
+# ===================== 생성 / 저장 =====================
+def build_keyframe_index(source, s3_client=None):
+    """s3://bucket/key 또는 로컬 MP4/MOV에서 인덱스 생성 (moov만 읽음)"""
+    from mp4_index import load_index
+
+    mp4 = load_index(source, s3_client)
+    track = mp4.video_track
+    if track is None:
+        raise KeyframeIndexError(f"비디오 트랙 없음: {source}")
+    index = KeyframeIndex.from_track(track)
+    index.source_etag = _normalize_etag(mp4.reader.version())
+    return index
+
+
+def index_key_for(video_key):
+    """original/soccer.mp4 → converted/soccer.kfi. original/ 바로 아래 파일이 아니면 None (인덱스 없음)"""
+    if not video_key.startswith(ORIGINAL_PREFIX) or "/" in video_key[len(ORIGINAL_PREFIX):]:
+        return None
+    base = os.path.splitext(os.path.basename(video_key))[0]
+    return f"{KEYFRAME_INDEX_PREFIX}{base}{KFI_EXTENSION}" if base else None
+
+
+def save_keyframe_index(index, bucket, key, s3_client=None):
+    client = s3_client or boto3.client("s3")
+    metadata = {SOURCE_ETAG_METADATA: index.source_etag} if index.source_etag else {}
+    client.put_object(Bucket=bucket, Key=key, Body=index.to_bytes(), ContentType="application/octet-stream",
+                      Metadata=metadata)
+    return f"s3://{bucket}/{key}"
+
+
+def _normalize_etag(etag):
+    return str(etag).strip('"') if etag else None
+
+
+def source_etag_of(bucket, key, s3_client=None):
+    """원본의 현재 ETag (따옴표 제거). 조회 실패면 None"""
+    try:
+        client = s3_client or boto3.client("s3")
+        return _normalize_etag(client.head_object(Bucket=bucket, Key=key).get("ETag"))
+    except Exception as e:
+        print(f"⚠️ 원본 ETag 조회 실패 (s3://{bucket}/{key}): {e}")
+        return None
+
+
+# ===================== 조회 (캐시) =====================
+_index_cache = OrderedDict()   # (bucket, key) → (인덱스 ETag, KeyframeIndex)
+_index_cache_lock = threading.Lock()
+
+
+def load_keyframe_index(video_key, source_etag, s3_client=None, bucket=KEYFRAME_INDEX_BUCKET):
+    """
+    원본 키(original/<영상>.mp4)에 해당하는 인덱스. 없거나 읽기 실패면 None → 호출 측은 기존 방식(ffprobe/초 단위)
+    source_etag(원본의 지금 ETag)와 인덱스를 만들 때 기록한 ETag가 다르거나 어느 쪽이든 없으면 None
+    캐시는 ETag로 검증: 조건부 GET(If-None-Match)이 304면 캐시 사용, 영상을 다시 올려 인덱스가 바뀌었으면 새로 읽음
+    """
+    key = index_key_for(video_key)
+    if key is None:
+        return None
+    source_etag = _normalize_etag(source_etag)
+    if not source_etag:
+        print(f"⚠️ 원본 ETag 없음 → 키프레임 인덱스 사용 안 함: {video_key}")
+        return None
+    cache_key = (bucket, key)
+    with _index_cache_lock:
+        cached = _index_cache.get(cache_key)
+
+    index = None
+    try:
+        client = s3_client or boto3.client("s3")
+        params = {"Bucket": bucket, "Key": key}
+        if cached:
+            params["IfNoneMatch"] = cached[0]
+        response = client.get_object(**params)
+        index = KeyframeIndex.from_bytes(response["Body"].read())
+        index.source_etag = _normalize_etag((response.get("Metadata") or {}).get(SOURCE_ETAG_METADATA))
+        print(f"🔑 키프레임 인덱스 로드: s3://{bucket}/{key} ({len(index)}개, {index.fps:.3f}fps)")
+    except ClientError as e:
+        if cached and e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+            with _index_cache_lock:
+                if cache_key in _index_cache:
+                    _index_cache.move_to_end(cache_key)
+            return _matching_source(cached[1], source_etag, video_key)
+        print(f"⚠️ 키프레임 인덱스 없음/읽기 실패 (s3://{bucket}/{key}): {e}")
+    except Exception as e:
+        print(f"⚠️ 키프레임 인덱스 없음/읽기 실패 (s3://{bucket}/{key}): {e}")
+
+    with _index_cache_lock:
+        if index is None:
+            # 인덱스가 지워졌거나 읽을 수 없으면 예전 것도 쓰지 않음
+            _index_cache.pop(cache_key, None)
+        else:
+            _index_cache[cache_key] = (response.get("ETag"), index)
+            _index_cache.move_to_end(cache_key)
+            while len(_index_cache) > INDEX_CACHE_MAX_ENTRIES:
+                _index_cache.popitem(last=False)
+    return _matching_source(index, source_etag, video_key) if index is not None else None
+
+
+def _matching_source(index, source_etag, video_key):
+    """인덱스가 지금 원본으로 만든 것일 때만 반환"""
+    if index.source_etag != source_etag:
+        print(f"⚠️ 키프레임 인덱스가 원본과 다름 (인덱스 {index.source_etag}, 원본 {source_etag}) → 사용 안 함: {video_key}")
+        return None
+    return index
@@ -0,0 +1,45 @@
+import json
+import os
+import boto3
+
+from video_catalog import DynamoCatalogStore, apply_s3_event
+
+# ---------- AWS Clients ----------
+s3_client = boto3.client('s3')
+
+# ---------- Config ----------
+CATALOG_TABLE = os.getenv('CATALOG_TABLE', 'VideoCatalog')
+store = DynamoCatalogStore(CATALOG_TABLE, boto3.client('dynamodb'))
+
+def lambda_handler(event, context):
+    """
+    EventBridge S3 "Object Created" / "Object Deleted" 이벤트 → 영상 카탈로그 갱신.
+    mediaconvert_lambda / transcribe_lambda 를 트리거하는 것과 같은 S3 이벤트를 받아
+    원본/변환 MP4/전사/썸네일/클립을 영상 단위 레코드로 유지 (bucket_list가 조회)
+    """
+    try:
+        ref = apply_s3_event(store, event, s3_client)
+        if ref is None:
+            key = ((event.get('detail') or {}).get('object') or {}).get('key')
+            print(f"⏭️ 카탈로그 대상 아님: {key}")
+            return resp(200, "Skipped")
+        if ref.get('stale'):
+            # 같은 아티팩트에 더 새 이벤트가 이미 반영됨 (EventBridge 순서 뒤바뀜)
+            print(f"⏭️ 오래된 이벤트 무시: {event.get('detail-type')} {ref['key']}")
+            return resp(200, "Stale")
+        print(f"📚 카탈로그 갱신: {event.get('detail-type')} {ref['artifact']} → {ref.get('video_id')} ({ref['key']})")
+        return resp(200, {"video_id": ref.get('video_id'), "artifact": ref['artifact']})
+
+    except ValueError as e:
+        print(f"❌ 이벤트 파싱 실패: {e} {json.dumps(event)[:500]}")
+        return resp(400, str(e))
+    except Exception as e:
+        # 재시도(EventInvokeConfig)되도록 예외 전파
+        print(f"❌ 오류: {e}")
+        raise
+
+# ---------- Utils ----------
+def resp(code, body):
+    if not isinstance(body, (str, dict, list)):
+        body = str(body)
+    return {"statusCode": code, "body": json.dumps(body)}
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+import boto3
+
+# ---------- AWS Clients ----------
+dynamodb_client = boto3.client('dynamodb')
+
+# ---------- Config ----------
+JOB_STATUS_TABLE = os.getenv('JOB_STATUS_TABLE', 'MediaConvertJobStatus')
+STATUS_TTL_SECONDS = 24 * 3600   # 완료 기록은 하루 뒤 DynamoDB TTL로 자동 삭제
+TERMINAL_STATUSES = {'COMPLETE', 'ERROR', 'CANCELED'}
+
+def lambda_handler(event, context):
+    """
+    EventBridge "MediaConvert Job State Change" 이벤트를 받아 Job 상태를 DynamoDB에 기록.
+      - 액션 그룹(cut_transcribe / cut_shorts)은 get_job 폴링 대신 이 테이블을 조회해 완료를 감지
+    """
+    try:
+        detail = event.get('detail') or {}
+        job_id = detail.get('jobId')
+        status = detail.get('status')
+        if not job_id or not status:
+            print(f"❌ 이벤트 파싱 실패: {json.dumps(event)[:500]}")
+            return resp(400, "Unsupported event format")
+
+        user_metadata = detail.get('userMetadata') or {}
+        error_message = detail.get('errorMessage')
+        output_paths = extract_output_paths(detail)
+        print(f"📦 MediaConvert Job 상태 변경: {job_id} → {status}")
+
+        put_job_status(job_id, status, error_message, output_paths, user_metadata)
+
+        return resp(200, {"job_id": job_id, "status": status})
+
+    except Exception as e:
+        print(f"❌ 오류: {e}")
+        return resp(500, {"error": str(e)})
+
+# ---------- Core helpers ----------
+
+def extract_output_paths(detail: dict) -> list:
+    paths = []
+    for group in detail.get('outputGroupDetails') or []:
+        for output in group.get('outputDetails') or []:
+            paths.extend(output.get('outputFilePaths') or [])
+    return paths
+
+def put_job_status(job_id: str, status: str, error_message, output_paths: list, user_metadata: dict):
+    now = int(time.time())
+    item = {
+        'job_id': {'S': job_id},
+        'status': {'S': status},
+        'updated_at': {'N': str(now)},
+        'expires_at': {'N': str(now + STATUS_TTL_SECONDS)},
+        'user_metadata': {'S': json.dumps(user_metadata, ensure_ascii=False)}
+    }
+    if error_message:
+        item['error_message'] = {'S': str(error_message)}
+    if output_paths:
+        item['output_paths'] = {'L': [{'S': p} for p in output_paths]}
+
+    params = {'TableName': JOB_STATUS_TABLE, 'Item': item}
+    if status not in TERMINAL_STATUSES:
+        # EventBridge는 순서를 보장하지 않음: 늦게 온 PROGRESSING/STATUS_UPDATE가 COMPLETE/ERROR를 덮지 않도록
+        params['ConditionExpression'] = 'attribute_not_exists(job_id) OR NOT #status IN (:complete, :error, :canceled)'
+        params['ExpressionAttributeNames'] = {'#status': 'status'}
+        params['ExpressionAttributeValues'] = {
+            ':complete': {'S': 'COMPLETE'}, ':error': {'S': 'ERROR'}, ':canceled': {'S': 'CANCELED'}
+        }
+    try:
+        dynamodb_client.put_item(**params)
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        print(f"⏭️ 이미 종료 상태라 무시: {JOB_STATUS_TABLE}/{job_id} ← {status}")
+        return
+    print(f"✅ Job 상태 기록: {JOB_STATUS_TABLE}/{job_id} = {status}")
+
+# ---------- Utils ----------
+def resp(code, body):
+    if not isinstance(body, (str, dict, list)):
+        body = str(body)
+    return {"statusCode": code, "body": json.dumps(body)}
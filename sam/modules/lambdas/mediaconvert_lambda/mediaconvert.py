@@ -4,6 +4,9 @@ import urllib.parse
 import os
 import re
 
+from keyframe_index import build_keyframe_index, index_key_for, save_keyframe_index
+from thumbnailer import extract_thumbnail, thumbnailer_available
+
 # ---------- AWS Clients ----------
 s3_client = boto3.client('s3')
 mediaconvert_client = boto3.client('mediaconvert')
@@ -14,6 +17,16 @@ OUTPUT_BUCKET = 'video-output-pipeline-20250724'  # 다운그레이드 MP4는 
 THUMBNAIL_PREFIX = 'original/thumbnails/'         # 최종: s3://<입력버킷>/original/thumbnails/<영상이름>.jpg
 MEDIACONVERT_ENDPOINT = None
 
+# 키프레임 인덱스: 원본 moov만 읽어 s3://<OUTPUT_BUCKET>/converted/<영상이름>.kfi 로 저장 (자르기 엔진이 사용)
+KEYFRAME_INDEX_ENABLED = True
+KEYFRAME_INDEX_FORMATS = ('.mp4', '.mov', '.m4v')  # ISO BMFF 계열만 인덱싱 가능
+
+# 포스터 썸네일: ffmpeg 레이어가 있으면 POSTER_TIME에 가장 가까운 키프레임 1장만 Range GET + 디코딩해 최종 키에 바로 저장
+# 없거나 실패하면 MediaConvert 프레임 캡처(<base>.0000000.jpg → S3 이벤트로 리네임)로 대체
+POSTER_FROM_KEYFRAME = True
+POSTER_TIME = 1.0
+POSTER_WIDTH = None   # 포스터 폭 (None이면 원본 크기)
+
 # 썸네일 S3 ObjectCreated 시, 인덱스 파일 패턴 (예: soccer.000000.jpg 또는 0000000 등)
 INDEXED_JPG_PATTERN = re.compile(r'^original/thumbnails/([^/]+)\.(\d+)\.jpg$', re.IGNORECASE)
 
@@ -66,19 +79,28 @@ def lambda_handler(event, context):
             return resp(200, "Unsupported or non-video; skipped")
 
         print(f"🎬 처리할 파일(원본): s3://{bucket}/{key}")
-        print("📹 출력: MP4(기존 경로 유지) + Thumbnail(폴더만 지정)")
+
+        # 포스터 썸네일 먼저 (1초 미만). 실패하면 MediaConvert Job에 프레임 캡처를 붙임
+        poster_uri = generate_poster_thumbnail(bucket, key)
+        print(f"📹 출력: MP4(기존 경로 유지) + Thumbnail({'키프레임 추출 완료' if poster_uri else 'MediaConvert 프레임 캡처'})")
 
         setup_mediaconvert_endpoint()
-        job_id = create_mediaconvert_job(bucket, key)
+        job_id = create_mediaconvert_job(bucket, key, frame_capture=not poster_uri)
 
         if not job_id:
             raise Exception("MediaConvert 작업 생성 실패")
 
         print(f"✅ MediaConvert 작업 생성 성공: {job_id}")
+
+        # 5) 키프레임 인덱스 (변환 잡과 독립, 실패해도 무시)
+        index_uri = build_and_save_keyframe_index(bucket, key)
+
         return resp(200, {
             "message": "Transcode + thumbnail job started",
             "job_id": job_id,
-            "input": f"s3://{bucket}/{key}"
+            "input": f"s3://{bucket}/{key}",
+            "thumbnail": poster_uri,
+            "keyframe_index": index_uri
         })
 
     except Exception as e:
@@ -118,11 +140,10 @@ def setup_mediaconvert_endpoint():
     mediaconvert_client = boto3.client('mediaconvert', endpoint_url=MEDIACONVERT_ENDPOINT)
     print(f"🔗 MediaConvert 엔드포인트 설정: {MEDIACONVERT_ENDPOINT}")
 
-def create_mediaconvert_job(input_bucket: str, input_key: str) -> str:
+def create_mediaconvert_job(input_bucket: str, input_key: str, frame_capture: bool = True) -> str:
     """
-    - MP4: s3://video-output-pipeline-20250724/converted/  (기존 유지)
-    - 썸네일: s3://<input_bucket>/original/thumbnails/   (폴더만 지정 → {base}.000000.jpg 생성)
-    - 1초 지점 1장 캡처 (원하면 InputClippings 제거 가능)
+    - MP4: s3://video-output-pipeline-20250724/converted/  (기존 유지, 전체 길이)
+    - 썸네일(frame_capture=True일 때만): s3://<input_bucket>/original/thumbnails/   (폴더만 지정 → {base}.0000000.jpg 생성)
     """
     file_name = os.path.basename(input_key)
     base = os.path.splitext(file_name)[0]
@@ -147,9 +168,6 @@ def create_mediaconvert_job(input_bucket: str, input_key: str) -> str:
             "Inputs": [{
                 "FileInput": input_path,
                 "TimecodeSource": "ZEROBASED",
-                "InputClippings": [
-                    {"StartTimecode": "00:00:01:00", "EndTimecode": "00:00:01:01"}
-                ],
                 "AudioSelectors": {
                     "Audio Selector 1": {"DefaultSelection": "DEFAULT"}
                 },
@@ -190,35 +208,37 @@ def create_mediaconvert_job(input_bucket: str, input_key: str) -> str:
                         }],
                         "ContainerSettings": {"Container": "MP4"}
                     }]
-                },
-                # 썸네일 (프레임 캡처)
-                {
-                    "Name": "Thumbnail",
-                    "OutputGroupSettings": {
-                        "Type": "FILE_GROUP_SETTINGS",
-                        "FileGroupSettings": {"Destination": thumb_output_dir}
-                    },
-                    "Outputs": [{
-                        # ⚠️ NameModifier 넣지 않음 → 기본 규칙: <base>.000000.jpg
-                        "Extension": "jpg",
-                        "ContainerSettings": {"Container": "RAW"},
-                        "VideoDescription": {
-                            "CodecSettings": {
-                                "Codec": "FRAME_CAPTURE",
-                                "FrameCaptureSettings": {
-                                    "FramerateNumerator": 1,
-                                    "FramerateDenominator": 1,
-                                    "MaxCaptures": 1,
-                                    "Quality": 80
-                                }
-                            }
-                        }
-                    }]
                 }
             ]
         }
     }
 
+    # 썸네일 (프레임 캡처) - 키프레임 추출을 못 했을 때만
+    if frame_capture:
+        job_settings["Settings"]["OutputGroups"].append({
+            "Name": "Thumbnail",
+            "OutputGroupSettings": {
+                "Type": "FILE_GROUP_SETTINGS",
+                "FileGroupSettings": {"Destination": thumb_output_dir}
+            },
+            "Outputs": [{
+                # ⚠️ NameModifier 넣지 않음 → 기본 규칙: <base>.000000.jpg
+                "Extension": "jpg",
+                "ContainerSettings": {"Container": "RAW"},
+                "VideoDescription": {
+                    "CodecSettings": {
+                        "Codec": "FRAME_CAPTURE",
+                        "FrameCaptureSettings": {
+                            "FramerateNumerator": 1,
+                            "FramerateDenominator": 1,
+                            "MaxCaptures": 1,
+                            "Quality": 80
+                        }
+                    }
+                }
+            }]
+        })
+
     try:
         resp = mediaconvert_client.create_job(**job_settings)
         job_id = resp['Job']['Id']
@@ -228,6 +248,43 @@ def create_mediaconvert_job(input_bucket: str, input_key: str) -> str:
         print(f"❌ MediaConvert 작업 생성 실패: {e}")
         return None
 
+def build_and_save_keyframe_index(input_bucket: str, input_key: str):
+    """
+    원본의 moov만 Range GET으로 읽어 키프레임 시각/바이트 오프셋/GOP 크기 인덱스를 만들고
+    변환된 MP4 옆(converted/<base>.kfi)에 저장. original/ 바로 아래가 아니거나 실패하면 None (자르기 엔진은 ffprobe로 대체)
+    """
+    index_key = index_key_for(input_key)
+    if not KEYFRAME_INDEX_ENABLED or index_key is None \
+            or os.path.splitext(input_key.lower())[1] not in KEYFRAME_INDEX_FORMATS:
+        return None
+    try:
+        # 읽은 원본의 ETag를 메타데이터로 함께 저장 → 자르기 엔진이 다시 올린 영상/이름만 같은 영상과 구분
+        index = build_keyframe_index(f"s3://{input_bucket}/{input_key}", s3_client)
+        index_uri = save_keyframe_index(index, OUTPUT_BUCKET, index_key, s3_client)
+        print(f"🔑 키프레임 인덱스 저장: {index_uri} ({len(index)}개 키프레임, {index.fps:.3f}fps)")
+        return index_uri
+    except Exception as e:
+        print(f"⚠️ 키프레임 인덱스 생성 실패 (무시): {e}")
+        return None
+
+def generate_poster_thumbnail(input_bucket: str, input_key: str):
+    """
+    원본에서 POSTER_TIME에 가장 가까운 키프레임 1장만 받아 디코딩 → s3://<입력버킷>/original/thumbnails/<base>.jpg
+    (리네임 불필요). ffmpeg이 없거나 실패하면 None → MediaConvert 프레임 캡처로 대체
+    """
+    if not POSTER_FROM_KEYFRAME or not thumbnailer_available():
+        return None
+    base = os.path.splitext(os.path.basename(input_key))[0]
+    output = f"s3://{input_bucket}/{THUMBNAIL_PREFIX}{base}.jpg"
+    try:
+        result = extract_thumbnail(f"s3://{input_bucket}/{input_key}", output, POSTER_TIME,
+                                   width=POSTER_WIDTH, s3_client=s3_client)
+        print(f"🖼️ 포스터 썸네일 저장: {output} (키프레임 {result['time']:.3f}s, {result['size']:,} bytes)")
+        return output
+    except Exception as e:
+        print(f"⚠️ 포스터 썸네일 추출 실패 → MediaConvert 프레임 캡처 사용: {e}")
+        return None
+
 def rename_indexed_thumbnail(bucket: str, base_name: str, indexed_key: str):
     """
     s3://<bucket>/original/thumbnails/<base>.000000.jpg → same prefix/<base>.jpg 로 리네임(copy→delete)